@@ -0,0 +1,254 @@
+"""
+- Benchmarks code generation on a synthetic specification (see synthetic_spec.py)
+- Each phase of pixis.main.main() is timed (wall and CPU time), and the peak memory of each run is recorded
+- Every run happens in a fresh process: the first run in an empty directory (cold: nothing is cached and every file is
+  written), the following ones in the same directory (warm: caches are used and unchanged files are skipped).
+  With --cold, every run starts from an empty directory
+- Results are printed as json. With --compare, the median wall time of each phase is compared to a previous result
+  and the exit code is 1 if any phase got slower than --threshold allows
+
+Run from the repository root:
+    python benchmarks/generation.py --schemas 200 --paths 200 --runs 3 > result.json
+    python benchmarks/generation.py --schemas 200 --paths 200 --runs 3 --compare result.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..'))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import pixis.template_handler as tmpl  # noqa: E402
+import pixis.utils as utils  # noqa: E402
+import synthetic_spec  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+BUILD_FILES = {
+    'flask': "SPEC = 'swagger.yaml'\nIMPLEMENTATION = 'flask'\nOUTPUT = 'build'\nFLASK_SERVER_NAME = 'benchmark_server'\n",
+    'angular2': "SPEC = 'swagger.yaml'\nLANGUAGE = 'typescript'\nIMPLEMENTATION = 'angular2'\nOUTPUT = 'build'\n",
+}
+
+
+def run_phases(validate='full', jobs=1, trace_memory=False):
+    """Runs the phases of *pixis.main.main()* in the current directory, timing each of them
+
+    Args:
+        validate (str): validation mode, see Config.VALIDATE
+        jobs (int): number of schemas/tags to generate in parallel, see Config.JOBS
+        trace_memory (bool): also measure the peak memory allocated by Python with tracemalloc, which makes every
+            phase slower
+
+    Returns:
+        A dict with the 'phases' (name to 'wall' and 'cpu' seconds) and the peak memory of the run
+    """
+    phases = OrderedDict()
+
+    def phase(name, func, *args):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        func(*args)
+        phases[name] = {'wall': time.perf_counter() - wall, 'cpu': time.process_time() - cpu}
+
+    def load_spec_file():
+        utils.set_config('VALIDATE', 'none')
+        utils.load_spec_file()
+        utils.set_config('VALIDATE', validate)
+
+    utils.set_config('BUILD', 'build.py')
+    utils.set_config('TEMPLATES', 'templates')
+    utils.set_config('OUTPUT', 'build')
+    utils.set_config('VERBOSE', False)
+    utils.set_config('OVERWRITE', False)
+    utils.set_config('BYTECODE_CACHE', None)
+    utils.set_config('JOBS', jobs)
+    utils.set_config('BUNDLE', None)
+    utils.set_config('CACHE_DIR', '.pixis')
+    utils.set_config('CONFLICT', 'keep')
+    utils.set_config('CONFLICT_REPORT', None)
+
+    if trace_memory:
+        tracemalloc.start()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        phase('load_build_file', utils.load_build_file, 'build.py')
+        utils.set_config('PARENT', None)
+        phase('load_spec_file', load_spec_file)
+        phase('validate_specification', utils.validate_specification, utils.cfg.Config.SPEC_DICT)
+        phase('load_checksums', utils.load_checksums)
+        phase('set_iterators', utils.set_iterators)
+        phase('create_template_context', tmpl.create_template_context)
+        phase('run_iterators', utils.run_iterators)
+        phase('resolve_conflicts', utils.resolve_conflicts)
+        phase('save_checksums', utils.save_checksums)
+
+    result = {'phases': phases}
+    if trace_memory:
+        result['tracemalloc_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if resource is not None:
+        # kilobytes on Linux, bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        result['max_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return result
+
+
+def run_in_subprocess(directory, args):
+    """Runs *run_phases()* in a new Python process inside @directory
+
+    Args:
+        directory (str): directory with the build file and specification
+        args (argparse.Namespace): parsed command line arguments
+
+    Returns:
+        The dict returned by *run_phases()*
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--run', '--validate', args.validate, '--jobs', str(args.jobs)]
+    if args.trace_memory:
+        command.append('--trace-memory')
+    output = subprocess.check_output(command, cwd=directory)
+    return json.loads(output.decode('utf-8'))
+
+
+def summarize(runs):
+    """Computes the median wall and CPU time of each phase over @runs
+
+    Args:
+        runs (list): results of *run_phases()*
+
+    Returns:
+        An OrderedDict of phase name to 'wall' and 'cpu' medians, including a 'total' phase
+    """
+    summary = OrderedDict()
+    for name in runs[0]['phases']:
+        summary[name] = {key: statistics.median(run['phases'][name][key] for run in runs) for key in ('wall', 'cpu')}
+    summary['total'] = {key: statistics.median(sum(p[key] for p in run['phases'].values()) for run in runs)
+                        for key in ('wall', 'cpu')}
+    return summary
+
+
+def benchmark(args):
+    """Generates the specification, then runs and summarizes the benchmark
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments
+
+    Returns:
+        A dict with the parameters, every run and the 'cold' and 'warm' summaries
+    """
+    spec_kwargs = synthetic_spec.get_generate_kwargs(args)
+    root = tempfile.mkdtemp(prefix='pixis-benchmark-')
+    try:
+        source = os.path.join(root, 'source')
+        os.mkdir(source)
+        synthetic_spec.save(synthetic_spec.generate(**spec_kwargs), os.path.join(source, 'swagger.yaml'))
+        with open(os.path.join(source, 'build.py'), 'w') as f:
+            f.write(BUILD_FILES[args.implementation])
+
+        runs = []
+        for i in range(args.runs + 1):
+            cold = i == 0 or args.cold
+            if cold:
+                directory = os.path.join(root, 'run' + str(i))
+                shutil.copytree(source, directory)
+            run = run_in_subprocess(directory, args)
+            run['cache'] = 'cold' if cold else 'warm'
+            runs.append(run)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    result = {
+        'parameters': dict(spec_kwargs, implementation=args.implementation, validate=args.validate, jobs=args.jobs),
+        'python': platform.python_version(),
+        'runs': runs,
+        'cold': summarize([run for run in runs if run['cache'] == 'cold']),
+    }
+    warm_runs = [run for run in runs if run['cache'] == 'warm']
+    if warm_runs:
+        result['warm'] = summarize(warm_runs)
+    peaks = [run['max_rss_bytes'] for run in runs if 'max_rss_bytes' in run]
+    if peaks:
+        result['max_rss_bytes'] = max(peaks)
+    return result
+
+
+def compare(result, baseline, threshold):
+    """Compares the median wall time of each phase of @result with @baseline
+
+    Args:
+        result (dict): result of *benchmark()*
+        baseline (dict): a previous result of *benchmark()*
+        threshold (float): how much slower a phase may get, such as 0.2 for 20%
+
+    Returns:
+        A list of strings describing each phase that got slower than @threshold allows
+    """
+    regressions = []
+    for cache in ('cold', 'warm'):
+        for name, times in result.get(cache, {}).items():
+            before = baseline.get(cache, {}).get(name)
+            # phases that take less than a millisecond are too noisy to compare
+            if before is None or before['wall'] < 0.001:
+                continue
+            if times['wall'] > before['wall'] * (1 + threshold):
+                regressions.append('{} {}: {:.4f}s -> {:.4f}s ({:+.0%})'.format(
+                    cache, name, before['wall'], times['wall'], times['wall'] / before['wall'] - 1))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks pixis code generation on a synthetic specification')
+    synthetic_spec.add_arguments(parser)
+    parser.add_argument('--implementation', default='flask', choices=sorted(BUILD_FILES),
+                        help="implementation to generate, default: %(default)s")
+    parser.add_argument('--validate', default='full', choices=['full', 'incremental', 'fast', 'none'],
+                        help="validation mode, default: %(default)s")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="number of parallel jobs, default: %(default)s")
+    parser.add_argument('--runs', type=int, default=3, help="number of warm runs after the cold run, default: %(default)s")
+    parser.add_argument('--cold', action='store_true', help="start every run from an empty directory")
+    parser.add_argument('--trace-memory', action='store_true', dest='trace_memory',
+                        help="also record the peak memory allocated by Python (slows every phase down)")
+    parser.add_argument('--compare', default=None, help="json result of a previous benchmark to compare with")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="how much slower a phase may get before --compare fails, default: %(default)s")
+    parser.add_argument('--output', default=None, help="save the json result to this file instead of printing it")
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_phases(args.validate, args.jobs, args.trace_memory)))
+        return
+
+    result = benchmark(args)
+    text = json.dumps(result, indent=2)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for regression in regressions:
+            print('Regression:', regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
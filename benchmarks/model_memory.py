@@ -0,0 +1,108 @@
+"""
+- Measures how much memory the openapi objects (Schema, Property, Path, ...) of a generated specification take
+- Run from the repository root: python benchmarks/model_memory.py [--schemas N] [--paths N] (see synthetic_spec.py)
+- Prints a json object with the number of bytes allocated per object, so results can be compared between commits
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..'))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import pixis.config as cfg  # noqa: E402
+import pixis.openapi as oapi  # noqa: E402
+import synthetic_spec  # noqa: E402
+from pixis.languages.python import Python  # noqa: E402
+
+
+def build_objects(spec):
+    """Creates the openapi objects for @spec and reads the attributes that the templates read
+
+    Args:
+        spec (dict): the specification
+
+    Returns:
+        A list of every object that was created
+    """
+    objects = []
+    for name, schema_dict in spec['components']['schemas'].items():
+        schema = oapi.Schema(name, schema_dict)
+        objects.append(schema)
+        schema.dependencies
+        schema.has_enums
+        for prop in schema.properties:
+            objects.append(prop)
+            prop.type
+            prop.is_required
+            prop.enums
+
+    for url, path_dict in spec['paths'].items():
+        for method in ('get', 'put', 'post', 'delete'):
+            if method not in path_dict:
+                continue
+            parent = dict(path_dict, url=url, method=method)
+            path = oapi.Path(parent, path_dict[method])
+            objects.append(path)
+            path.parameters_in
+            path.response_formats
+            path.dependencies
+            objects.extend(path.parameters)
+            objects.extend(path.responses.values())
+            if path.request_body is not None:
+                objects.append(path.request_body)
+                objects.extend(path.request_body.contents)
+            for response in path.responses.values():
+                objects.extend(response.contents)
+
+    return objects
+
+
+def measure(spec_kwargs):
+    """Measures the memory allocated for the openapi objects of a specification
+
+    Args:
+        spec_kwargs (dict): arguments of *synthetic_spec.generate()*
+
+    Returns:
+        A dict with the number of objects, the bytes allocated for them and the bytes per object
+    """
+    cfg.Config.LANGUAGE = Python
+    cfg.Config.SPEC_DICT = synthetic_spec.generate(**spec_kwargs)
+
+    gc.collect()
+    tracemalloc.start()
+    objects = build_objects(cfg.Config.SPEC_DICT)
+    gc.collect()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    counts = {}
+    for obj in objects:
+        counts[type(obj).__name__] = counts.get(type(obj).__name__, 0) + 1
+
+    return {
+        'parameters': spec_kwargs,
+        'objects': len(objects),
+        'counts': counts,
+        'allocated_bytes': allocated,
+        'peak_bytes': peak,
+        'bytes_per_object': round(allocated / max(len(objects), 1), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the memory taken by the openapi objects')
+    synthetic_spec.add_arguments(parser)
+    parser.set_defaults(schemas=500, paths=500)
+    args = parser.parse_args()
+
+    print(json.dumps(measure(synthetic_spec.get_generate_kwargs(args)), indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+- Generates valid OpenAPI 3.0 specifications of any size, to benchmark pixis with
+- The same arguments (including the seed) always generate the same specification
+- Run from the repository root to write a specification: python benchmarks/synthetic_spec.py swagger.yaml --schemas 200
+"""
+import argparse
+import json
+import random
+
+import yaml
+
+PRIMITIVES = [
+    {'type': 'string'},
+    {'type': 'string', 'format': 'date-time'},
+    {'type': 'integer', 'format': 'int32'},
+    {'type': 'integer', 'format': 'int64'},
+    {'type': 'number', 'format': 'double'},
+    {'type': 'boolean'},
+]
+
+
+def generate(schemas=50, paths=50, tags=5, depth=2, ref_density=0.5, ref_depth=2, properties=8, seed=0):
+    """Generates a specification
+
+    Args:
+        schemas (int): number of schemas in components
+        paths (int): number of paths, each with a get, put and delete operation
+        tags (int): number of tags that the operations are spread over
+        depth (int): maximum number of arrays that a property's type is nested in, such as 2 for List[List[str]]
+        ref_density (float): probability (0 to 1) that a property, parameter or body is a $ref instead of inline
+        ref_depth (int): maximum length of a chain of schemas that reference each other. Schemas are spread over
+            @ref_depth + 1 levels, and a schema only references schemas of lower levels
+        properties (int): number of properties per schema
+        seed (int): seed of the random number generator
+
+    Returns:
+        A dict with the specification
+    """
+    rng = random.Random(seed)
+    tags = max(tags, 1)
+
+    spec = {
+        'openapi': '3.0.0',
+        'info': {'title': 'Synthetic API', 'version': '1.0.0'},
+        'servers': [{'url': 'http://localhost:8080/v1'}],
+        'tags': [{'name': 'tag' + str(i), 'description': 'Operations of tag ' + str(i)} for i in range(tags)],
+        'paths': {},
+        'components': {
+            'schemas': {},
+            'parameters': {
+                'Limit': {'name': 'limit', 'in': 'query', 'required': False, 'schema': {'type': 'integer', 'format': 'int32'}},
+            },
+            'requestBodies': {},
+        },
+    }
+
+    schema_names = ['Model' + str(i) for i in range(schemas)]
+    levels = max(ref_depth, 0) + 1
+    for i, name in enumerate(schema_names):
+        referenceable = [schema_names[k] for k in range(i) if k % levels < i % levels]
+        schema_properties = {}
+        for j in range(properties):
+            schema_properties['prop' + str(j)] = _make_property(rng, referenceable, depth, ref_density)
+        spec['components']['schemas'][name] = {
+            'type': 'object',
+            'required': ['prop0'] if properties else [],
+            'description': 'Synthetic model ' + str(i),
+            'properties': schema_properties,
+        }
+        if not properties:
+            del spec['components']['schemas'][name]['required']
+        spec['components']['requestBodies'][name] = {
+            'required': True,
+            'content': {'application/json': {'schema': {'$ref': '#/components/schemas/' + name}}},
+        }
+
+    for i in range(paths):
+        resource = 'resource' + str(i)
+        tag = 'tag' + str(i % tags)
+        name = schema_names[i % len(schema_names)] if schema_names else None
+        spec['paths']['/' + resource + '/{id}'] = {
+            'parameters': [{'name': 'id', 'in': 'path', 'required': True, 'schema': {'type': 'integer', 'format': 'int64'}}],
+            'get': {
+                'tags': [tag],
+                'summary': 'Get a ' + resource,
+                'operationId': 'get_' + resource,
+                'parameters': [_choose(rng, ref_density, {'$ref': '#/components/parameters/Limit'},
+                                       spec['components']['parameters']['Limit'])],
+                'responses': {
+                    '200': _make_response(rng, name, ref_density, 'OK'),
+                    '404': {'description': 'Not found'},
+                },
+            },
+            'put': {
+                'tags': [tag],
+                'summary': 'Update a ' + resource,
+                'operationId': 'update_' + resource,
+                'requestBody': _make_request_body(rng, name, ref_density),
+                'responses': {
+                    '200': _make_response(rng, name, ref_density, 'Updated'),
+                    '400': {'description': 'Invalid input'},
+                },
+            },
+            'delete': {
+                'tags': [tag],
+                'summary': 'Delete a ' + resource,
+                'operationId': 'delete_' + resource,
+                'responses': {'204': {'description': 'Deleted'}},
+            },
+        }
+
+    return spec
+
+
+def _choose(rng, ref_density, ref, inline):
+    """Chooses between @ref and a copy of @inline, based on @ref_density
+    """
+    if rng.random() < ref_density:
+        return dict(ref)
+    return json.loads(json.dumps(inline))
+
+
+def _make_property(rng, referenceable, depth, ref_density):
+    """Creates a property schema, which is a $ref to one of @referenceable or a primitive, nested in up to @depth arrays
+    """
+    if referenceable and rng.random() < ref_density:
+        schema = {'$ref': '#/components/schemas/' + rng.choice(referenceable)}
+    else:
+        schema = dict(rng.choice(PRIMITIVES))
+        if schema['type'] == 'string' and 'format' not in schema and rng.random() < 0.1:
+            schema['enum'] = ['value' + str(i) for i in range(rng.randint(2, 5))]
+
+    for _ in range(rng.randint(0, depth)):
+        schema = {'type': 'array', 'items': schema}
+    return schema
+
+
+def _make_response(rng, name, ref_density, description):
+    """Creates a response whose content is schema @name (or a string if there are no schemas)
+    """
+    schema = {'$ref': '#/components/schemas/' + name} if name else {'type': 'string'}
+    if name and rng.random() >= ref_density:
+        schema = {'type': 'array', 'items': schema}
+    return {'description': description, 'content': {'application/json': {'schema': schema}}}
+
+
+def _make_request_body(rng, name, ref_density):
+    """Creates a request body for schema @name (or a string if there are no schemas)
+    """
+    if name is None:
+        return {'content': {'application/json': {'schema': {'type': 'string'}}}}
+    return _choose(rng, ref_density, {'$ref': '#/components/requestBodies/' + name},
+                   {'required': True, 'content': {'application/json': {'schema': {'$ref': '#/components/schemas/' + name}}}})
+
+
+def save(spec, path):
+    """Saves @spec to @path, as json if @path ends with '.json' and as yaml otherwise
+
+    Args:
+        spec (dict): the specification
+        path (str): path of the file
+    """
+    with open(path, 'w') as f:
+        if path.endswith('.json'):
+            json.dump(spec, f, indent=2)
+        else:
+            yaml.safe_dump(spec, f, default_flow_style=False)
+
+
+def add_arguments(parser):
+    """Adds the arguments of *generate()* to @parser
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add the arguments to
+    """
+    parser.add_argument('--schemas', type=int, default=50, help="number of schemas, default: %(default)s")
+    parser.add_argument('--paths', type=int, default=50, help="number of paths, default: %(default)s")
+    parser.add_argument('--tags', type=int, default=5, help="number of tags, default: %(default)s")
+    parser.add_argument('--depth', type=int, default=2, help="maximum array nesting depth, default: %(default)s")
+    parser.add_argument('--ref-density', type=float, default=0.5, dest='ref_density',
+                        help="probability that a schema is a $ref, default: %(default)s")
+    parser.add_argument('--ref-depth', type=int, default=2, dest='ref_depth',
+                        help="maximum length of a chain of schema $refs, default: %(default)s")
+    parser.add_argument('--properties', type=int, default=8, help="number of properties per schema, default: %(default)s")
+    parser.add_argument('--seed', type=int, default=0, help="random seed, default: %(default)s")
+
+
+def get_generate_kwargs(args):
+    """Retrieves the arguments of *generate()* from parsed arguments
+
+    Args:
+        args (argparse.Namespace): arguments parsed by a parser that *add_arguments()* was called for
+
+    Returns:
+        A dict of keyword arguments for *generate()*
+    """
+    return {key: getattr(args, key) for key in ('schemas', 'paths', 'tags', 'depth', 'ref_density', 'ref_depth', 'properties', 'seed')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates a synthetic OpenAPI specification')
+    parser.add_argument('output', help="path of the specification, json if it ends with '.json' and yaml otherwise")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    save(generate(**get_generate_kwargs(args)), args.output)
+
+
+if __name__ == '__main__':
+    main()
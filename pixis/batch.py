@@ -0,0 +1,192 @@
+"""
+- This module generates the code of many services in one run (pixis batch): each build file is generated like running
+  pixis in the build file's directory does
+- What the services have in common is only done once:
+    - a specification is parsed, bundled and validated once, however many build files use it (see
+      *pixis.resolver.load_specification()*)
+    - templates are compiled once per templates directory (see *pixis.config.get_environment()*)
+  When services are generated in parallel, this is done before the worker processes are forked, so that they inherit
+  it instead of doing it again
+- One summary of what happened to the files of every service is printed at the end
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import jinja2
+
+import pixis.config as cfg
+import pixis.conflicts as conflicts
+import pixis.generator as generator
+import pixis.instrumentation as instr
+import pixis.utils as utils
+
+
+def find_build_files(patterns):
+    """Finds the build files that @patterns describe
+
+    Args:
+        patterns (List[str]): paths of build files, or glob patterns such as 'services/**/build.py' ('**' matches any
+            number of directories)
+
+    Returns:
+        A list of the paths of the build files, in the order of @patterns, each only once
+
+    Raises:
+        FileNotFoundError: Occurs when a pattern doesn't match any file
+    """
+    build_files = []
+    for pattern in patterns:
+        matches = sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        if not matches:
+            raise FileNotFoundError('No build file matches [' + pattern + ']')
+        for path in matches:
+            path = os.path.normpath(path)
+            if path not in build_files:
+                build_files.append(path)
+    return build_files
+
+
+def create_services(build_files, **settings):
+    """Creates a generator for each of @build_files, which works in the build file's directory
+
+    Args:
+        build_files (List[str]): paths of the build files
+        **settings: Config settings for every service, see *pixis.generator.Generator*
+
+    Returns:
+        A list of pixis.generator.Generator
+    """
+    return [generator.Generator(os.path.dirname(path) or os.curdir, build=os.path.basename(path), **settings)
+            for path in build_files]
+
+
+def prepare(services):
+    """Loads the build file and the specification of each of @services, and compiles every template they can use, so
+    that worker processes that are forked afterwards share them
+
+    A service that can't be prepared is skipped, its error is reported when it is generated
+
+    Args:
+        services (List[pixis.generator.Generator]): the services
+    """
+    for service in services:
+        with service.activate():
+            try:
+                utils.load_build_file(cfg.Config.BUILD)
+                utils.set_config('PARENT', None)
+                utils.load_spec_file()
+            except (Exception, SystemExit):  # an invalid specification exits
+                continue
+            for source in ('user', 'pixis'):
+                _compile_templates(cfg.get_environment(source))
+
+
+def _compile_templates(env):
+    """Compiles every template of @env that can be compiled
+
+    Args:
+        env (jinja2.Environment): the environment
+    """
+    for name in env.list_templates():
+        try:
+            env.get_template(name)
+        except (jinja2.TemplateError, UnicodeDecodeError):  # reported if a service uses it
+            pass
+
+
+def print_summary(build_files, results, seconds):
+    """Prints how many files had each outcome, for each service and in total
+
+    Args:
+        build_files (List[str]): paths of the build files of the services
+        results (list): return value of *pixis.generator.generate_all()* for the services
+        seconds (float): how long generating the services took
+    """
+    totals = dict.fromkeys(instr.OUTCOMES, 0)
+    width = max(len(path) for path in build_files)
+    print('\nGenerated ' + str(len(build_files)) + ' service(s) in {:.3f} seconds:'.format(seconds))
+    for path, counts in zip(build_files, results):
+        if counts is None:
+            print('  ' + path.ljust(width) + '  FAILED')
+            continue
+        for outcome, n in counts.items():
+            totals[outcome] += n
+        print('  ' + path.ljust(width) + '  ' + instr.format_counts(counts))
+    failed = results.count(None)
+    print('Total: ' + instr.format_counts(totals) + (', ' + str(failed) + ' service(s) failed' if failed else ''))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pixis batch',
+                                     description='Generates the code of many services, one for each build file')
+    parser.add_argument('build_files',
+                        nargs='+',
+                        metavar='BUILD_FILE',
+                        help="Build file, or glob pattern of build files such as 'services/**/build.py'. Each service "
+                             "is generated in the directory of its build file")
+    parser.add_argument('-j', '--jobs',
+                        default=os.cpu_count() or 1,
+                        type=int,
+                        help="Set number of services to generate in parallel, default: %(default)s",
+                        dest='jobs')
+    parser.add_argument('-v', '--verbose',
+                        action='store_true',
+                        help="Print how long each phase, template and file write took, for each service",
+                        dest='verbose')
+    parser.add_argument('-w', '--overwrite',
+                        default=generator.DEFAULTS['OVERWRITE'],
+                        help="Set force overwrite mode, default: %(default)s",
+                        dest='overwrite')
+    parser.add_argument('--conflict',
+                        default='keep',
+                        choices=conflicts.POLICIES,
+                        help="Set what is done with generated files that were modified by hand (prompt needs "
+                             "--jobs 1), default: %(default)s",
+                        dest='conflict')
+    parser.add_argument('--validate',
+                        default=generator.DEFAULTS['VALIDATE'],
+                        choices=['full', 'incremental', 'fast', 'none'],
+                        help="Set how the specifications are validated, default: %(default)s",
+                        dest='validate')
+    parser.add_argument('--no-validate',
+                        action='store_const',
+                        const='none',
+                        help="Don't validate the specifications, same as --validate=none",
+                        dest='validate')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help="Don't cache parsed specifications in .pixis/",
+                        dest='no_cache')
+    parser.add_argument('--bytecode-cache',
+                        default=generator.DEFAULTS['BYTECODE_CACHE'],
+                        help="Cache compiled templates in this directory between runs, default: %(default)s",
+                        dest='bytecode_cache')
+    args = parser.parse_args(argv)
+    if args.conflict == 'prompt' and args.jobs > 1:
+        parser.error('--conflict prompt can only be used with --jobs 1')
+
+    try:
+        build_files = find_build_files(args.build_files)
+    except FileNotFoundError as err:
+        parser.error(str(err))
+
+    # Services are generated in parallel, so each of them generates its schemas/tags one at a time
+    services = create_services(build_files,
+                               jobs=1,
+                               verbose=args.verbose,
+                               overwrite=args.overwrite,
+                               conflict=args.conflict,
+                               validate=args.validate,
+                               cache_dir=None if args.no_cache else generator.DEFAULTS['CACHE_DIR'],
+                               bytecode_cache=args.bytecode_cache)
+
+    started = time.perf_counter()
+    if args.jobs > 1 and len(services) > 1:
+        prepare(services)
+    results = generator.generate_all(services, args.jobs, keep_going=True)
+    print_summary(build_files, results, time.perf_counter() - started)
+    if None in results:
+        sys.exit(1)
@@ -0,0 +1,137 @@
+"""
+- This module stores values that are expensive to compute in the cache directory (Config.CACHE_DIR, '.pixis' by default)
+- Cached values are keyed by a checksum of everything they were computed from, so they never need to be invalidated
+- Caching is disabled when Config.CACHE_DIR is None
+"""
+import hashlib
+import json
+import os
+import pathlib
+import pickle
+import tempfile
+
+import pixis.config as cfg
+
+# The umask can only be read by setting it. Files that *replace()* creates get the permissions it allows
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def checksum(data):
+    """Computes the checksum that cache entries are keyed by
+
+    Args:
+        data (bytes): the data to compute the checksum for
+
+    Returns:
+        A string with the checksum of @data
+    """
+    return hashlib.md5(data).hexdigest()
+
+
+def checksum_value(value):
+    """Computes the checksum of any value that can be represented as JSON, regardless of dictionary key order
+
+    Args:
+        value: the value to compute the checksum for
+
+    Returns:
+        A string with the checksum of @value
+    """
+    return checksum(json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def get_path(section, key):
+    """Retrieves the path of a cache entry
+
+    Args:
+        section (str): name of the directory inside the cache directory, such as 'specs'
+        key (str): name of the entry, usually a checksum
+
+    Returns:
+        A pathlib.Path for the entry, or None if caching is disabled
+    """
+    if cfg.Config.CACHE_DIR is None:
+        return None
+    return pathlib.Path(cfg.Config.CACHE_DIR) / section / key
+
+
+def load(section, key):
+    """Retrieves a cached value
+
+    Args:
+        section (str): name of the directory inside the cache directory, such as 'specs'
+        key (str): name of the entry, usually a checksum
+
+    Returns:
+        The cached value, or None if there is no (readable) entry or caching is disabled
+    """
+    path = get_path(section, key)
+    if path is None:
+        return None
+    try:
+        return pickle.loads(path.read_bytes())
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+
+def save(section, key, value):
+    """Caches @value. The entry is written atomically, so an interrupted run never leaves a partial entry behind
+
+    Args:
+        section (str): name of the directory inside the cache directory, such as 'specs'
+        key (str): name of the entry, usually a checksum
+        value: the value to cache, which must be picklable
+    """
+    path = get_path(section, key)
+    if path is None:
+        return
+    write_atomic(path, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def write_atomic(path, data):
+    """Writes @data to @path by writing a temporary file next to it, then renaming it to @path
+
+    Args:
+        path (pathlib.Path): path of the file to write
+        data (bytes): the contents of the file
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = make_temporary(path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def make_temporary(path):
+    """Creates an empty temporary file next to @path, which can later be renamed to @path with *replace()*
+
+    Args:
+        path (pathlib.Path): path of the file that the temporary file will replace
+
+    Returns:
+        A tuple of the temporary file's file descriptor and path (str)
+    """
+    return tempfile.mkstemp(dir=str(path.parent), prefix='.' + path.name + '.')
+
+
+def replace(tmp_path, path):
+    """Atomically renames the temporary file @tmp_path to @path
+
+    The file gets the permissions that @path already had, or the default permissions for new files if it didn't
+    exist, instead of the private permissions that temporary files are created with
+
+    Args:
+        tmp_path (str): path of a temporary file created by *make_temporary()*
+        path (pathlib.Path): path to rename it to
+    """
+    try:
+        mode = os.stat(str(path)).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, str(path))
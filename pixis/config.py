@@ -1,17 +1,107 @@
+import collections
+import collections.abc
+import concurrent.futures
+import copy
 import difflib
-import hashlib
+import functools
+import itertools
+import multiprocessing
+import os
 import pathlib
-import re
+import threading
+import types
 from collections import OrderedDict
 
 import jinja2
 
-TEMPLATE_CONTEXT = {}
+import pixis.cache as cache
+import pixis.conflicts as conflicts
+import pixis.dependencies as deps
+import pixis.history as history
+import pixis.instrumentation as instr
+import pixis.manifest as manifest
+import pixis.protection as protection
+import pixis.session as session
+
+# Jinja2 environments are expensive to build and each one keeps its own compiled template cache, so pixis keeps one
+# environment per template source for the whole run instead of creating new ones for every emitted file
+_ENVIRONMENTS = {}
+_ENVIRONMENTS_LOCK = threading.Lock()
+
+# Per-thread generation state, see *run_per_item()*
+_state = threading.local()
+# Job id -> (session, key, functions) of the items being generated by forked worker processes
+_fork_jobs = {}
+_fork_job_ids = itertools.count()
+
+
+class _SessionSettings(type):
+    """Keeps the attributes of a class in the current session (see pixis.session) instead of in the class, so that
+    every session has its own. The attributes that the class body defines are the defaults each session starts with
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        defaults = {key: value for key, value in namespace.items() if not key.startswith('__')}
+        cls = super().__new__(mcs, name, bases, {key: value for key, value in namespace.items() if key not in defaults})
+        type.__setattr__(cls, '_defaults', defaults)
+        return cls
+
+    def __getattr__(cls, name):
+        try:
+            return getattr(session.get_current().config, name)
+        except AttributeError:
+            raise AttributeError('Config has no setting ' + repr(name))
+
+    def __setattr__(cls, name, value):
+        setattr(session.get_current().config, name, value)
+
+    def __delattr__(cls, name):
+        # Deleting a setting that has a default restores the default, like deleting it from the class used to
+        if name in cls._defaults:
+            setattr(session.get_current().config, name, copy.copy(cls._defaults[name]))
+        else:
+            delattr(session.get_current().config, name)
+
+    def __dir__(cls):
+        return sorted(set(type.__dir__(cls)) | set(vars(session.get_current().config)))
+
+    def create_settings(cls):
+        """Creates the settings of a new session, with a copy of every default
+
+        Returns:
+            A types.SimpleNamespace with the settings
+        """
+        return types.SimpleNamespace(**{name: copy.copy(value) for name, value in cls._defaults.items()})
+
+
+class _TemplateContext(collections.abc.MutableMapping):
+    """The template context of the current session, see pixis.session
+    """
 
+    def __getitem__(self, key):
+        return session.get_current().template_context[key]
 
-class Config(object):
+    def __setitem__(self, key, value):
+        session.get_current().template_context[key] = value
+
+    def __delitem__(self, key):
+        del session.get_current().template_context[key]
+
+    def __iter__(self):
+        return iter(session.get_current().template_context)
+
+    def __len__(self):
+        return len(session.get_current().template_context)
+
+    def __repr__(self):
+        return repr(session.get_current().template_context)
+
+
+class Config(object, metaclass=_SessionSettings):
     """Provides variables that pixis uses to configure code generation
 
+    Every session (see pixis.session) has its own copy of these settings, which start with the defaults below.
+
     Attributes:
         BUILD: A string that describes relative path to build file.
             Default: 'build.py'
@@ -24,17 +114,68 @@ class Config(object):
         PARENT: A string that describes relative path to output directory's parent directory (Determined from OUTPUT)
         FLASK_SERVER_NAME: A string that describes the directory name for default Flask server implementation.
             Default: 'flask_server'
-        VERBOSE: A boolean for Verbose mode TODO
+        FLASK_JSON_BACKEND: A string that describes which JSON library the Flask server serializes responses with
+            {'auto', 'orjson', 'ujson', 'json'}. A library that isn't installed falls back to json, 'auto' uses the
+            fastest one that is installed.
+            Default: 'auto'
+        FLASK_PORT: An integer for the port the Flask server listens on.
+            Default: 8082
+        FLASK_WORKERS: An integer for the number of worker processes of the Flask server, or None for twice the
+            number of CPUs plus one of the machine it runs on.
+            Default: None
+        FLASK_THREADS: An integer for the number of threads of each worker of the Flask server.
+            Default: 1
+        FLASK_KEEPALIVE: An integer for the number of seconds the Flask server waits for the next request on a
+            keep-alive connection.
+            Default: 2
+        FLASK_BACKLOG: An integer for the number of connections that can wait to be accepted by the Flask server.
+            Default: 2048
+        VERBOSE: A boolean for Verbose mode, which prints how long each phase, template and file write took and how
+            many files were generated, skipped, protected or prompted for at the end of the run.
             Default: False
         OVERWRITE: A boolean for force Overwrite.
             Default: False
-        PROTECTED: A list of strings describing file names or regular expressions for
-            files that Pixis should never overwrite (even if OVERWRITE is True)
+        PROTECTED: A list of strings describing file names, regular expressions or glob patterns for
+            files that Pixis should never overwrite (even if OVERWRITE is True), see pixis.protection
+        CONFLICT: A string that describes what is done with files that were modified since they were generated
+            {'prompt', 'keep', 'overwrite', 'new', 'merge'}, see pixis.conflicts.
+            Default: 'prompt'
+        CONFLICT_REPORT: A string that describes relative path to save the differences of the modified files to, as
+            one patch, when CONFLICT isn't 'prompt'. None to not save them.
+            Default: 'pixis-conflicts.patch'
         LANGUAGE: A class that inherits Language
         IMPLEMENTATION: A string that describes a supported implementation {'flask', 'angular2'}
             OR a subclass of Implementation
-        SPEC_DICT: A dictionary that holds the unmodified specification
+        JOBS: An integer for the number of schemas/tags to generate in parallel.
+            Default: 1
+        JOBS_BACKEND: A string that describes how parallel generation is done {'process', 'thread'}.
+            'process' needs the fork start method, and falls back to 'thread' where it isn't available.
+            Default: 'process'
+        VALIDATE: A string that describes how the specification is validated {'full', 'incremental', 'fast', 'none'}
+            Default: 'full'
+        CACHE_DIR: A string that describes relative path to the directory where Pixis caches parsed specifications, or
+            None to disable caching.
+            Default: '.pixis'
+        BYTECODE_CACHE: A string that describes relative path to a directory where compiled templates are cached
+            between runs, or None to disable the on-disk cache.
+            Default: None
+        BUNDLE: A string that describes relative path to save the specification to, with every $ref to another file
+            bundled into it, or None to not save it.
+            Default: None
+        PROFILE: A string that describes relative path to save cProfile statistics of the run to, or None to not
+            profile. Only the main process is profiled.
+            Default: None
+        TRACE_JSON: A string that describes relative path to save a Chrome trace (chrome://tracing) of the run's
+            phases, template renders and file writes to, or None to not record one.
+            Default: None
+        SPEC_DICT: A dictionary that holds the specification (with any $ref to another file bundled into it)
         _checksums: A dictionary for pixis to store file checksums
+        _file_stats: A dictionary for pixis to store the size and modification time of generated files, see
+            pixis.manifest
+        _fingerprints: A dictionary for pixis to store the fingerprint of what each generated file was rendered from,
+            see pixis.dependencies
+        _sources: A dictionary from (key, name) of template context items to the specification pointers they were
+            created from
     """
 
     # Defaults for these command line options are set in main.py
@@ -43,11 +184,27 @@ class Config(object):
     OUTPUT = None
     VERBOSE = None
     OVERWRITE = None
+    BYTECODE_CACHE = None
+    JOBS = None
+    CACHE_DIR = None
+    VALIDATE = None
+    PROFILE = None
+    TRACE_JSON = None
+    CONFLICT = None
+    CONFLICT_REPORT = None
 
     PARENT = None
     SPEC = 'swagger.yaml'
     FLASK_SERVER_NAME = 'flask_server'
+    FLASK_JSON_BACKEND = 'auto'
+    FLASK_PORT = 8082
+    FLASK_WORKERS = None
+    FLASK_THREADS = 1
+    FLASK_KEEPALIVE = 2
+    FLASK_BACKLOG = 2048
     PROTECTED = []
+    BUNDLE = None
+    JOBS_BACKEND = 'process'
 
     LANGUAGE = None
     IMPLEMENTATION = 'flask'
@@ -56,6 +213,13 @@ class Config(object):
     _iterators_mapping = OrderedDict()
     _iterator_functions_mapping = OrderedDict()
     _checksums = {}
+    _file_stats = {}
+    _fingerprints = {}
+    _sources = {}
+
+
+TEMPLATE_CONTEXT = _TemplateContext()
+session.set_default(session.Session(Config.create_settings()))
 
 
 class Language(object):
@@ -155,10 +319,7 @@ def schema_iterator(schema_iterator_functions):
     Args:
         schema_iterator_functions (List[function]): functions that this iterator will execute
     """
-    for schema_name, schema in TEMPLATE_CONTEXT['schemas'].items():
-        TEMPLATE_CONTEXT['_current_schema'] = schema_name
-        for f in schema_iterator_functions:
-            f()
+    run_per_item('_current_schema', list(TEMPLATE_CONTEXT['schemas']), schema_iterator_functions)
 
 
 def tag_iterator(tag_iterator_functions):
@@ -167,10 +328,220 @@ def tag_iterator(tag_iterator_functions):
     Args:
         tag_iterator_functions (List[function]): functions that this iterator will execute
     """
-    for tag, paths in TEMPLATE_CONTEXT['paths'].items():
-        TEMPLATE_CONTEXT['_current_tag'] = tag
-        for f in tag_iterator_functions:
+    run_per_item('_current_tag', list(TEMPLATE_CONTEXT['paths']), tag_iterator_functions)
+
+
+def get_context():
+    """Retrieves the template context for the item (schema, tag, etc) that is currently being generated
+
+    Generation functions should read the current item from this context instead of TEMPLATE_CONTEXT, because
+    TEMPLATE_CONTEXT is shared by all items when generating in parallel
+
+    Returns:
+        A read-only view of TEMPLATE_CONTEXT with the current item's variables, or TEMPLATE_CONTEXT itself when no
+        item is being generated
+    """
+    return getattr(_state, 'context', TEMPLATE_CONTEXT)
+
+
+def run_per_item(key, names, functions):
+    """Executes each function in @functions once per name in @names
+
+    Every item is generated with its own context, where @key is set to the item's name.
+    If Config.JOBS is greater than 1, items are generated in parallel using Config.JOBS_BACKEND. Checksums from
+    the workers are merged in the order of @names, and any files that were modified since they were generated are
+    prompted for once all items are generated.
+
+    Args:
+        key (str): template context variable that holds the current item's name, such as '_current_schema'
+        names (List[str]): names of the items to generate
+        functions (List[function]): functions to execute for each item
+    """
+    jobs = Config.JOBS or 1
+    if jobs <= 1 or len(names) <= 1:
+        for name in names:
+            TEMPLATE_CONTEXT[key] = name  # kept for build files that still read the shared context
+            checksums, fingerprints, file_stats, _ = _generate_item(key, name, functions, False)
+            _merge_records(checksums, fingerprints, file_stats)
+        return
+
+    chunks = [names[i::jobs * 4] for i in range(min(len(names), jobs * 4))]
+
+    current = session.get_current()
+    job = None
+    if Config.JOBS_BACKEND == 'process' and 'fork' in multiprocessing.get_all_start_methods():
+        job = next(_fork_job_ids)
+        _fork_jobs[job] = (current, key, functions)
+        executor = concurrent.futures.ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork'))
+        generate_chunk = functools.partial(_generate_chunk_in_process, job)
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(jobs)
+
+        def generate_chunk(chunk):
+            with current.activate():  # worker threads generate for the session that started them
+                return [_generate_item(key, name, functions, True) for name in chunk], None
+
+    try:
+        with executor:
+            results = {}
+            for chunk, (chunk_results, measurements) in zip(chunks, executor.map(generate_chunk, chunks)):
+                results.update(zip(chunk, chunk_results))
+                if measurements is not None:
+                    instr.merge(measurements)
+    finally:
+        _fork_jobs.pop(job, None)
+
+    for name in names:
+        checksums, fingerprints, file_stats, prompts = results[name]
+        _merge_records(checksums, fingerprints, file_stats)
+        for prompt in prompts:
+            conflicts.add(*prompt)
+
+
+def _generate_chunk_in_process(job, chunk):
+    """Generates every item in @chunk inside a forked worker process, which has its own copy of the template context
+
+    Args:
+        job (int): id of the job in _fork_jobs that the items belong to
+        chunk (List[str]): names of the items to generate
+
+    Returns:
+        A list of (checksums, fingerprints, file_stats, prompts) tuples, one for each item in @chunk, and the
+        measurements of the worker (see *pixis.instrumentation.collect()*)
+    """
+    current, key, functions = _fork_jobs[job]
+    with current.activate():
+        instr.reset()  # the worker inherited the measurements of the parent process
+        results = []
+        for name in chunk:
+            TEMPLATE_CONTEXT[key] = name
+            results.append(_generate_item(key, name, functions, True))
+        return results, instr.collect()
+
+
+def _generate_item(key, name, functions, defer_prompts):
+    """Executes each function in @functions with a context for item @name
+
+    Args:
+        key (str): template context variable that holds the current item's name
+        name (str): name of the item to generate
+        functions (List[function]): functions to execute for the item
+        defer_prompts (bool): if True, files that need the user's confirmation are returned instead of prompted for
+
+    Returns:
+        A tuple of the checksums, fingerprints and sizes/modification times of the files generated for the item, and
+        the deferred prompts
+    """
+    _state.item = (key, name)
+    _state.context = types.MappingProxyType(collections.ChainMap({key: name}, TEMPLATE_CONTEXT))
+    _state.checksums = {}
+    _state.fingerprints = {}
+    _state.file_stats = {}
+    _state.prompts = [] if defer_prompts else None
+    try:
+        for f in functions:
             f()
+        return _state.checksums, _state.fingerprints, _state.file_stats, _state.prompts or []
+    finally:
+        del _state.item
+        del _state.context
+        del _state.checksums
+        del _state.fingerprints
+        del _state.file_stats
+        del _state.prompts
+
+
+def _merge_records(checksums, fingerprints, file_stats):
+    """Merges what was recorded about the files generated for an item into Config, see *_record()*
+
+    Args:
+        checksums (dict): paths to checksums
+        fingerprints (dict): paths to fingerprints
+        file_stats (dict): paths to sizes and modification times, or None if they aren't known
+    """
+    Config._checksums.update(checksums)
+    Config._fingerprints.update(fingerprints)
+    for path, stat in file_stats.items():
+        if stat is None:
+            Config._file_stats.pop(path, None)
+        else:
+            Config._file_stats[path] = stat
+
+
+def get_environment(source):
+    """Retrieves the shared jinja2 environment for @source, creating it on first use
+
+    Environments are keyed by their template source and bytecode cache directory (as absolute paths), so a template
+    is only parsed and compiled once per process, however many sessions (see pixis.session) use it. If
+    Config.BYTECODE_CACHE is set, compiled templates are also stored on disk and reused by later runs.
+
+    Args:
+        source (str): 'user' for the templates in Config.TEMPLATES, 'pixis' for the templates shipped with Pixis
+
+    Returns:
+        A jinja2.Environment for @source
+    """
+    bytecode_cache = None if Config.BYTECODE_CACHE is None else str(pathlib.Path(Config.BYTECODE_CACHE).resolve())
+    if source == 'user':
+        key = (source, str(pathlib.Path(Config.TEMPLATES).resolve()), bytecode_cache)
+    else:
+        key = (source, None, bytecode_cache)
+
+    with _ENVIRONMENTS_LOCK:
+        env = _ENVIRONMENTS.get(key)
+        if env is None:
+            env = _create_environment(*key)
+            _ENVIRONMENTS[key] = env
+    return env
+
+
+def _create_environment(source, templates, bytecode_cache_dir):
+    """Creates a jinja2 environment for @source, see *get_environment()*
+
+    Args:
+        source (str): 'user' or 'pixis'
+        templates (str): absolute path of the user's templates directory, or None for Pixis' templates
+        bytecode_cache_dir (str): absolute path of the bytecode cache directory, or None to not cache bytecode
+
+    Returns:
+        A new jinja2.Environment
+    """
+    if source == 'user':
+        loader = jinja2.FileSystemLoader(templates)
+    else:
+        loader = jinja2.PackageLoader('pixis', 'templates')
+
+    bytecode_cache = None
+    if bytecode_cache_dir is not None:
+        pathlib.Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+
+    return jinja2.Environment(loader=loader,
+                              trim_blocks=True,
+                              lstrip_blocks=True,
+                              line_comment_prefix='//*',
+                              cache_size=-1,  # never evict, every template is reused for each tag/schema
+                              bytecode_cache=bytecode_cache)
+
+
+def get_template(template_path):
+    """Retrieves the compiled template for @template_path, preferring the user's templates over Pixis' templates
+
+    Args:
+        template_path (str): where the template is and what the template file's name is
+
+    Returns:
+        A tuple of the jinja2.Template and a boolean that is True if the template came from the user's templates
+
+    Raises:
+        jinja2.exceptions.TemplateNotFound: Occurs when neither the user nor Pixis has the template
+    """
+    try:  # check for any custom templates
+        # template_path is like: templates/model.j2, but templates directory is already loaded into jinja2 env
+        return get_environment('user').get_template(pathlib.Path(template_path).name), True
+    except jinja2.exceptions.TemplateNotFound:
+        # check for template in Pixis
+        return get_environment('pixis').get_template(template_path), False
 
 
 def emit_template(template_path, output_dir, output_name):
@@ -183,91 +554,234 @@ def emit_template(template_path, output_dir, output_name):
     """
     file_path = pathlib.Path(output_dir) / pathlib.Path(output_name)
 
-    try:  # check for any custom templates
-        env = jinja2.Environment(loader=jinja2.FileSystemLoader(Config.TEMPLATES),
-                                 trim_blocks=True,
-                                 lstrip_blocks=True,
-                                 line_comment_prefix='//*')
-        # template_path is like: templates/model.j2, but templates directory is already loaded into jinja2 env
-        template = env.get_template(pathlib.Path(template_path).name)
+    template, is_user_template = get_template(template_path)
+    if is_user_template:
         print('Using user\'s template for [' + str(file_path) + ']')
-    except jinja2.exceptions.TemplateNotFound:
-        try:  # check for template in Pixis
-            env = jinja2.Environment(loader=jinja2.PackageLoader('pixis', 'templates'),
-                                     trim_blocks=True,
-                                     lstrip_blocks=True,
-                                     line_comment_prefix='//*')
-            template = env.get_template(template_path)
-            print('Using Pixis template for [' + str(file_path) + ']')
-        except jinja2.exceptions.TemplateNotFound:
-            raise
+    else:
+        print('Using Pixis template for [' + str(file_path) + ']')
+
+    rule = _is_protected(file_path)
+    if rule is not None:
+        instr.count('protected')
+        print('Did not generate [' + str(file_path) + '] (PROTECTED by ' + repr(rule) + ')\n')
+        return
+
+    # Rendering is skipped if nothing the file was rendered from has changed since last time
+    fingerprint = deps.get_fingerprint(template, getattr(_state, 'item', None))
+    if not Config.OVERWRITE and deps.is_up_to_date(file_path, fingerprint):
+        instr.count('skipped')
+        print('Did not generate [' + str(file_path) + '] (nothing it depends on has changed since last time)\n')
+        return
 
     # This will make directories if they don't already exist
     pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
-    new_file_text = template.render(TEMPLATE_CONTEXT)
-    new_file_checksum = hashlib.md5(new_file_text.encode('utf-8')).hexdigest()
-
-    def is_protected(filepath):
-        # Following line does: PosixPath('build/server/hello.py') -> PosixPath('/server/hello.py')
-        p = pathlib.Path(str(pathlib.Path('/')) + str(filepath.relative_to(*filepath.parts[:1])))
-        for s in Config.PROTECTED:
-            if s in str(p):
-                return True
-            try:
-                pattern = re.compile(s)
-                if pattern.match(str(p)):
-                    return True
-            except re.error:
-                pass
-
-        return False
-
-    def maybe_generate(filepath, cur_file_text, new_file_text, new_file_checksum):
-        for line in difflib.unified_diff(cur_file_text.splitlines(),
-                                         new_file_text.splitlines(),
-                                         fromfile=filepath.name + '(current)',
-                                         tofile=filepath.name + '(new)'):
-            print(line)
-        overwrite = input('Overwrite file [' + str(filepath) + ']? (y/n) ') + ' '
-        if overwrite[0].lower() == 'y':
-            generate_file(filepath, new_file_text, new_file_checksum)
-            print('Overwrote file [' + str(filepath) + ']')
-        else:
-            print('Did not overwrite [' + str(filepath) + ']')
+    old_file_checksum = Config._checksums.get(str(file_path))
+    # The file is rendered into a temporary file next to it while its checksum is computed, so large outputs are never
+    # held in memory. The temporary file is renamed to the file if it is generated, and deleted otherwise
+    hasher = manifest.Hasher(manifest.is_legacy(old_file_checksum))
+    with instr.timed('render', template.name):
+        tmp_path = _render_to_temporary(template, file_path, hasher)
+    new_file_checksum = hasher.checksum()
+    try:
+        if Config.OVERWRITE:
+            _replace_file(file_path, tmp_path, new_file_checksum, fingerprint)
+            print('Generated [' + str(file_path) + '] (OVERWRITE flag set and not PROTECTED)\n')
+            return
+
+        try:
+            # If the file still has the size and modification time it had when it was generated, it doesn't need to be read
+            unmodified = manifest.is_unmodified(file_path)
+        except FileNotFoundError:  # Generation is safe, because not overwriting anything
+            _replace_file(file_path, tmp_path, new_file_checksum, fingerprint)
+            print("Generated [" + str(file_path) + "] because file doesn't exist yet\n")
+            return
+
+        if old_file_checksum is None:
+            if manifest.file_matches(new_file_checksum, file_path):
+                history.store(new_file_checksum, tmp_path)
+                _record(file_path, new_file_checksum, fingerprint, manifest.get_stat(file_path))
+                instr.count('skipped')
+                print('Did not generate [' + str(file_path) + '] (already contains what would be generated)\n')
+                return
+            _prompt(file_path, file_path.read_text(), _read_temporary(tmp_path), new_file_checksum, fingerprint)
+            return
+
+        if not unmodified:
+            unmodified = manifest.file_matches(old_file_checksum, file_path)
+
+        if hasher.matches(old_file_checksum):
+            history.store(new_file_checksum, tmp_path)
+            _record(file_path, new_file_checksum, fingerprint, manifest.get_stat(file_path) if unmodified else None)
+            instr.count('skipped')
+            print('Did not generate [' + str(file_path) + '] (would generate same file as last time)\n')
+            return
+
+        if unmodified:
+            _replace_file(file_path, tmp_path, new_file_checksum, fingerprint)
+            print('Generated [' + str(file_path) + ']. File is unmodified, but something has changed (templates/Pixis/etc)\n')
+            return
+
+        _prompt(file_path, file_path.read_text(), _read_temporary(tmp_path), new_file_checksum, fingerprint)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _render_to_temporary(template, file_path, hasher):
+    """Renders @template into a new temporary file next to @file_path, in chunks, adding each chunk to @hasher
 
-    def generate_file(path, text, checksum):
-        path.write_text(text)
-        Config._checksums[str(path)] = checksum
+    Args:
+        template (jinja2.Template): the template to render
+        file_path (pathlib.Path): path of the file that is generated
+        hasher (pixis.manifest.Hasher): computes the checksum of the rendered text
 
-    if is_protected(file_path):
-        print('Did not generate [' + str(file_path) + '] (PROTECTED)\n')
-        return
+    Returns:
+        The path (str) of the temporary file
+    """
+    fd, tmp_path = cache.make_temporary(file_path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            chunk = []
+            size = 0
+            for text in template.generate(get_context()):
+                chunk.append(text)
+                size += len(text)
+                if size >= manifest.CHUNK_SIZE:
+                    data = ''.join(chunk).encode('utf-8')
+                    hasher.update(data)
+                    f.write(data)
+                    chunk = []
+                    size = 0
+            data = ''.join(chunk).encode('utf-8')
+            hasher.update(data)
+            f.write(data)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def _read_temporary(tmp_path):
+    """Reads the text rendered by *_render_to_temporary()*, to show the user how it differs from the current file
 
-    if Config.OVERWRITE:
-        generate_file(file_path, new_file_text, new_file_checksum)
-        print('Generated [' + str(file_path) + '] (OVERWRITE flag set and not PROTECTED)\n')
-        return
+    Args:
+        tmp_path (str): path of the temporary file
 
-    try:
-        cur_file_text = file_path.read_text()
-        cur_file_checksum = hashlib.md5(cur_file_text.encode('utf-8')).hexdigest()
-    except FileNotFoundError:  # Generation is safe, because not overwriting anything
-        generate_file(file_path, new_file_text, new_file_checksum)
-        print("Generated [" + str(file_path) + "] because file doesn't exist yet\n")
-        return
+    Returns:
+        A string with the contents of the file
+    """
+    with open(tmp_path, 'rb') as f:
+        return f.read().decode('utf-8')
 
-    old_file_checksum = Config._checksums.get(str(file_path))
-    if old_file_checksum is None:
-        maybe_generate(file_path, cur_file_text, new_file_text, new_file_checksum)
-        return
 
-    if new_file_checksum == old_file_checksum:
-        print('Did not generate [' + str(file_path) + '] (would generate same file as last time)\n')
-        return
+def _is_protected(filepath):
+    """Checks whether @filepath matches any of Config.PROTECTED, see *pixis.protection*
+
+    Args:
+        filepath (pathlib.Path): path of the file to check
+
+    Returns:
+        The rule of Config.PROTECTED that @filepath matches, or None if the file may be overwritten
+    """
+    # Following line does: PosixPath('build/server/hello.py') -> PosixPath('/server/hello.py')
+    p = pathlib.Path(str(pathlib.Path('/')) + str(filepath.relative_to(*filepath.parts[:1])))
+    return protection.get_matcher().match(p.as_posix())
+
+
+def _prompt(filepath, cur_file_text, new_file_text, new_file_checksum, fingerprint):
+    """Resolves the conflict of @filepath with Config.CONFLICT (see *pixis.conflicts*), or defers it if items are
+    generated in parallel
+
+    Args:
+        filepath (pathlib.Path): path of the file that was modified since it was last generated
+        cur_file_text (str): current contents of the file
+        new_file_text (str): newly generated contents of the file
+        new_file_checksum (str): checksum of @new_file_text
+        fingerprint (str): fingerprint of what the new file was rendered from, see *pixis.dependencies*
+    """
+    instr.count('prompted' if conflicts.get_policy() == 'prompt' else 'conflicted')
+    prompts = getattr(_state, 'prompts', None)
+    if prompts is not None:
+        prompts.append((filepath, cur_file_text, new_file_text, new_file_checksum, fingerprint))
+    else:
+        conflicts.add(filepath, cur_file_text, new_file_text, new_file_checksum, fingerprint)
 
-    if cur_file_checksum == old_file_checksum:
-        generate_file(file_path, new_file_text, new_file_checksum)
-        print('Generated [' + str(file_path) + ']. File is unmodified, but something has changed (templates/Pixis/etc)\n')
-        return
 
-    maybe_generate(file_path, cur_file_text, new_file_text, new_file_checksum)
+def _maybe_generate(filepath, cur_file_text, new_file_text, new_file_checksum, fingerprint):
+    """Shows the user the differences between the current and new file, and overwrites it if the user agrees
+
+    Args:
+        filepath (pathlib.Path): path of the file that was modified since it was last generated
+        cur_file_text (str): current contents of the file
+        new_file_text (str): newly generated contents of the file
+        new_file_checksum (str): checksum of @new_file_text
+        fingerprint (str): fingerprint of what the new file was rendered from, see *pixis.dependencies*
+    """
+    for line in difflib.unified_diff(cur_file_text.splitlines(),
+                                     new_file_text.splitlines(),
+                                     fromfile=filepath.name + '(current)',
+                                     tofile=filepath.name + '(new)'):
+        print(line)
+    overwrite = input('Overwrite file [' + str(filepath) + ']? (y/n) ') + ' '
+    if overwrite[0].lower() == 'y':
+        _generate_file(filepath, new_file_text, new_file_checksum, fingerprint)
+        print('Overwrote file [' + str(filepath) + ']')
+    else:
+        print('Did not overwrite [' + str(filepath) + ']')
+
+
+def _generate_file(path, text, checksum, fingerprint):
+    """Writes @text to @path, records @checksum and @fingerprint for the file and stores @text as its last generated
+    version (see *pixis.history*)
+
+    Args:
+        path (pathlib.Path): path of the file to write
+        text (str): contents of the file
+        checksum (str): checksum of @text
+        fingerprint (str): fingerprint of what @text was rendered from, see *pixis.dependencies*
+    """
+    with instr.timed('write', str(path)):
+        cache.write_atomic(path, text.encode('utf-8'))
+    history.store_text(checksum, text)
+    _record(path, checksum, fingerprint, manifest.get_stat(path))
+    instr.count('generated')
+
+
+def _replace_file(path, tmp_path, checksum, fingerprint):
+    """Renames the temporary file @tmp_path to @path, records @checksum and @fingerprint for the file and stores its
+    contents as its last generated version (see *pixis.history*)
+
+    Args:
+        path (pathlib.Path): path of the file to generate
+        tmp_path (str): path of the temporary file the file was rendered into, see *_render_to_temporary()*
+        checksum (str): checksum of the temporary file's contents
+        fingerprint (str): fingerprint of what the file was rendered from, see *pixis.dependencies*
+    """
+    history.store(checksum, tmp_path)
+    with instr.timed('write', str(path)):
+        cache.replace(tmp_path, path)
+    _record(path, checksum, fingerprint, manifest.get_stat(path))
+    instr.count('generated')
+
+
+def _record(path, checksum, fingerprint, stat=None):
+    """Records @checksum and @fingerprint of the file at @path, which were generated by this run
+
+    Args:
+        path (pathlib.Path): path of the generated file
+        checksum (str): checksum of the generated text
+        fingerprint (str): fingerprint of what the generated text was rendered from
+        stat (list): size and modification time of the file if it is known to contain the generated text, see
+            *pixis.manifest.get_stat()*. Otherwise the file will be read to compare it next time
+    """
+    Config._checksums[str(path)] = checksum
+    Config._fingerprints[str(path)] = fingerprint
+    if stat is None:
+        Config._file_stats.pop(str(path), None)
+    else:
+        Config._file_stats[str(path)] = stat
+    checksums = getattr(_state, 'checksums', None)
+    if checksums is not None:
+        checksums[str(path)] = checksum
+        _state.fingerprints[str(path)] = fingerprint
+        _state.file_stats[str(path)] = stat
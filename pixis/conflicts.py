@@ -0,0 +1,187 @@
+"""
+- This module resolves conflicts: generated files that were modified since pixis generated them, and that pixis would
+  now generate differently
+- With Config.CONFLICT = 'prompt' (the default), the user is shown the differences and asked whether to overwrite each
+  file as soon as it is found. Every other policy resolves conflicts without asking, so a run never waits for input:
+    - 'keep': the modified file is kept
+    - 'overwrite': the modified file is overwritten
+    - 'new': the newly generated file is written next to the modified one, with '.new' appended to its name
+    - 'merge': the changes made to the file by hand are merged with the changes pixis made to it (see pixis.merge).
+      Changes that can't be merged are marked in the file like git marks them. Files whose last generated version
+      isn't stored (see pixis.history) can't be merged, and are resolved like with 'new'
+- Conflicts resolved by a policy are collected during the run and resolved at the end of it, when the differences of
+  every conflicting file are written into one patch (Config.CONFLICT_REPORT) that can be reviewed or applied later.
+  With 'merge', only the files that couldn't be merged cleanly are in the patch
+"""
+import concurrent.futures
+import difflib
+import multiprocessing
+import pathlib
+
+import pixis.cache as cache
+import pixis.config as cfg
+import pixis.history as history
+import pixis.merge as merge
+import pixis.session as session
+
+POLICIES = ('prompt', 'keep', 'overwrite', 'new', 'merge')
+NEW_SUFFIX = '.new'
+
+
+def _get_conflicts():
+    """Retrieves the conflicts that wait to be resolved in the current session, see pixis.session
+
+    Returns:
+        A list of (path, current text, new text, new checksum, fingerprint) tuples
+    """
+    return session.get_state(__name__, list)
+
+
+def get_policy():
+    """Retrieves the policy that conflicts are resolved with
+
+    Returns:
+        One of POLICIES
+
+    Raises:
+        ValueError: Occurs when Config.CONFLICT isn't one of POLICIES
+    """
+    policy = cfg.Config.CONFLICT or 'prompt'
+    if policy not in POLICIES:
+        raise ValueError('CONFLICT must be one of ' + str(POLICIES) + ', not ' + repr(policy))
+    return policy
+
+
+def add(filepath, cur_file_text, new_file_text, new_file_checksum, fingerprint):
+    """Resolves a conflict: prompts for it if the policy is 'prompt', or collects it to be resolved by *resolve()*
+
+    Args:
+        filepath (pathlib.Path): path of the file that was modified since it was last generated
+        cur_file_text (str): current contents of the file
+        new_file_text (str): newly generated contents of the file
+        new_file_checksum (str): checksum of @new_file_text
+        fingerprint (str): fingerprint of what the new file was rendered from, see *pixis.dependencies*
+    """
+    if get_policy() == 'prompt':
+        cfg._maybe_generate(filepath, cur_file_text, new_file_text, new_file_checksum, fingerprint)
+    else:
+        _get_conflicts().append((filepath, cur_file_text, new_file_text, new_file_checksum, fingerprint))
+
+
+def resolve():
+    """Resolves every collected conflict with the policy, and writes their differences into Config.CONFLICT_REPORT
+
+    Returns:
+        The number of conflicts that were resolved
+    """
+    conflicts = sorted(_get_conflicts(), key=lambda conflict: str(conflict[0]))
+    del _get_conflicts()[:]
+    if not conflicts:
+        return 0
+
+    policy = get_policy()
+    unmerged, marked = _merge_all(conflicts) if policy == 'merge' else (conflicts, [])
+    for filepath, _, new_file_text, new_file_checksum, fingerprint in unmerged:
+        if policy == 'overwrite':
+            cfg._generate_file(filepath, new_file_text, new_file_checksum, fingerprint)
+            print('Overwrote [' + str(filepath) + '] (modified since it was generated, CONFLICT is overwrite)')
+        elif policy in ('new', 'merge'):
+            new_path = filepath.with_name(filepath.name + NEW_SUFFIX)
+            cache.write_atomic(new_path, new_file_text.encode('utf-8'))
+            print('Generated [' + str(new_path) + '] ([' + str(filepath) + '] was modified since it was generated)')
+        else:
+            print('Did not overwrite [' + str(filepath) + '] (modified since it was generated, CONFLICT is keep)')
+
+    reported = sorted(unmerged + marked, key=lambda conflict: str(conflict[0]))
+    if cfg.Config.CONFLICT_REPORT is not None and reported:
+        diffs = _map(get_diff, [conflict[:3] for conflict in reported])
+        cache.write_atomic(pathlib.Path(cfg.Config.CONFLICT_REPORT), ''.join(diffs).encode('utf-8'))
+        print('Saved the differences of ' + str(len(reported)) + ' modified file(s) to [' + cfg.Config.CONFLICT_REPORT + ']')
+    return len(conflicts)
+
+
+def _merge_all(conflicts):
+    """Merges each of @conflicts with the last generated version of its file, and writes the merged files
+
+    Args:
+        conflicts (list): the conflicts to merge
+
+    Returns:
+        A tuple of the conflicts that couldn't be merged because the last generated version of the file isn't stored,
+        and the conflicts whose merged file has conflict markers
+    """
+    bases = [history.load(cfg.Config._checksums.get(str(conflict[0]))) for conflict in conflicts]
+    merges = _map(_merge, [(base, conflict[1], conflict[2]) for base, conflict in zip(bases, conflicts)])
+
+    unmerged = []
+    marked = []
+    for conflict, merged in zip(conflicts, merges):
+        filepath, _, new_file_text, new_file_checksum, fingerprint = conflict
+        if merged is None:
+            print('Could not merge [' + str(filepath) + '] (the version generated last time is not stored)')
+            unmerged.append(conflict)
+            continue
+
+        merged_text, markers = merged
+        if merged_text == new_file_text:
+            cfg._generate_file(filepath, new_file_text, new_file_checksum, fingerprint)
+            print('Merged [' + str(filepath) + '] (the changes made to it are part of the new version)')
+            continue
+
+        cache.write_atomic(filepath, merged_text.encode('utf-8'))
+        history.store_text(new_file_checksum, new_file_text)
+        cfg._record(filepath, new_file_checksum, fingerprint)  # the file isn't what was generated, so it has no stat
+        if markers:
+            print('Merged [' + str(filepath) + '] with ' + str(markers) + ' conflict(s), marked by ' + merge.CURRENT_MARKER.strip())
+            marked.append(conflict)
+        else:
+            print('Merged [' + str(filepath) + '] (modified since it was generated, CONFLICT is merge)')
+    return unmerged, marked
+
+
+def _merge(texts):
+    """Merges the current and new text of a file with the text that was generated last time
+
+    Args:
+        texts (tuple): the text generated last time (None if it isn't stored), the current text and the new text
+
+    Returns:
+        The return value of *pixis.merge.merge3()*, or None if the text generated last time isn't stored
+    """
+    base, cur_file_text, new_file_text = texts
+    if base is None:
+        return None
+    return merge.merge3(base, cur_file_text, new_file_text)
+
+
+def get_diff(conflict):
+    """Computes the differences between the current and new contents of a file, as a patch that makes the current
+    file the newly generated one
+
+    Args:
+        conflict (tuple): the path (pathlib.Path), current text and new text of the file
+
+    Returns:
+        A string with the unified diff
+    """
+    filepath, cur_file_text, new_file_text = conflict
+    lines = difflib.unified_diff(cur_file_text.splitlines(True), new_file_text.splitlines(True),
+                                 fromfile='a/' + filepath.as_posix(), tofile='b/' + filepath.as_posix())
+    return ''.join(line if line.endswith('\n') else line + '\n\\ No newline at end of file\n' for line in lines)
+
+
+def _map(func, items):
+    """Applies @func to each of @items, in Config.JOBS forked processes if there are several
+
+    Args:
+        func (function): a module level function
+        items (list): the arguments of each call
+
+    Returns:
+        A list of the results, in the order of @items
+    """
+    jobs = cfg.Config.JOBS or 1
+    if jobs <= 1 or len(items) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        return [func(item) for item in items]
+    with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+        return list(executor.map(func, items, chunksize=max(len(items) // (jobs * 4), 1)))
@@ -0,0 +1,359 @@
+"""
+- This module tracks what each generated file was rendered from, so that files whose inputs haven't changed since
+  the last run don't need to be rendered again
+- A file's inputs are the parts of the specification it was generated from (including any $ref targets), the top
+  level parts of the specification outside 'paths' and 'components' (such as 'servers'), the names of all schemas
+  (templates check whether a type is a schema), the templates that rendered it, the build file settings (including
+  the source of the custom classes, functions and helper modules they use) and the version of pixis
+- The inputs of a file are combined into a single fingerprint, which is saved in .pixis.json (see pixis.manifest)
+"""
+import hashlib
+import inspect
+import pathlib
+
+import jinja2.meta
+
+import pixis.cache as cache
+import pixis.config as cfg
+import pixis.resolver as resolver
+import pixis.session as session
+
+PIXIS_DIR = pathlib.Path(__file__).parent
+
+# Settings that don't change what is generated
+IGNORED_SETTINGS = {'BUILD', 'VERBOSE', 'OVERWRITE', 'JOBS', 'JOBS_BACKEND', 'BYTECODE_CACHE', 'CACHE_DIR', 'BUNDLE',
+                    'VALIDATE', 'SPEC_DICT', 'PROFILE', 'TRACE_JSON', 'CONFLICT', 'CONFLICT_REPORT'}
+
+
+def _get_memo():
+    """Retrieves the checksums of pointers, templates and settings that were computed in the current session (see
+    pixis.session), as they are only computed once per run
+
+    Returns:
+        A dict of what the checksum is of to the checksum
+    """
+    return session.get_state(__name__, dict)
+
+
+def reset():
+    """Forgets every checksum computed so far. Needed whenever the specification, templates or settings change
+    """
+    _get_memo().clear()
+
+
+def add_source(key, name, pointer):
+    """Records that the template context item @name was created from the specification at @pointer
+
+    Args:
+        key (str): template context variable that holds the item's name, such as '_current_schema'
+        name (str): name of the item, such as the schema name or tag
+        pointer (str): JSON pointer into the specification, such as '/components/schemas/Pet'
+    """
+    cfg.Config._sources.setdefault((key, name), []).append(pointer)
+
+
+def get_dependencies(template, item=None):
+    """Retrieves the checksums of everything a file rendered by @template for @item depends on
+
+    Args:
+        template (jinja2.Template): the template that renders the file
+        item (tuple): (key, name) of the template context item the file is generated for, or None if the file is
+            generated once. Files that are generated once depend on the whole specification
+
+    Returns:
+        A dict with the checksums of the file's 'spec' pointers, 'templates' and 'settings', and the 'schemas' names
+    """
+    if item is None:
+        pointers = ['']
+    else:
+        pointers = cfg.Config._sources.get(item, ['']) + _get_shared_pointers()
+
+    return {
+        'spec': {pointer: _get_pointer_checksum(pointer) for pointer in _get_pointer_closure(pointers)},
+        'schemas': _get_schema_names(),
+        'templates': _get_template_checksums(template.environment, template.name),
+        'settings': _get_settings_checksum(),
+    }
+
+
+def get_fingerprint(template, item=None):
+    """Computes the fingerprint of everything a file rendered by @template for @item depends on
+
+    Args:
+        template (jinja2.Template): the template that renders the file
+        item (tuple): (key, name) of the template context item the file is generated for, or None if the file is
+            generated once
+
+    Returns:
+        A string that only changes when rendering the file could produce a different text
+    """
+    return cache.checksum_value({'dependencies': get_dependencies(template, item), 'pixis': _get_pixis_checksum()})
+
+
+def is_up_to_date(file_path, fingerprint):
+    """Checks whether @file_path was generated last time from inputs with the same @fingerprint
+
+    Args:
+        file_path (pathlib.Path): path of the generated file
+        fingerprint (str): the file's current fingerprint, see *get_fingerprint()*
+
+    Returns:
+        True if rendering the file again would produce the file from last time
+    """
+    if cfg.Config._fingerprints.get(str(file_path)) != fingerprint:
+        return False
+    return str(file_path) in cfg.Config._checksums and file_path.exists()
+
+
+def _resolve_pointer(pointer):
+    """Retrieves the part of the specification at @pointer
+
+    Args:
+        pointer (str): JSON pointer into the specification
+
+    Returns:
+        The value at @pointer, or None if it doesn't exist
+    """
+    try:
+        return resolver.resolve_pointer(pointer)
+    except KeyError:
+        return None
+
+
+def _get_pointer_checksum(pointer):
+    """Computes the checksum of the part of the specification at @pointer
+
+    Args:
+        pointer (str): JSON pointer into the specification
+
+    Returns:
+        A string with the checksum
+    """
+    memo = _get_memo()
+    key = ('pointer', pointer)
+    if key not in memo:
+        memo[key] = cache.checksum_value(_resolve_pointer(pointer))
+    return memo[key]
+
+
+def _get_refs(pointer):
+    """Retrieves every local $ref inside the part of the specification at @pointer
+
+    Args:
+        pointer (str): JSON pointer into the specification
+
+    Returns:
+        A set of JSON pointers that @pointer references
+    """
+    memo = _get_memo()
+    key = ('refs', pointer)
+    if key in memo:
+        return memo[key]
+
+    refs = resolver.find_refs(_resolve_pointer(pointer))
+    memo[key] = refs
+    return refs
+
+
+def _get_schema_names():
+    """Retrieves the names of the schemas of the specification. A file generated for one item can depend on them
+    without referencing them, such as a model template that checks whether a property's type is a schema
+
+    Returns:
+        A sorted list of schema names
+    """
+    memo = _get_memo()
+    if 'schemas' not in memo:
+        memo['schemas'] = sorted(cfg.Config.SPEC_DICT.get('components', {}).get('schemas') or {})
+    return memo['schemas']
+
+
+def _get_shared_pointers():
+    """Retrieves the pointers of the top level parts of the specification that every item's file can depend on
+    through the shared template context, such as 'servers' (see *pixis.template_handler.get_base_path()*). Only
+    'paths' and 'components' are split between the items
+
+    Returns:
+        A sorted list of JSON pointers
+    """
+    memo = _get_memo()
+    if 'shared' not in memo:
+        memo['shared'] = sorted('/' + resolver.escape_token(name) for name in cfg.Config.SPEC_DICT
+                                if name not in ('paths', 'components'))
+    return memo['shared']
+
+
+def _get_pointer_closure(pointers):
+    """Retrieves @pointers and every pointer that they reference, directly or through other references
+
+    Args:
+        pointers (List[str]): JSON pointers into the specification
+
+    Returns:
+        A sorted list of JSON pointers
+    """
+    closure = set()
+    stack = list(pointers)
+    while stack:
+        pointer = stack.pop()
+        if pointer in closure:
+            continue
+        closure.add(pointer)
+        if pointer != '':  # the whole specification already contains its references
+            stack.extend(_get_refs(pointer))
+    return sorted(closure)
+
+
+def _get_template_checksums(env, name):
+    """Computes the checksums of template @name and every template it includes, imports or extends
+
+    Args:
+        env (jinja2.Environment): the environment that loads the template
+        name (str): name of the template
+
+    Returns:
+        A dict of template names to checksums
+    """
+    memo = _get_memo()
+    key = ('template', id(env), name)
+    if key in memo:
+        return memo[key]
+
+    source = env.loader.get_source(env, name)[0]
+    checksums = {name: hashlib.md5(source.encode('utf-8')).hexdigest()}
+    for referenced in jinja2.meta.find_referenced_templates(env.parse(source)):
+        if referenced is not None and referenced not in checksums:
+            checksums.update(_get_template_checksums(env, referenced))
+
+    memo[key] = checksums
+    return checksums
+
+
+def _get_settings_checksum():
+    """Computes the checksum of the build file and all Config settings that affect generation
+
+    Returns:
+        A string with the checksum
+    """
+    memo = _get_memo()
+    if 'settings' in memo:
+        return memo['settings']
+
+    settings = {}
+    for name in dir(cfg.Config):
+        if name in IGNORED_SETTINGS or name.startswith('__'):
+            continue
+        value = getattr(cfg.Config, name, None)
+        if name.isupper():
+            settings[name] = _get_setting_value(value)
+        elif inspect.ismodule(value):  # imported by the build file, such as a module of helpers
+            if _is_project_file(getattr(value, '__file__', None)):
+                settings[name] = _get_source_checksum(value)
+        elif _is_project_file(getattr(inspect.getmodule(_get_definition(value)), '__file__', None)):
+            settings[name] = _get_setting_value(value)  # a helper function or object imported by the build file
+
+    try:
+        settings['BUILD'] = hashlib.md5(pathlib.Path(cfg.Config.BUILD).read_bytes()).hexdigest()
+    except (FileNotFoundError, TypeError):
+        settings['BUILD'] = None
+
+    memo['settings'] = cache.checksum_value(settings)
+    return memo['settings']
+
+
+def _get_setting_value(value):
+    """Retrieves what identifies the setting @value in the settings checksum. Custom classes, functions and objects
+    are identified by their source, as their name doesn't change when they do and their repr() usually contains
+    their address, which changes every run
+
+    Args:
+        value: the value of a setting
+
+    Returns:
+        A value that only changes when @value generates something different
+    """
+    if isinstance(value, (list, tuple)):
+        return [_get_setting_value(item) for item in value]
+    if isinstance(value, dict):
+        return [[repr(key), _get_setting_value(item)] for key, item in value.items()]
+    definition = _get_definition(value)
+    if definition is None:
+        return repr(value)
+    identity = [definition.__module__ + '.' + definition.__qualname__, _get_source_checksum(definition)]
+    if definition is type(value):  # an object, which also has its attributes
+        identity.append({key: _get_setting_value(item) for key, item in getattr(value, '__dict__', {}).items()})
+    return identity
+
+
+def _get_definition(value):
+    """Retrieves the class or function whose source defines @value
+
+    Args:
+        value: the value of a setting
+
+    Returns:
+        @value if it is a class or function, the class of @value if it is an object whose repr() isn't its own (such
+        as '<Helper object at 0x...>'), or None if repr() identifies @value
+    """
+    if isinstance(value, type) or inspect.isroutine(value):
+        return value if hasattr(value, '__qualname__') else None
+    if type(value).__repr__ is object.__repr__:
+        return type(value)
+    return None
+
+
+def _is_project_file(path):
+    """Checks whether @path is a source file of the project being generated, rather than of pixis, the standard
+    library or an installed package
+
+    Args:
+        path (str): path of a module's file, or None
+
+    Returns:
+        True if @path is inside the current directory and not inside pixis
+    """
+    if path is None:
+        return False
+    path = pathlib.Path(path).resolve()
+    cwd = pathlib.Path.cwd().resolve()
+    return cwd in path.parents and PIXIS_DIR.resolve() not in path.parents
+
+
+def _get_source_checksum(value):
+    """Computes the checksum of the source file of the module that defines @value
+
+    Args:
+        value: a class, function or module
+
+    Returns:
+        A string with the checksum, or None if @value is part of pixis (see *_get_pixis_checksum()*) or its source
+        can't be found
+    """
+    module = inspect.getmodule(value)
+    path = getattr(module, '__file__', None)
+    if path is None or PIXIS_DIR.resolve() in pathlib.Path(path).resolve().parents:
+        return None
+    try:
+        return hashlib.md5(pathlib.Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _get_pixis_checksum():
+    """Computes the checksum of the source code of pixis, which identifies the version of pixis (including any
+    unreleased changes) that generates the files
+
+    Returns:
+        A string with the checksum
+    """
+    memo = _get_memo()
+    if 'pixis' in memo:
+        return memo['pixis']
+
+    md5 = hashlib.md5()
+    for path in sorted(PIXIS_DIR.glob('**/*.py')):
+        md5.update(str(path.relative_to(PIXIS_DIR)).encode('utf-8'))
+        md5.update(path.read_bytes())
+
+    memo['pixis'] = md5.hexdigest()
+    return memo['pixis']
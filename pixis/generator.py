@@ -0,0 +1,210 @@
+"""
+- This module is the API for using pixis from Python: a Generator generates the code of one service, like running
+  pixis from the command line in the service's directory does, and can generate it any number of times
+- Each Generator has its own session (see pixis.session), so generators don't share settings, specifications,
+  template contexts or what they generated, and a process can generate any number of services
+- The working directory is shared by every thread of a process, so a process generates one service at a time.
+  *generate_all()* generates several services at the same time in forked processes, which also keeps generation from
+  being limited by the GIL
+"""
+import concurrent.futures
+import contextlib
+import itertools
+import multiprocessing
+import os
+import threading
+import traceback
+
+import pixis.config as cfg
+import pixis.instrumentation as instr
+import pixis.session as session
+import pixis.template_handler as tmpl
+import pixis.utils as utils
+import pixis.watch as watch
+
+# Settings that the command line has options for, and the defaults of the options
+DEFAULTS = {
+    'BUILD': 'build.py',
+    'TEMPLATES': 'templates',
+    'OUTPUT': 'build',
+    'VERBOSE': False,
+    'OVERWRITE': False,
+    'CONFLICT': 'prompt',
+    'CONFLICT_REPORT': 'pixis-conflicts.patch',
+    'JOBS': 1,
+    'VALIDATE': 'full',
+    'CACHE_DIR': '.pixis',
+    'BUNDLE': None,
+    'BYTECODE_CACHE': None,
+    'PROFILE': None,
+    'TRACE_JSON': None,
+}
+
+# Held by the generator that is working in its directory
+_directory_lock = threading.RLock()
+# Job id -> (generators, keep_going) of the generators being generated by forked worker processes, see
+# *generate_all()*
+_fork_jobs = {}
+_fork_job_ids = itertools.count()
+
+
+class Generator(object):
+    """Generates the code of one service
+
+    Args:
+        directory (str): directory that the build file, specification, templates and output are relative to, like the
+            directory pixis is run in from the command line. Default: the current directory
+        **settings: Config settings, such as BUILD='api.py' or JOBS=4. Settings that the command line has options for
+            default to the defaults of the options (see DEFAULTS)
+    """
+
+    def __init__(self, directory=None, **settings):
+        self.directory = os.path.abspath(directory or os.curdir)
+        self.settings = dict(DEFAULTS)
+        self.settings.update((name.upper(), value) for name, value in settings.items())
+        self.session = session.Session(cfg.Config.create_settings())
+        self._reset_config()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes the session of this generator the current session, and its directory the working directory, inside
+        the with block. Other threads wait for the with block to end before a generator can work in its directory
+        """
+        with _directory_lock, self.session.activate():
+            previous = os.getcwd()
+            os.chdir(self.directory)
+            try:
+                yield self
+            finally:
+                os.chdir(previous)
+
+    def generate(self, reload_build=True, reload_spec=True):
+        """Generates code with the settings of this generator and its build file
+
+        Args:
+            reload_build (bool): load the build file, starting from the settings of this generator. False keeps the
+                settings and iterators of the last call
+            reload_spec (bool): load the specification. False keeps the specification and template context of the
+                last call
+
+        Returns:
+            A dict of how many files had each outcome, see *pixis.instrumentation.get_counts()*
+        """
+        with self.activate():
+            instr.reset()
+            if reload_build:
+                self._reset_config()
+                with instr.phase('load_build_file'):
+                    utils.load_build_file(cfg.Config.BUILD)  # Pull in config options
+                utils.set_config('PARENT', None)
+            if reload_build or reload_spec:
+                with instr.phase('load_spec_file'):
+                    utils.load_spec_file()
+            with instr.phase('load_checksums'):
+                utils.load_checksums()
+
+            if reload_build:
+                with instr.phase('set_iterators'):
+                    # Before create_template_context() because user's build file can mess up template context
+                    utils.set_iterators()
+            if reload_build or reload_spec:
+                with instr.phase('create_template_context'):
+                    tmpl.create_template_context()
+            with instr.phase('run_iterators'):
+                utils.run_iterators()
+            with instr.phase('resolve_conflicts'):
+                utils.resolve_conflicts()
+            with instr.phase('save_checksums'):
+                utils.save_checksums()
+
+            if cfg.Config.TRACE_JSON is not None:
+                instr.save_trace(cfg.Config.TRACE_JSON)
+                print('Saved trace to [' + cfg.Config.TRACE_JSON + ']')
+            if cfg.Config.VERBOSE:
+                instr.report()
+            return instr.get_counts()
+
+    def watch(self):
+        """Generates code, and generates it again whenever the build file, the specification or the templates change,
+        until interrupted, see *pixis.watch.run()*
+        """
+        with self.activate():
+            watch.run(self.generate)
+
+    def _reset_config(self):
+        """Starts the session's Config over with the defaults and the settings of this generator
+        """
+        self.session.config = cfg.Config.create_settings()
+        for name, value in self.settings.items():
+            setattr(self.session.config, name, value)
+
+
+def generate_all(generators, jobs=1, keep_going=False):
+    """Generates the code of each of @generators, @jobs of them at the same time in forked processes
+
+    Args:
+        generators (List[Generator]): the generators
+        jobs (int): number of generators to generate at the same time. Where the fork start method isn't available,
+            generators are generated one after another
+        keep_going (bool): go on with the other generators when one of them fails, instead of raising its error. The
+            error is printed, and None is returned for the generator
+
+    Returns:
+        A list of the return values of *Generator.generate()*, in the order of @generators
+
+    Raises:
+        ValueError: Occurs when generators that are generated at the same time would prompt for conflicts, which
+            forked processes can't do
+    """
+    if jobs <= 1 or len(generators) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        return [_generate(generator, keep_going) for generator in generators]
+
+    for generator in generators:
+        if generator.settings['CONFLICT'] == 'prompt':
+            raise ValueError('Generators that are generated at the same time need a CONFLICT policy other than '
+                             '\'prompt\' (' + generator.directory + ')')
+
+    job = next(_fork_job_ids)
+    _fork_jobs[job] = (generators, keep_going)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+            return list(executor.map(_generate_in_process, [(job, i) for i in range(len(generators))]))
+    finally:
+        del _fork_jobs[job]
+
+
+def _generate_in_process(task):
+    """Generates one of the generators of a job inside a forked worker process
+
+    Args:
+        task (tuple): the id of the job in _fork_jobs, and the index of the generator in the job
+
+    Returns:
+        The return value of *Generator.generate()*
+    """
+    global _directory_lock
+    # Only the thread that forked the process exists in it, so another thread can't release the inherited lock
+    _directory_lock = threading.RLock()
+    job, i = task
+    generators, keep_going = _fork_jobs[job]
+    return _generate(generators[i], keep_going)
+
+
+def _generate(generator, keep_going):
+    """Generates the code of @generator
+
+    Args:
+        generator (Generator): the generator
+        keep_going (bool): print the error instead of raising it if generation fails
+
+    Returns:
+        The return value of *Generator.generate()*, or None if it failed and @keep_going is set
+    """
+    if not keep_going:
+        return generator.generate()
+    try:
+        return generator.generate()
+    except (Exception, SystemExit):  # an invalid specification exits
+        traceback.print_exc()
+        print('Could not generate [' + generator.directory + ']')
+        return None
@@ -0,0 +1,97 @@
+"""
+- This module keeps the last generated version of each file in the cache directory (Config.CACHE_DIR), so that changes
+  made to a generated file by hand can be merged with a new version of it (see pixis.merge)
+- Versions are compressed and keyed by the checksum that .pixis.json records for the file (see pixis.manifest), so a
+  version is only stored once no matter how many files or runs generate it
+- Versions that .pixis.json no longer refers to are removed when it is saved
+"""
+import os
+import zlib
+
+import pixis.cache as cache
+import pixis.config as cfg
+import pixis.manifest as manifest
+
+SECTION = 'generated'
+
+
+def get_path(file_checksum):
+    """Retrieves the path of the stored version with @file_checksum
+
+    Args:
+        file_checksum (str): a checksum from the manifest
+
+    Returns:
+        A pathlib.Path, or None if caching is disabled or @file_checksum is an md5 checksum from an older .pixis.json
+    """
+    if file_checksum is None or manifest.is_legacy(file_checksum):
+        return None
+    return cache.get_path(SECTION, file_checksum[len(manifest.CHECKSUM_PREFIX):])
+
+
+def store(file_checksum, path):
+    """Stores the contents of the file at @path as the version with @file_checksum, unless it is already stored
+
+    Args:
+        file_checksum (str): checksum of the file's contents
+        path (str or pathlib.Path): path of the file, which is read in chunks
+    """
+    version_path = get_path(file_checksum)
+    if version_path is None or version_path.exists():
+        return
+    compressor = zlib.compressobj()
+    chunks = []
+    with open(str(path), 'rb') as f:
+        for block in iter(lambda: f.read(manifest.CHUNK_SIZE), b''):
+            chunks.append(compressor.compress(block))
+    chunks.append(compressor.flush())
+    cache.write_atomic(version_path, b''.join(chunks))
+
+
+def store_text(file_checksum, text):
+    """Stores @text as the version with @file_checksum, unless it is already stored
+
+    Args:
+        file_checksum (str): checksum of @text
+        text (str): the generated text
+    """
+    version_path = get_path(file_checksum)
+    if version_path is None or version_path.exists():
+        return
+    cache.write_atomic(version_path, zlib.compress(text.encode('utf-8')))
+
+
+def load(file_checksum):
+    """Retrieves the version with @file_checksum
+
+    Args:
+        file_checksum (str): a checksum from the manifest, or None
+
+    Returns:
+        A string with the generated text, or None if it isn't stored (or can't be read)
+    """
+    version_path = get_path(file_checksum)
+    if version_path is None:
+        return None
+    try:
+        return zlib.decompress(version_path.read_bytes()).decode('utf-8')
+    except (OSError, zlib.error, UnicodeDecodeError):
+        return None
+
+
+def prune():
+    """Removes every stored version that Config._checksums doesn't refer to
+
+    Returns:
+        The number of versions that were removed
+    """
+    directory = cache.get_path(SECTION, '')
+    if directory is None or not directory.is_dir():
+        return 0
+    keep = {str(get_path(file_checksum)) for file_checksum in cfg.Config._checksums.values()}
+    removed = 0
+    for entry in os.scandir(str(directory)):
+        if entry.is_file() and str(directory / entry.name) not in keep:
+            os.unlink(entry.path)
+            removed += 1
+    return removed
@@ -19,11 +19,11 @@ class Angular2(cfg.Implementation):
 
     @staticmethod
     def generate_per_tag():
-        cfg.emit_template('client_angular2/service.j2', cfg.Config.OUTPUT + '/api', cfg.TEMPLATE_CONTEXT['_current_tag'] + '.service.ts')
+        cfg.emit_template('client_angular2/service.j2', cfg.Config.OUTPUT + '/api', cfg.get_context()['_current_tag'] + '.service.ts')
 
     @staticmethod
     def generate_per_schema():
-        cfg.emit_template('client_angular2/model.j2', cfg.Config.OUTPUT + '/model', cfg.TEMPLATE_CONTEXT['_current_schema'] + '.ts')
+        cfg.emit_template('client_angular2/model.j2', cfg.Config.OUTPUT + '/model', cfg.get_context()['_current_schema'] + '.ts')
 
     @staticmethod
     def stage_default_iterators():
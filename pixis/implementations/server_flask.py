@@ -7,9 +7,12 @@ class Flask(cfg.Implementation):
 
     @staticmethod
     def process():
-        for tag, paths in cfg.TEMPLATE_CONTEXT['paths'].items():
-            for path in paths:
-                path.url = path.url.replace('}', '>').replace('{', '<')
+        cfg.TEMPLATE_CONTEXT['paths'].map_values(Flask.to_flask_urls)
+
+    @staticmethod
+    def to_flask_urls(paths):
+        for path in paths:
+            path.url = path.url.replace('}', '>').replace('{', '<')
 
     @staticmethod
     def generate_once():
@@ -21,16 +24,19 @@ class Flask(cfg.Implementation):
         cfg.emit_template('server_flask/init.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME, '__init__.py')
         cfg.emit_template('server_flask/init.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME + '/models', '__init__.py')
         cfg.emit_template('server_flask/init.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME + '/controllers', '__init__.py')
+        cfg.emit_template('server_flask/app.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME, 'app.py')
+        cfg.emit_template('server_flask/wsgi.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME, 'wsgi.py')
+        cfg.emit_template('server_flask/gunicorn_conf.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME, 'gunicorn_conf.py')
         cfg.emit_template('server_flask/main.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME, '__main__.py')
         cfg.emit_template('server_flask/setup.j2', cfg.Config.OUTPUT, 'setup.py')
 
     @staticmethod
     def generate_per_tag():
-        cfg.emit_template('server_flask/controller.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME + '/controllers', cfg.TEMPLATE_CONTEXT['_current_tag'] + '_controller.py')
+        cfg.emit_template('server_flask/controller.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME + '/controllers', cfg.get_context()['_current_tag'] + '_controller.py')
 
     @staticmethod
     def generate_per_schema():
-        cfg.emit_template('server_flask/model.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME + '/models', cfg.Implementation.lower_first(cfg.TEMPLATE_CONTEXT['_current_schema']) + '.py')
+        cfg.emit_template('server_flask/model.j2', cfg.Config.OUTPUT + '/' + cfg.Config.FLASK_SERVER_NAME + '/models', cfg.Implementation.lower_first(cfg.get_context()['_current_schema']) + '.py')
 
     @staticmethod
     def stage_default_iterators():
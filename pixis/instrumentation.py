@@ -0,0 +1,212 @@
+"""
+- This module measures where the time of a pixis run goes: each phase of the run, rendering each template and
+  writing each file
+- It also counts what happened to each file: generated, skipped (unchanged), protected, prompted for or conflicted
+  (modified, and resolved by Config.CONFLICT)
+- The measurements are summarized at the end of the run when Config.VERBOSE is set, and saved in Chrome's trace
+  format (open it in chrome://tracing or https://ui.perfetto.dev) when Config.TRACE_JSON is set
+"""
+import contextlib
+import json
+import os
+import pathlib
+import threading
+import time
+import types
+from collections import Counter, OrderedDict
+
+import pixis.config as cfg
+import pixis.session as session
+
+OUTCOMES = ('generated', 'skipped', 'protected', 'prompted', 'conflicted')
+
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_measurements():
+    """Retrieves the measurements of the current session, see pixis.session
+
+    Returns:
+        A types.SimpleNamespace with the measurements:
+            - phases: name -> {'wall', 'cpu', 'depth'} of each phase, in the order they started
+            - timings: kind ('render' or 'write') -> name (template or file) -> [count, seconds]
+            - counts: outcome -> number of files
+            - events: Chrome trace events, only recorded when Config.TRACE_JSON is set
+    """
+    return session.get_state(__name__, lambda: types.SimpleNamespace(
+        phases=OrderedDict(), timings={'render': {}, 'write': {}}, counts=Counter(), events=[]))
+
+
+def reset():
+    """Forgets every measurement
+    """
+    measurements = _get_measurements()
+    with _lock:
+        measurements.phases.clear()
+        for timings in measurements.timings.values():
+            timings.clear()
+        measurements.counts.clear()
+        del measurements.events[:]
+
+
+def get_counts():
+    """Retrieves how many files had each outcome
+
+    Returns:
+        A dict of each of OUTCOMES to the number of files
+    """
+    counts = _get_measurements().counts
+    with _lock:
+        return {outcome: counts[outcome] for outcome in OUTCOMES}
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Measures the wall and CPU time of the code inside the with block as phase @name of the run
+
+    Phases can be nested, for example validation happens during 'load_spec_file'
+
+    Args:
+        name (str): name of the phase, such as 'run_iterators'
+    """
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    times = {'wall': 0.0, 'cpu': 0.0, 'depth': depth}
+    with _lock:
+        _get_measurements().phases[name] = times  # added now, so that phases are reported in the order they started
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        _local.depth = depth
+        times['wall'] = end - wall
+        times['cpu'] = time.process_time() - cpu
+        _add_event(name, 'phase', wall, end)
+
+
+@contextlib.contextmanager
+def timed(kind, name):
+    """Measures the wall time of the code inside the with block
+
+    Args:
+        kind (str): 'render' for rendering template @name, 'write' for writing file @name
+        name (str): the template or file
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        timings = _get_measurements().timings[kind]
+        with _lock:
+            timing = timings.setdefault(name, [0, 0.0])
+            timing[0] += 1
+            timing[1] += end - start
+        _add_event(name, kind, start, end)
+
+
+def count(outcome):
+    """Counts a file with @outcome
+
+    Args:
+        outcome (str): one of OUTCOMES
+    """
+    counts = _get_measurements().counts
+    with _lock:
+        counts[outcome] += 1
+
+
+def collect():
+    """Retrieves every measurement and forgets it. Used by worker processes to send their measurements back
+
+    Returns:
+        A picklable snapshot of the measurements, see *merge()*
+    """
+    measurements = _get_measurements()
+    with _lock:
+        snapshot = (dict(measurements.phases), {kind: dict(timings) for kind, timings in measurements.timings.items()},
+                    dict(measurements.counts), list(measurements.events))
+    reset()
+    return snapshot
+
+
+def merge(snapshot):
+    """Adds measurements that were collected in another process
+
+    Args:
+        snapshot (tuple): the return value of *collect()*
+    """
+    phases, timings, counts, events = snapshot
+    measurements = _get_measurements()
+    with _lock:
+        measurements.phases.update(phases)
+        for kind, names in timings.items():
+            for name, (n, seconds) in names.items():
+                timing = measurements.timings[kind].setdefault(name, [0, 0.0])
+                timing[0] += n
+                timing[1] += seconds
+        measurements.counts.update(counts)
+        measurements.events.extend(events)
+
+
+def report(top=10):
+    """Prints a summary of the measurements
+
+    Args:
+        top (int): number of slowest templates and files to show
+    """
+    measurements = _get_measurements()
+    print('Phases (wall / cpu seconds):')
+    for name, times in measurements.phases.items():
+        print('  ' + '  ' * times['depth'] + '{:<30} {:9.4f} / {:9.4f}'.format(name, times['wall'], times['cpu']))
+
+    for kind, title in (('render', 'Templates rendered'), ('write', 'Files written')):
+        timings = measurements.timings[kind]
+        total = sum(seconds for _, seconds in timings.values())
+        print('{}: {} in {:.4f} seconds'.format(title, sum(n for n, _ in timings.values()), total))
+        for name, (n, seconds) in sorted(timings.items(), key=lambda item: -item[1][1])[:top]:
+            print('  {:9.4f} {:>5}x  {}'.format(seconds, n, name))
+
+    print('Files: ' + format_counts(measurements.counts))
+
+
+def format_counts(counts):
+    """Describes how many files had each outcome
+
+    Args:
+        counts (dict): outcomes to numbers of files, see *get_counts()*
+
+    Returns:
+        A string such as '3 generated, 1 skipped, 0 protected, 0 prompted, 0 conflicted'
+    """
+    return ', '.join(str(counts.get(outcome, 0)) + ' ' + outcome for outcome in OUTCOMES)
+
+
+def save_trace(path):
+    """Saves the recorded events in Chrome's trace event format
+
+    Args:
+        path (str): path of the json file
+    """
+    pathlib.Path(path).write_text(json.dumps({'traceEvents': _get_measurements().events, 'displayTimeUnit': 'ms'}))
+
+
+def _add_event(name, category, start, end):
+    """Records a complete ('X') trace event, if Config.TRACE_JSON is set
+
+    Args:
+        name (str): name of the event
+        category (str): 'phase', 'render' or 'write'
+        start (float): time.perf_counter() when the event started
+        end (float): time.perf_counter() when the event ended
+    """
+    if cfg.Config.TRACE_JSON is None:
+        return
+    event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start * 1e6, 'dur': (end - start) * 1e6,
+             'pid': os.getpid(), 'tid': threading.get_ident()}
+    events = _get_measurements().events
+    with _lock:
+        events.append(event)
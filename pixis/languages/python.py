@@ -7,6 +7,7 @@ class Python(cfg.Language):
         'int32': 'int',
         'long': 'int',
         'int64': 'int',
+        'number': 'float',
         'float': 'float',
         'double': 'float',
         'string': 'str',
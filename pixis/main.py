@@ -1,53 +1,128 @@
 import argparse
+import cProfile
+import sys
 
-import pixis.template_handler as tmpl
-import pixis.utils as utils
+import pixis.batch as batch
+import pixis.conflicts as conflicts
+import pixis.generator as generator
 
 
-def main():
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['batch']:  # pixis batch BUILD_FILE..., see pixis.batch
+        batch.main(argv[1:])
+        return
+
     parser = argparse.ArgumentParser(description='A rest api code generator')
     parser.add_argument('-b', '--build',
-                        default='build.py',
+                        default=generator.DEFAULTS['BUILD'],
                         help="Set build file location, default: %(default)s",
                         dest='build_file')
     parser.add_argument('-o', '--output',
-                        default='build',
+                        default=generator.DEFAULTS['OUTPUT'],
                         help="Set output directory location, default: %(default)s",
                         dest='output')
     parser.add_argument('-t', '--templates',
-                        default='templates',
+                        default=generator.DEFAULTS['TEMPLATES'],
                         help="Set local template directory, default: %(default)s",
                         dest='templates')
     parser.add_argument('-v', '--verbose',
-                        default=False,
-                        help="Set verbose mode, default: %(default)s",
+                        action='store_true',
+                        help="Print how long each phase, template and file write took, and what happened to the files",
                         dest='verbose')
     parser.add_argument('-w', '--overwrite',
-                        default=False,
+                        default=generator.DEFAULTS['OVERWRITE'],
                         help="Set force overwrite mode, default: %(default)s",
                         dest='overwrite')
+    parser.add_argument('--conflict',
+                        default=generator.DEFAULTS['CONFLICT'],
+                        choices=conflicts.POLICIES,
+                        help="Set what is done with generated files that were modified by hand, default: %(default)s",
+                        dest='conflict')
+    parser.add_argument('--conflict-report',
+                        default=generator.DEFAULTS['CONFLICT_REPORT'],
+                        help="Save the differences of modified files to this patch, unless --conflict is prompt, default: %(default)s",
+                        dest='conflict_report')
+    parser.add_argument('-j', '--jobs',
+                        default=generator.DEFAULTS['JOBS'],
+                        type=int,
+                        help="Set number of schemas/tags to generate in parallel, default: %(default)s",
+                        dest='jobs')
+    parser.add_argument('--validate',
+                        default=generator.DEFAULTS['VALIDATE'],
+                        choices=['full', 'incremental', 'fast', 'none'],
+                        help="Set how the specification is validated, default: %(default)s",
+                        dest='validate')
+    parser.add_argument('--no-validate',
+                        action='store_const',
+                        const='none',
+                        help="Don't validate the specification, same as --validate=none",
+                        dest='validate')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help="Don't cache parsed specifications in .pixis/",
+                        dest='no_cache')
+    parser.add_argument('--bundle',
+                        default=generator.DEFAULTS['BUNDLE'],
+                        help="Save the specification with all external $refs bundled into this file, default: %(default)s",
+                        dest='bundle')
+    parser.add_argument('--bytecode-cache',
+                        default=generator.DEFAULTS['BYTECODE_CACHE'],
+                        help="Cache compiled templates in this directory between runs, default: %(default)s",
+                        dest='bytecode_cache')
+    parser.add_argument('--watch',
+                        action='store_true',
+                        help="Keep running, and generate again whenever the build file, specification or templates change",
+                        dest='watch')
+    parser.add_argument('--profile',
+                        default=generator.DEFAULTS['PROFILE'],
+                        help="Save cProfile statistics of the run to this file, default: %(default)s",
+                        dest='profile')
+    parser.add_argument('--trace-json',
+                        default=generator.DEFAULTS['TRACE_JSON'],
+                        help="Save a Chrome trace of the run to this file, default: %(default)s",
+                        dest='trace_json')
 
     # add back later if we're going to be implementing quiet
     # group = parser.add_mutually_exclusive_group(required=False)
     # group.add_argument('-q', '--quiet', help="Suppress Output", action='store_true', dest='quiet')
     # group.add_argument('-v', '--verbose', help="Increase output verbosity", action='store_true', dest='verbose')
-    args = parser.parse_args()
-
-    utils.set_config('BUILD', args.build_file)
-    utils.set_config('TEMPLATES', args.templates)
-    utils.set_config('OUTPUT', args.output)
-    utils.set_config('VERBOSE', args.verbose)
-    utils.set_config('OVERWRITE', args.overwrite)
-
-    utils.load_build_file(args.build_file) # Pull in config options
-    utils.set_config('PARENT', None)
-    utils.load_spec_file()
-    utils.load_checksums()
-
-    utils.set_iterators() # Before create_template_context() because user's build file can mess up template context
-    tmpl.create_template_context()
-    utils.run_iterators()
-    utils.save_checksums()
+    args = parser.parse_args(argv)
+
+    service = generator.Generator(build=args.build_file,
+                                  templates=args.templates,
+                                  output=args.output,
+                                  verbose=args.verbose,
+                                  overwrite=args.overwrite,
+                                  bytecode_cache=args.bytecode_cache,
+                                  jobs=args.jobs,
+                                  bundle=args.bundle,
+                                  validate=args.validate,
+                                  cache_dir=None if args.no_cache else generator.DEFAULTS['CACHE_DIR'],
+                                  profile=args.profile,
+                                  trace_json=args.trace_json,
+                                  conflict=args.conflict,
+                                  conflict_report=args.conflict_report)
+
+    profiler = None
+    if args.profile is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        if args.watch:
+            service.watch()
+        else:
+            service.generate()
+    except KeyboardInterrupt:
+        if not args.watch:
+            raise
+        print('\nStopped watching')
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print('Saved profile to [' + args.profile + '] (view it with: python -m pstats ' + args.profile + ')')
 
 
 if __name__ == '__main__':
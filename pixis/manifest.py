@@ -0,0 +1,343 @@
+"""
+- This module stores what pixis knows about the files it generated in .pixis.json: the checksum of the generated text,
+  the size and modification time the file had right after pixis wrote it, and the fingerprint of what the file was
+  rendered from (see pixis.dependencies)
+- A file whose size and modification time are unchanged hasn't been modified since it was generated, so it doesn't
+  need to be read and hashed to find that out
+- Saving only appends the entries that changed to .pixis.journal, which is merged into .pixis.json once it grows as
+  large as it (see *save()*)
+- .pixis.json files from older versions of pixis (a dict of paths to md5 checksums) are still understood. Their
+  checksums are replaced as the files are generated again
+"""
+import hashlib
+import json
+import os
+import pathlib
+import types
+
+import pixis.cache as cache
+import pixis.config as cfg
+import pixis.session as session
+
+MANIFEST_FILE = '.pixis.json'
+# Changes saved since .pixis.json was last written, see *save()*
+JOURNAL_FILE = '.pixis.journal'
+VERSION = 2
+CHECKSUM_PREFIX = 'blake2b:'
+# Files are read and written in chunks of this many bytes/characters, so large files are never held in memory
+CHUNK_SIZE = 64 * 1024
+
+
+class Hasher(object):
+    """Computes the checksum of text that is generated in chunks
+
+    Args:
+        legacy (bool): also compute the md5 checksum that older versions of pixis recorded, so that *matches()* can
+            compare the text with an md5 checksum
+    """
+
+    def __init__(self, legacy=False):
+        self._blake2b = hashlib.blake2b(digest_size=16)
+        self._md5 = hashlib.md5() if legacy else None
+
+    def update(self, data):
+        """Adds the next chunk of the text
+
+        Args:
+            data (bytes): the chunk, encoded as utf-8
+        """
+        self._blake2b.update(data)
+        if self._md5 is not None:
+            self._md5.update(data)
+
+    def checksum(self):
+        """Retrieves the checksum of the text added so far
+
+        Returns:
+            A string with the checksum
+        """
+        return CHECKSUM_PREFIX + self._blake2b.hexdigest()
+
+    def matches(self, file_checksum):
+        """Checks whether the text added so far has @file_checksum
+
+        Args:
+            file_checksum (str): a checksum from the manifest
+
+        Returns:
+            True if @file_checksum is the checksum of the text
+        """
+        if file_checksum.startswith(CHECKSUM_PREFIX):
+            return file_checksum == self.checksum()
+        return self._md5 is not None and file_checksum == self._md5.hexdigest()
+
+
+def is_legacy(file_checksum):
+    """Checks whether @file_checksum is an md5 checksum from an older .pixis.json
+
+    Args:
+        file_checksum (str): a checksum from the manifest, or None
+
+    Returns:
+        True if @file_checksum is an md5 checksum
+    """
+    return file_checksum is not None and not file_checksum.startswith(CHECKSUM_PREFIX)
+
+
+def checksum(text):
+    """Computes the checksum of generated text
+
+    Args:
+        text (str): the text
+
+    Returns:
+        A string with the checksum
+    """
+    hasher = Hasher()
+    hasher.update(text.encode('utf-8'))
+    return hasher.checksum()
+
+
+def matches(file_checksum, text):
+    """Checks whether @text has @file_checksum, which may be an md5 checksum from an older .pixis.json
+
+    Args:
+        file_checksum (str): a checksum from the manifest
+        text (str): the text
+
+    Returns:
+        True if @file_checksum is the checksum of @text
+    """
+    hasher = Hasher(is_legacy(file_checksum))
+    hasher.update(text.encode('utf-8'))
+    return hasher.matches(file_checksum)
+
+
+def file_matches(file_checksum, path):
+    """Checks whether the file at @path has @file_checksum, reading it in chunks
+
+    Args:
+        file_checksum (str): a checksum from the manifest
+        path (pathlib.Path): path of the file
+
+    Returns:
+        True if @file_checksum is the checksum of the file's contents
+
+    Raises:
+        FileNotFoundError: Occurs when the file doesn't exist
+    """
+    hasher = Hasher(is_legacy(file_checksum))
+    with path.open('rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(block)
+    return hasher.matches(file_checksum)
+
+
+def get_stat(path):
+    """Retrieves what is compared to find out if @path was modified
+
+    Args:
+        path (pathlib.Path): path of the file
+
+    Returns:
+        A [size, modification time in nanoseconds] list
+
+    Raises:
+        FileNotFoundError: Occurs when the file doesn't exist
+    """
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def is_unmodified(path):
+    """Checks whether @path has the size and modification time that were recorded when it was generated
+
+    Args:
+        path (pathlib.Path): path of the file
+
+    Returns:
+        True if the file is known to contain the text that its checksum in Config._checksums was computed for. False
+        doesn't mean the file was modified, only that it has to be read to find out
+
+    Raises:
+        FileNotFoundError: Occurs when the file doesn't exist
+    """
+    stat = get_stat(path)
+    return cfg.Config._file_stats.get(str(path)) == stat
+
+
+def load():
+    """If .pixis.json exists and is valid, copies the checksums into Config._checksums, the sizes and modification
+    times into Config._file_stats and the fingerprints into Config._fingerprints. The changes in .pixis.journal that
+    were saved since .pixis.json was last written are applied on top of it
+
+    Returns:
+        True if .pixis.json was found
+    """
+    state = _get_state()
+    cfg.Config._checksums = {}
+    cfg.Config._file_stats = {}
+    cfg.Config._fingerprints = {}
+    state.generation = 0
+    state.journaled = 0
+    try:
+        loaded = json.loads(pathlib.Path(MANIFEST_FILE).read_text())
+    except FileNotFoundError:
+        state.loaded = None
+        return False
+
+    if loaded.get('version') != VERSION:  # a dict of paths to md5 checksums
+        state.loaded = loaded
+        cfg.Config._checksums.update(loaded)
+        return True
+
+    # A file modified in the same clock tick that its entry was saved in could have been modified again without its
+    # modification time changing, so those files are read to make sure (like git's "racy" files)
+    saved = pathlib.Path(MANIFEST_FILE).stat().st_mtime_ns
+    entries = {path: (entry, saved) for path, entry in loaded['files'].items()}
+    state.generation = loaded.get('generation', 0)
+    _read_journal(state, entries)
+    state.loaded = {'version': VERSION, 'generation': state.generation,
+                    'files': {path: entry for path, (entry, _) in entries.items()}}
+
+    for path, (entry, saved) in entries.items():
+        file_checksum, size, mtime = entry[:3]
+        cfg.Config._checksums[path] = file_checksum
+        if len(entry) > 3 and entry[3] is not None:
+            cfg.Config._fingerprints[path] = entry[3]
+        racy = saved is None or mtime >= saved  # entries whose save wasn't completed have no time
+        if size is not None and (not racy or _contains(pathlib.Path(path), file_checksum, [size, mtime])):
+            cfg.Config._file_stats[path] = [size, mtime]
+    return True
+
+
+def save():
+    """Saves Config._checksums, Config._file_stats and Config._fingerprints, if they changed since *load()*
+
+    Only the entries that changed are appended to .pixis.journal, so saving costs as much as the number of files that
+    changed rather than the number of files pixis generated. Once the journal has as many entries as .pixis.json,
+    .pixis.json is rewritten with the journal applied (atomically and in compact form) and the journal starts over,
+    which keeps loading fast. A journal that is interrupted while it is appended to loses at most the changes that
+    were being saved, see *load()*
+
+    Returns:
+        True if the changes were written
+    """
+    state = _get_state()
+    files = {}
+    for path, file_checksum in cfg.Config._checksums.items():
+        files[path] = [file_checksum] + cfg.Config._file_stats.get(path, [None, None]) + [cfg.Config._fingerprints.get(path)]
+
+    loaded = state.loaded
+    if loaded is not None and loaded.get('version') == VERSION:
+        if files == loaded['files']:
+            return False
+        changes = {path: entry for path, entry in files.items() if loaded['files'].get(path) != entry}
+        changes.update((path, None) for path in loaded['files'] if path not in files)
+        if state.journaled is not None and state.journaled + len(changes) <= len(loaded['files']):
+            _append_journal(state, changes)
+            loaded['files'] = files
+            return True
+
+    # There is no journal for a missing or older .pixis.json, and a journal as large as .pixis.json is compacted
+    generation = getattr(state, 'generation', 0) + 1
+    manifest = {'version': VERSION, 'generation': generation, 'files': files}
+    cache.write_atomic(pathlib.Path(MANIFEST_FILE), json.dumps(manifest, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    try:
+        pathlib.Path(JOURNAL_FILE).unlink()  # its generation no longer matches, so it's ignored if this is interrupted
+    except FileNotFoundError:
+        pass
+    state.loaded = manifest
+    state.generation = generation
+    state.journaled = 0
+    return True
+
+
+def _read_journal(state, entries):
+    """Applies the changes in .pixis.journal to @entries, if the journal continues the .pixis.json they're from
+
+    The journal is a json document per line: a header with the generation of .pixis.json that it continues, then
+    for each save a line with the changed entries (None for removed files), followed by a line with the modification
+    time of the journal once those entries were written. Entries whose save wasn't completed have no time, so their
+    files are read to check them, and a partially written last line is ignored
+
+    Args:
+        state (types.SimpleNamespace): see *_get_state()*. Its journaled attribute is set to the number of entries in
+            the journal, or None if the journal is damaged and must be compacted on the next save
+        entries (dict): the entries of .pixis.json by path, as (entry, time it was saved) tuples
+    """
+    try:
+        lines = pathlib.Path(JOURNAL_FILE).read_text().split('\n')
+    except FileNotFoundError:
+        return
+    try:
+        if json.loads(lines[0]) != {'generation': state.generation}:
+            return  # left behind by an interrupted compaction
+    except ValueError:
+        state.journaled = None
+        return
+
+    changes = {}
+    for line in lines[1:-1]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            state.journaled = None
+            return
+        if 'files' in record:
+            changes = record['files']
+            for path, entry in changes.items():
+                if entry is None:
+                    entries.pop(path, None)
+                else:
+                    entries[path] = (entry, None)
+            state.journaled += len(changes)
+        else:
+            for path, entry in changes.items():
+                if entry is not None:
+                    entries[path] = (entry, record['saved'])
+    if lines[-1]:  # the last line was interrupted
+        state.journaled = None
+
+
+def _append_journal(state, changes):
+    """Appends @changes to .pixis.journal, starting a new journal if there is none for the current .pixis.json
+
+    Args:
+        state (types.SimpleNamespace): see *_get_state()*
+        changes (dict): the changed entries by path, None for removed files
+    """
+    with open(JOURNAL_FILE, 'a' if state.journaled else 'w') as f:
+        if not state.journaled:
+            f.write(json.dumps({'generation': state.generation}) + '\n')
+        f.write(json.dumps({'files': changes}, sort_keys=True, separators=(',', ':')) + '\n')
+        f.flush()
+        f.write(json.dumps({'saved': os.fstat(f.fileno()).st_mtime_ns}) + '\n')
+    state.journaled += len(changes)
+
+
+def _get_state():
+    """Retrieves what this module keeps in the current session, see pixis.session
+
+    Returns:
+        A types.SimpleNamespace with the manifest as it was loaded or last saved (loaded), to only write what changed,
+        the generation of .pixis.json (generation) and the number of entries in .pixis.journal (journaled)
+    """
+    return session.get_state(__name__, lambda: types.SimpleNamespace(loaded=None, generation=0, journaled=0))
+
+
+def _contains(path, file_checksum, stat):
+    """Checks whether @path has @stat and the text with @file_checksum, by reading it
+
+    Args:
+        path (pathlib.Path): path of the file
+        file_checksum (str): checksum of the text the file should contain
+        stat (list): size and modification time the file should have
+
+    Returns:
+        True if the file has @stat and its text has @file_checksum
+    """
+    try:
+        return get_stat(path) == stat and file_matches(file_checksum, path)
+    except FileNotFoundError:
+        return False
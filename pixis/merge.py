@@ -0,0 +1,102 @@
+"""
+- This module merges the changes made to a generated file by hand with the changes pixis made to it, like a
+  three-way merge in version control: the base is the version pixis generated last time (see pixis.history), one side
+  is the file as it is now, and the other side is what pixis generates now
+- Regions that only one side changed, or that both sides changed the same way, are merged automatically. Regions that
+  both sides changed differently are conflicts, which are marked like git marks them
+"""
+import difflib
+
+CURRENT_MARKER = '<<<<<<< current\n'
+SEPARATOR_MARKER = '=======\n'
+GENERATED_MARKER = '>>>>>>> generated\n'
+
+
+def merge3(base, current, generated):
+    """Merges the changes from @base to @current with the changes from @base to @generated
+
+    Args:
+        base (str): the text that was generated last time
+        current (str): the text of the file now
+        generated (str): the text that is generated now
+
+    Returns:
+        A tuple of the merged text and the number of conflicts in it
+    """
+    base_lines = base.splitlines(True)
+    current_lines = current.splitlines(True)
+    generated_lines = generated.splitlines(True)
+
+    merged = []
+    conflicts = 0
+    i_base = i_current = i_generated = 0
+    for base_start, base_end, current_start, current_end, generated_start, generated_end in \
+            _get_sync_regions(base_lines, current_lines, generated_lines):
+        base_region = base_lines[i_base:base_start]
+        current_region = current_lines[i_current:current_start]
+        generated_region = generated_lines[i_generated:generated_start]
+        if current_region == generated_region or generated_region == base_region:
+            merged.extend(current_region)
+        elif current_region == base_region:
+            merged.extend(generated_region)
+        else:
+            conflicts += 1
+            merged.append(CURRENT_MARKER)
+            merged.extend(_terminated(current_region))
+            merged.append(SEPARATOR_MARKER)
+            merged.extend(_terminated(generated_region))
+            merged.append(GENERATED_MARKER)
+        merged.extend(base_lines[base_start:base_end])
+        i_base, i_current, i_generated = base_end, current_end, generated_end
+
+    return ''.join(merged), conflicts
+
+
+def _get_sync_regions(base_lines, current_lines, generated_lines):
+    """Finds the regions of @base_lines that neither @current_lines nor @generated_lines changed
+
+    Args:
+        base_lines (List[str]): lines of the base text
+        current_lines (List[str]): lines of the current text
+        generated_lines (List[str]): lines of the generated text
+
+    Returns:
+        A list of (base start, base end, current start, current end, generated start, generated end) tuples, in order,
+        ending with an empty region at the end of each text
+    """
+    current_blocks = difflib.SequenceMatcher(None, base_lines, current_lines, autojunk=False).get_matching_blocks()
+    generated_blocks = difflib.SequenceMatcher(None, base_lines, generated_lines, autojunk=False).get_matching_blocks()
+
+    regions = []
+    i = j = 0
+    while i < len(current_blocks) and j < len(generated_blocks):
+        base_current, current_start, current_length = current_blocks[i]
+        base_generated, generated_start, generated_length = generated_blocks[j]
+        start = max(base_current, base_generated)
+        end = min(base_current + current_length, base_generated + generated_length)
+        if start < end:
+            regions.append((start, end,
+                            current_start + start - base_current, current_start + end - base_current,
+                            generated_start + start - base_generated, generated_start + end - base_generated))
+        if base_current + current_length < base_generated + generated_length:
+            i += 1
+        else:
+            j += 1
+
+    regions.append((len(base_lines), len(base_lines), len(current_lines), len(current_lines),
+                    len(generated_lines), len(generated_lines)))
+    return regions
+
+
+def _terminated(lines):
+    """Makes sure the last of @lines ends with a newline, so that a conflict marker can follow it
+
+    Args:
+        lines (List[str]): lines of one side of a conflict
+
+    Returns:
+        A list of the lines
+    """
+    if lines and not lines[-1].endswith('\n'):
+        return lines[:-1] + [lines[-1] + '\n']
+    return lines
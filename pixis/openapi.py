@@ -4,21 +4,114 @@
 - Language translations and implementation requirements will be handled in their respective modules
 """
 import re
+import weakref
 from collections import OrderedDict
 
 import pixis.config as cfg
+import pixis.resolver as resolver
 
 EXT_REGEX = re.compile('x-.*')
 
 
+class lazy_property(object):
+    """A read-only attribute that is computed the first time it's accessed, then cached on the instance
+
+    Most attributes are never read by the templates, so they are only computed when needed. The value is cached in
+    the slot named after the attribute with a leading underscore (such as '_properties' for 'properties'), which
+    every class that uses a lazy_property must declare in its __slots__
+    """
+
+    def __init__(self, func, name=None):
+        self.func = func
+        self.name = name or func.__name__
+        self.slot = '_' + self.name
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.func(instance)
+            setattr(instance, self.slot, value)
+            return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+
+class spec_value(object):
+    """An attribute for the value of @key in the instance's specification dict (self._spec)
+
+    The value is read from the specification every time, so it takes no space on the instance. Assigning the
+    attribute stores the new value in the shared side table of rarely set attributes (see OpenAPI)
+
+    Args:
+        key (str): key of the value in the specification dict
+        convert (function): optional function(instance, value) that converts the value
+        name (str): name of the attribute, if it isn't @key
+    """
+
+    def __init__(self, key, convert=None, name=None):
+        self.key = key
+        self.convert = convert
+        self.name = name or key
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        extra = _extra_attributes.get(instance)
+        if extra is not None and self.name in extra:
+            return extra[self.name]
+        value = instance._spec.get(self.key)
+        if self.convert is not None:
+            return self.convert(instance, value)
+        return value
+
+    def __set__(self, instance, value):
+        _extra_attributes.setdefault(instance, {})[self.name] = value
+
+
+# Attributes that are rarely set on an object (assigned spec_values and attributes that the classes don't declare,
+# such as ones added by a build file), keyed by object. Objects only have an entry once such an attribute is set
+_extra_attributes = weakref.WeakKeyDictionary()
+
+
 class OpenAPI():
     """An abstract base class containing common functions for derived classes (such as Path, Response, RequestBody, etc)
+
+    A spec may contain thousands of these objects, so they use __slots__ instead of a __dict__: each class declares
+    slots for the attributes it sets in __init__ and for its cached lazy_properties. Any other attribute that is set on
+    an object is kept in _extra_attributes, so templates and build files can still set whatever they need
     """
+    __slots__ = ('_spec', '__weakref__')
+
+    def __getattr__(self, name):
+        extra = _extra_attributes.get(self)
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError("'" + type(self).__name__ + "' object has no attribute '" + name + "'")
+
+    def __setattr__(self, name, value):
+        try:
+            object.__setattr__(self, name, value)
+        except AttributeError:  # not a slot
+            _extra_attributes.setdefault(self, {})[name] = value
+
+    def __delattr__(self, name):
+        try:
+            object.__delattr__(self, name)
+        except AttributeError:
+            extra = _extra_attributes.get(self)
+            if extra is None or name not in extra:
+                raise
+            del extra[name]
 
     def _get_reference(self, dikt):
         """Resolves the reference, if there was one
 
-        Retrieves the reference from the spec, or just returns @dikt
+        Retrieves the reference from the spec (following references to references), or just returns @dikt
 
         Args:
             dikt (dict): The dictionary that we want to resolve the potential reference for
@@ -26,14 +119,7 @@ class OpenAPI():
         Returns:
             A dict that is either the reference, or @dikt
         """
-        if '$ref' not in dikt:
-            return dikt
-
-        ref_string = dikt['$ref']
-        ref_path = ref_string.split('/')
-
-        ref = cfg.Config.SPEC_DICT[ref_path[1]][ref_path[2]][ref_path[3]]
-        return ref
+        return resolver.resolve(dikt)
 
     def _get_extensions(self, dikt):
         """Retrieves all extensions from @dikt
@@ -128,7 +214,7 @@ class OpenAPI():
     def _get_type(self, schema_dict, model_attr_name, depth=0):
         ref = schema_dict.get('$ref')
         if ref is not None:
-            s = ref.split('/')[3]
+            s = resolver.ref_name(ref)
             for _ in range(depth):
                 s += cfg.Config.LANGUAGE.to_lang_type('>')
             return s
@@ -165,7 +251,15 @@ class OpenAPI():
         return False
 
     def __repr__(self):
-        return str(self.__dict__)
+        attributes = {}
+        for cls in reversed(type(self).__mro__):
+            for slot in cls.__dict__.get('__slots__', ()):
+                if slot in ('_spec', '__weakref__') or not hasattr(self, slot):
+                    continue
+                name = slot[1:] if isinstance(getattr(type(self), slot[1:], None), lazy_property) else slot
+                attributes[name] = getattr(self, slot)
+        attributes.update(_extra_attributes.get(self, {}))
+        return str(attributes)
 
 
 class Path(OpenAPI):
@@ -174,31 +268,36 @@ class Path(OpenAPI):
     paths have references, but not sure if we're going to support it because seems like OpenAPI doesn't support it either?
     highest level extensions aren't supported (i.e. paths -> ^x-)
     """
+    __slots__ = ('url', 'tag', 'method', 'function_name', '_parameters', '_parameters_in', '_request_body', '_responses',
+                 '_response_formats', '_dependencies', '_extensions')
 
     def __init__(self, parent_dict, operation_dict):
         """Inits Path to reflect the spec's info
+
+        Only the attributes needed to group and sort paths are set here, the rest are computed on first access
         """
-        path_dict = self._merge_dicts(parent_dict, operation_dict)
-        self.url = path_dict['url']
-        self.tag = self._get_tag(path_dict)
-        self.method = path_dict['method']
-        self.function_name = path_dict.get('operationId')
-        self.parameters = self._get_parameters(path_dict)  # List[Parameter] ; sorted (required params first, then sorted by name)
-        self.parameters_in = self._get_parameters_in()  # List[str] ; sorted and doesn't contain duplicates
-        self.request_body = self._get_request_body(path_dict)
-        self.responses = self._get_responses(path_dict)  # OrderedDict[str, Response] ; sorted by code
-        self.response_formats = self._get_response_formats()  # List[str] ; sorted and doesn't contain duplicates
-        self.dependencies = self._get_dependencies(path_dict)  # List[str] ; sorted and doesn't contain duplicates
-        self.summary = path_dict.get('summary')
-        self.description = path_dict.get('description')
-        self.deprecated = self._to_boolean(path_dict.get('deprecated'))
-        self.extensions = self._get_extensions(path_dict)
-
-        # TODO
-        self.externalDocs = path_dict.get('externalDocs')
-        self.callbacks = path_dict.get('callbacks')
-        self.security = path_dict.get('security')
-        self.servers = path_dict.get('servers')
+        self._spec = self._merge_dicts(parent_dict, operation_dict)
+        self.url = self._spec['url']
+        self.tag = self._get_tag(self._spec)
+        self.method = self._spec['method']
+        self.function_name = self._spec.get('operationId')
+
+    parameters = lazy_property(lambda self: self._get_parameters(self._spec), 'parameters')  # List[Parameter] ; sorted (required params first, then sorted by name)
+    parameters_in = lazy_property(lambda self: self._get_parameters_in(), 'parameters_in')  # List[str] ; sorted and doesn't contain duplicates
+    request_body = lazy_property(lambda self: self._get_request_body(self._spec), 'request_body')
+    responses = lazy_property(lambda self: self._get_responses(self._spec), 'responses')  # OrderedDict[str, Response] ; sorted by code
+    response_formats = lazy_property(lambda self: self._get_response_formats(), 'response_formats')  # List[str] ; sorted and doesn't contain duplicates
+    dependencies = lazy_property(lambda self: self._get_dependencies(self._spec), 'dependencies')  # List[str] ; sorted and doesn't contain duplicates
+    summary = spec_value('summary')
+    description = spec_value('description')
+    deprecated = spec_value('deprecated', lambda self, value: self._to_boolean(value))
+    extensions = lazy_property(lambda self: self._get_extensions(self._spec), 'extensions')
+
+    # TODO
+    externalDocs = spec_value('externalDocs')
+    callbacks = spec_value('callbacks')
+    security = spec_value('security')
+    servers = spec_value('servers')
 
     def _get_dependencies(self, path_dict):
         """Retrieves the schema classes that the path depends on
@@ -220,7 +319,7 @@ class Path(OpenAPI):
 
             ref = schema_dict.get('$ref')
             if ref is not None:
-                return ref.split('/')[3]
+                return resolver.ref_name(ref)
 
             if schema_dict.get('type') == 'array':
                 return get_dependency(schema_dict)
@@ -376,6 +475,7 @@ class Path(OpenAPI):
             dikt['parameters'] = fallback_parameters
 
         if priority_parameters is not None and fallback_parameters is not None:
+            dikt['parameters'] = list(priority_parameters)  # don't modify the specification
             unique_parameters = set()
             for item in priority_parameters:
                 priority_parameter_dict = self._get_reference(item)
@@ -391,65 +491,77 @@ class Path(OpenAPI):
 
 
 class Content(OpenAPI):
+    __slots__ = ('format', '_type', '_extensions')
+
     def __init__(self, _format, content_dict):
+        self._spec = content_dict
         self.format = _format
-        self.type = self._get_schema_type(content_dict)
 
-        # TODO
-        self.example = content_dict.get('example')
-        self.examples = content_dict.get('examples')
-        self.encoding = content_dict.get('encoding')
-        self.extensions = self._get_extensions(content_dict)
+    type = lazy_property(lambda self: self._get_schema_type(self._spec), 'type')
+
+    # TODO
+    example = spec_value('example')
+    examples = spec_value('examples')
+    encoding = spec_value('encoding')
+    extensions = lazy_property(lambda self: self._get_extensions(self._spec), 'extensions')
 
 
 class RequestBody(OpenAPI):
+    __slots__ = ('_formats', '_types', '_contents', '_extensions')
+
     def __init__(self, dikt):
-        request_body_dict = self._get_reference(dikt)
+        self._spec = self._get_reference(dikt)
 
-        self.formats = self._get_content_formats(request_body_dict)  # List[str] ; sorted
-        self.types = self._get_content_types(request_body_dict)  # List[str] ; sorted
-        self.contents = self._get_contents(request_body_dict)  # List[Content] ; sorted by format
+    formats = lazy_property(lambda self: self._get_content_formats(self._spec), 'formats')  # List[str] ; sorted
+    types = lazy_property(lambda self: self._get_content_types(self._spec), 'types')  # List[str] ; sorted
+    contents = lazy_property(lambda self: self._get_contents(self._spec), 'contents')  # List[Content] ; sorted by format
 
-        # TODO
-        self.required = self._to_boolean(request_body_dict.get('required'))
-        self.description = request_body_dict.get('description')
-        self.extensions = self._get_extensions(request_body_dict)
+    # TODO
+    required = spec_value('required', lambda self, value: self._to_boolean(value))
+    description = spec_value('description')
+    extensions = lazy_property(lambda self: self._get_extensions(self._spec), 'extensions')
 
 
 class Response(OpenAPI):
-    def __init__(self, response_code, dikt):
-        response_dict = self._get_reference(dikt)
+    __slots__ = ('code', '_formats', '_types', '_contents', '_extensions')
 
+    def __init__(self, response_code, dikt):
+        self._spec = self._get_reference(dikt)
         self.code = response_code  # string
-        self.formats = self._get_content_formats(response_dict)  # List[str] ; sorted
-        self.types = self._get_content_types(response_dict)  # List[str] ; sorted
-        self.contents = self._get_contents(response_dict)  # List[Content] ; sorted by format
 
-        # TODO
-        self.description = response_dict.get('description')  # REQUIRED
-        self.headers = response_dict.get('headers')
-        self.extensions = self._get_extensions(response_dict)
+    formats = lazy_property(lambda self: self._get_content_formats(self._spec), 'formats')  # List[str] ; sorted
+    types = lazy_property(lambda self: self._get_content_types(self._spec), 'types')  # List[str] ; sorted
+    contents = lazy_property(lambda self: self._get_contents(self._spec), 'contents')  # List[Content] ; sorted by format
+
+    # TODO
+    description = spec_value('description')  # REQUIRED
+    headers = spec_value('headers')
+    extensions = lazy_property(lambda self: self._get_extensions(self._spec), 'extensions')
 
 
 class Parameter(OpenAPI):
+    __slots__ = ('name', 'required', '_type', '_extensions')
+
     def __init__(self, dikt):
-        parameter_dict = self._get_reference(dikt)
+        self._spec = self._get_reference(dikt)
 
-        self.name = parameter_dict.get('name')  # REQUIRED str
-        self._in = parameter_dict.get('in')  # REQUIRED str
-        self.required = self._to_boolean(parameter_dict.get('required'))  # bool
-        self.type = self._get_schema_type(parameter_dict)  # str TODO
+        # needed to sort parameters
+        self.name = self._spec.get('name')  # REQUIRED str
+        self.required = self._to_boolean(self._spec.get('required'))  # bool
 
-        # TODO
-        self.description = parameter_dict.get('description')
-        self.style = parameter_dict.get('style')
-        self.example = parameter_dict.get('example')
-        self.examples = parameter_dict.get('examples')
-        self.deprecated = self._to_boolean(parameter_dict.get('deprecated'))
-        self.allowEmptyValue = self._to_boolean(parameter_dict.get('allowEmptyValue'))
-        self.explode = self._to_boolean(parameter_dict.get('explode'))
-        self.allowReserved = self._to_boolean(parameter_dict.get('allowReserved'))
-        self.extensions = self._get_extensions(parameter_dict)
+    _in = spec_value('in', name='_in')  # REQUIRED str
+    type = lazy_property(lambda self: self._get_schema_type(self._spec), 'type')  # str TODO
+
+    # TODO
+    description = spec_value('description')
+    style = spec_value('style')
+    example = spec_value('example')
+    examples = spec_value('examples')
+    deprecated = spec_value('deprecated', lambda self, value: self._to_boolean(value))
+    allowEmptyValue = spec_value('allowEmptyValue', lambda self, value: self._to_boolean(value))
+    explode = spec_value('explode', lambda self, value: self._to_boolean(value))
+    allowReserved = spec_value('allowReserved', lambda self, value: self._to_boolean(value))
+    extensions = lazy_property(lambda self: self._get_extensions(self._spec), 'extensions')
 
 
 class Schema(OpenAPI):
@@ -457,6 +569,7 @@ class Schema(OpenAPI):
     A class for a schema object defined for the template context
     Attributes follow the OpenAPI v3.0 specification
     """
+    __slots__ = ('name', '_dependencies', '_has_enums', '_properties')
 
     def __init__(self, name, schema_dict):
         """
@@ -479,46 +592,48 @@ class Schema(OpenAPI):
                 Possible values are: 'int32' and 'int64' if type is 'integer'; 'float' and 'double' if type is 'number'; 'byte', 'binary', 'date', 'date-time' and 'password' if type is 'string';
 
         """
+        self._spec = schema_dict
         self.name = name
-        self.dependencies = self.get_dependencies(schema_dict)
-        self.has_enums = self.enums_exist(schema_dict)
-        self.title = schema_dict.get('title')
-        self.description = schema_dict.get('description')
-        self.default = schema_dict.get('default')
-        self.type = schema_dict.get('type')
-        self.format = schema_dict.get('format')
-
-        # if type is object
-        # additionalProperties can be schema_object or ref
-        self.additionalProperties = self.get_additional_properties(schema_dict.get('additionalProperties'))
-        self.maxProperties = schema_dict.get('maxProperties')
-        self.minProperties = schema_dict.get('minProperties')
-        self.properties = self.get_properties(schema_dict)
-
-        # if type is not specified because schema object is reference to another object
-        # creates an empty class
-        self.ref = schema_dict.get('$ref')
-
-        # if type is array
-        self.maxItems = schema_dict.get('maxItems')
-        self.minItems = schema_dict.get('minItems')
-        self.uniqueItems = schema_dict.get('uniqueItems')
-        # TODO: this is a schema object but does the user need any information from items?
-        # a class will only be created for array if the outer schema is an array and it will be an
-        # empty class
-        # self.items =
-
-        # if type is string
-        self.pattern = schema_dict.get('pattern')
-        self.maxLength = schema_dict.get('maxLength')
-        self.minLength = schema_dict.get('minLength')
-
-        # if type is integer or number
-        self.maximum = schema_dict.get('maximum')
-        self.exclusiveMaximum = schema_dict.get('exclusiveMaximum')
-        self.minimum = schema_dict.get('minimum')
-        self.exclusiveMinimum = schema_dict.get('exclusiveMinimum')
-        self.multipleOf = schema_dict.get('multipleOf')
+
+    dependencies = lazy_property(lambda self: self.get_dependencies(self._spec), 'dependencies')
+    has_enums = lazy_property(lambda self: self.enums_exist(self._spec), 'has_enums')
+    title = spec_value('title')
+    description = spec_value('description')
+    default = spec_value('default')
+    type = spec_value('type')
+    format = spec_value('format')
+
+    # if type is object
+    # additionalProperties can be schema_object or ref
+    additionalProperties = spec_value('additionalProperties', lambda self, value: self.get_additional_properties(value))
+    maxProperties = spec_value('maxProperties')
+    minProperties = spec_value('minProperties')
+    properties = lazy_property(lambda self: self.get_properties(self._spec), 'properties')
+
+    # if type is not specified because schema object is reference to another object
+    # creates an empty class
+    ref = spec_value('$ref', name='ref')
+
+    # if type is array
+    maxItems = spec_value('maxItems')
+    minItems = spec_value('minItems')
+    uniqueItems = spec_value('uniqueItems')
+    # TODO: this is a schema object but does the user need any information from items?
+    # a class will only be created for array if the outer schema is an array and it will be an
+    # empty class
+    # items =
+
+    # if type is string
+    pattern = spec_value('pattern')
+    maxLength = spec_value('maxLength')
+    minLength = spec_value('minLength')
+
+    # if type is integer or number
+    maximum = spec_value('maximum')
+    exclusiveMaximum = spec_value('exclusiveMaximum')
+    minimum = spec_value('minimum')
+    exclusiveMinimum = spec_value('exclusiveMinimum')
+    multipleOf = spec_value('multipleOf')
 
     # def snake_to_camel_case(self,name):
     #     return name.title().replace("_","")
@@ -579,7 +694,7 @@ class Schema(OpenAPI):
 
             ref = attribute_dict.get('$ref')
             if ref is not None:
-                deps_by_attr.append(ref.split('/')[3])
+                deps_by_attr.append(resolver.ref_name(ref))
 
             elif attribute_dict.get('type') == 'array':
                 deps_by_attr = deps_by_attr + get_dep_by_attr(attribute_dict['items'])
@@ -594,7 +709,7 @@ class Schema(OpenAPI):
         properties = schema_dict.get('properties')
 
         if ref is not None:
-            dependencies.append(ref.split('/')[3])
+            dependencies.append(resolver.ref_name(ref))
             return dependencies
 
         if properties is not None:
@@ -636,6 +751,7 @@ class Property(OpenAPI):
     A class for a property object defined for the template context
     Attributes follow the OpenAPI v3.0 specification
     """
+    __slots__ = ('_schema_name', '_required_list', 'name', '_type', '_is_required')
 
     def __init__(self, schema_name, property_name, schema_dict, required_list):  # DOESN'T TAKE INTO CONSIDERATION REFERENCES
         """
@@ -653,11 +769,36 @@ class Property(OpenAPI):
                 Can be 'string', 'array', 'integer', or 'object'
             is_required (bool): False for not required property of schema object, True for required
             enums (List[str]): possible enums of property
+            item_enums (List[str]): possible enums of the items of property, if it is an array
+            pattern, maxLength, minLength, maximum, exclusiveMaximum, minimum, exclusiveMinimum, multipleOf, maxItems,
+                minItems, uniqueItems: constraints on the value of property, as in the specification
         """
+        self._spec = schema_dict
+        self._schema_name = schema_name
+        self._required_list = required_list
         self.name = property_name
-        self.type = self._get_type(schema_dict, schema_name + property_name)
-        self.is_required = self.attr_required(property_name, required_list)
-        self.enums = schema_dict.get('enum')
+
+    type = lazy_property(lambda self: self._get_type(self._spec, self._schema_name + self.name), 'type')
+    is_required = lazy_property(lambda self: self.attr_required(self.name, self._required_list), 'is_required')
+    enums = spec_value('enum', name='enums')
+
+    # if type is string
+    pattern = spec_value('pattern')
+    maxLength = spec_value('maxLength')
+    minLength = spec_value('minLength')
+
+    # if type is integer or number
+    maximum = spec_value('maximum')
+    exclusiveMaximum = spec_value('exclusiveMaximum', lambda self, value: self._to_boolean(value))
+    minimum = spec_value('minimum')
+    exclusiveMinimum = spec_value('exclusiveMinimum', lambda self, value: self._to_boolean(value))
+    multipleOf = spec_value('multipleOf')
+
+    # if type is array
+    maxItems = spec_value('maxItems')
+    minItems = spec_value('minItems')
+    uniqueItems = spec_value('uniqueItems', lambda self, value: self._to_boolean(value))
+    item_enums = spec_value('items', lambda self, value: (value or {}).get('enum'), name='item_enums')
 
     def attr_required(self, attribute_name, required_list):
         """
@@ -0,0 +1,220 @@
+"""
+- This module decides which generated files are protected by Config.PROTECTED, so that pixis never writes them
+- Rules are matched against the path of the file without the output directory, such as '/server/hello.py' for
+  'build/server/hello.py'. A rule is one of:
+    - 'literal:TEXT': protects files whose path contains TEXT
+    - 're:REGEX': protects files whose path matches REGEX from its start (re.match)
+    - 'glob:PATTERN': protects files whose path matches PATTERN, where '*' and '?' don't match '/' and '**' matches
+      any number of directories. A PATTERN that starts with '/' is matched from the start of the path, otherwise from
+      any directory. Matching a directory protects every file in it
+    - anything else: protects files whose path contains it, or matches it as a regular expression (if it is one)
+- Rules are compiled once. Regular expressions and glob patterns are combined into one regular expression, which is
+  only tried where a rule can match: at the start of the path, or at the start of each directory in it. Only when it
+  (or a text) matches a file are the rules tried one by one, in order, to report the first one that protects it
+"""
+import re
+
+import pixis.config as cfg
+
+# (rules, matcher) for the last Config.PROTECTED that a matcher was compiled for
+_compiled = None
+
+
+class Matcher(object):
+    """Matches paths against a list of PROTECTED rules
+
+    Args:
+        rules (List[str]): the rules, see the module's description
+
+    Raises:
+        ValueError: Occurs when a 're:' rule isn't a valid regular expression
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._patterns = []  # (where, text or compiled regular expression) of each rule, see *_get_patterns()*
+        self._texts = []  # texts that protect files whose path contains them
+        self._separate = []  # regular expressions that can't be combined with the others
+        # Regular expressions are only tried at the start of the path, or at the start of each directory in it
+        alternatives = {'start': [], 'directory': []}
+        for rule in self.rules:
+            self._patterns.append([])
+            for where, pattern in _get_patterns(rule):
+                if where == 'text':
+                    self._texts.append(pattern)
+                    self._patterns[-1].append((where, pattern))
+                    continue
+                compiled = re.compile(pattern)
+                self._patterns[-1].append((where, compiled))
+                if where == 'start' and not _is_combinable(pattern):
+                    self._separate.append(compiled)
+                else:
+                    alternatives[where].append('(?:' + pattern + ')')
+        self._start = re.compile('|'.join(alternatives['start'])) if alternatives['start'] else None
+        self._directory = re.compile('|'.join(alternatives['directory'])) if alternatives['directory'] else None
+
+    def match(self, filepath):
+        """Finds the rule that protects @filepath
+
+        Args:
+            filepath (str): path of the file without the output directory, such as '/server/hello.py'
+
+        Returns:
+            The first rule (str) that matches, or None if the file isn't protected
+        """
+        if not self._is_protected(filepath):
+            return None
+        # The combined regular expressions only tell whether a rule matches, the first one is found by trying them
+        for rule, patterns in zip(self.rules, self._patterns):
+            if any(_matches(where, pattern, filepath) for where, pattern in patterns):
+                return rule
+        return None
+
+    def _is_protected(self, filepath):
+        """Checks whether any rule matches @filepath
+
+        Args:
+            filepath (str): path of the file without the output directory
+
+        Returns:
+            True if the file is protected
+        """
+        if any(text in filepath for text in self._texts):
+            return True
+        if any(pattern.match(filepath) for pattern in self._separate):
+            return True
+        if self._start is not None and self._start.match(filepath):
+            return True
+        return self._directory is not None and _matches('directory', self._directory, filepath)
+
+
+def get_matcher():
+    """Retrieves the matcher for Config.PROTECTED, which is only compiled again when Config.PROTECTED changes
+
+    Returns:
+        A Matcher
+    """
+    global _compiled
+    rules = tuple(cfg.Config.PROTECTED or ())
+    if _compiled is None or _compiled[0] != rules:
+        _compiled = (rules, Matcher(rules))
+    return _compiled[1]
+
+
+def translate_glob(pattern):
+    """Translates a glob pattern into a regular expression, see the module's description
+
+    Args:
+        pattern (str): the glob pattern
+
+    Returns:
+        A tuple of where the regular expression is matched ('start' of the path, or the start of each 'directory' in
+        it) and the regular expression (str)
+    """
+    anchored = pattern.startswith('/')
+    pattern = pattern.strip('/')
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex += '(?:[^/]*/)*'
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+            continue
+        if char == '*':
+            regex += '[^/]*'
+        elif char == '?':
+            regex += '[^/]'
+        elif char == '[':
+            start = i + 1
+            if pattern.startswith('!', start):
+                start += 1
+            if pattern.startswith(']', start):  # a ']' right after '[' or '[!' is part of the set
+                start += 1
+            end = pattern.find(']', start)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex += '[' + body.replace('\\', '\\\\') + ']'
+                i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return ('start' if anchored else 'directory'), '/' + regex + r'(?:/|\Z)'
+
+
+def _get_patterns(rule):
+    """Retrieves what a file's path is compared with to match @rule
+
+    Args:
+        rule (str): the rule
+
+    Returns:
+        A list of (where, pattern) tuples: ('text', text the path contains), ('start', regular expression the path
+        matches) or ('directory', regular expression that matches at the start of a directory in the path)
+
+    Raises:
+        ValueError: Occurs when a 're:' rule isn't a valid regular expression
+    """
+    kind, _, value = rule.partition(':')
+    if kind == 'literal':
+        return [('text', value)]
+    if kind == 're':
+        try:
+            re.compile(value)
+        except re.error as e:
+            raise ValueError('PROTECTED rule ' + repr(rule) + ' is not a valid regular expression: ' + str(e))
+        return [('start', '(?:' + value + ')')]
+    if kind == 'glob':
+        return [translate_glob(value)]
+
+    # Rules without a kind are matched like older versions of pixis did: as text, or as a regular expression
+    patterns = [('text', rule)]
+    try:
+        re.compile(rule)
+    except re.error:
+        return patterns
+    return patterns + [('start', '(?:' + rule + ')')]
+
+
+def _matches(where, pattern, filepath):
+    """Checks whether @filepath matches one of a rule's patterns
+
+    Args:
+        where (str): where @pattern is matched, see *_get_patterns()*
+        pattern: the text (str) or the compiled regular expression
+        filepath (str): path of the file without the output directory
+
+    Returns:
+        True if @pattern matches @filepath
+    """
+    if where == 'text':
+        return pattern in filepath
+    if where == 'start':
+        return pattern.match(filepath) is not None
+    position = filepath.find('/')
+    while position != -1:
+        if pattern.match(filepath, position) is not None:
+            return True
+        position = filepath.find('/', position + 1)
+    return False
+
+
+def _is_combinable(pattern):
+    """Checks whether @pattern can be part of the combined regular expression. Patterns with named groups, or that
+    refer to groups by number, would change meaning
+
+    Args:
+        pattern (str): a regular expression
+
+    Returns:
+        True if @pattern can be combined with other patterns
+    """
+    return re.search(r'\(\?P[<=]|\\[1-9]|\(\?\(', pattern) is None and not re.search(r'\(\?[aiLmsux]+\)', pattern)
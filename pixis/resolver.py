@@ -0,0 +1,497 @@
+"""
+- This module resolves $ref strings and JSON pointers against the specification in Config.SPEC_DICT
+- Every value in the specification is indexed by its JSON pointer once, so resolving a pointer is a single lookup
+- Resolved references are memoized, so a component that is referenced many times is only resolved once
+- Specifications split across several files are bundled into one specification when they are loaded, so that every
+  $ref in Config.SPEC_DICT is local
+"""
+import copy
+import json
+import pathlib
+import types
+
+import yaml
+
+import pixis.cache as cache
+import pixis.config as cfg
+import pixis.instrumentation as instr
+import pixis.session as session
+
+# libyaml's loader is much faster than the pure Python one, but PyYAML can be installed without it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Parsed documents, keyed by absolute path and modification time. They are shared by every session (see
+# pixis.session), as they only change when the file does
+_documents = {}
+# Absolute path of each specification loaded by *load_specification()* -> (modification time and size of each file it
+# was loaded from, the bundled specification). Shared by every session like _documents
+_specifications = {}
+
+# Which components section a $ref is bundled into, based on the key that holds the $ref or the key of its parent
+SECTIONS_BY_KEY = {
+    'schema': 'schemas',
+    'items': 'schemas',
+    'additionalProperties': 'schemas',
+    'not': 'schemas',
+    'requestBody': 'requestBodies',
+}
+SECTIONS_BY_PARENT_KEY = {
+    'properties': 'schemas',
+    'allOf': 'schemas',
+    'anyOf': 'schemas',
+    'oneOf': 'schemas',
+    'parameters': 'parameters',
+    'responses': 'responses',
+    'headers': 'headers',
+    'examples': 'examples',
+    'links': 'links',
+    'callbacks': 'callbacks',
+    'securitySchemes': 'securitySchemes',
+}
+
+
+def _get_state():
+    """Retrieves what this module keeps in the current session, see pixis.session
+
+    Returns:
+        A types.SimpleNamespace with the specification that the index was built for (indexed_spec), the index itself
+        (index), the memoized $ref targets (resolved) and the absolute paths of the files that the last bundled
+        specification has $refs to (bundled_files)
+    """
+    return session.get_state(__name__, lambda: types.SimpleNamespace(indexed_spec=None, index={}, resolved={},
+                                                                     bundled_files=set()))
+
+
+def reset():
+    """Forgets the index and every resolved reference. Needed when the specification is modified in place
+    """
+    state = _get_state()
+    state.indexed_spec = None
+    state.index.clear()
+    state.resolved.clear()
+
+
+def escape_token(token):
+    """Escapes @token so that it can be used as part of a JSON pointer
+
+    Args:
+        token (str): a dictionary key from the specification, such as '/pet/{petId}'
+
+    Returns:
+        The escaped token, such as '~1pet~1{petId}'
+    """
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def unescape_token(token):
+    """Reverses *escape_token()*
+
+    Args:
+        token (str): an escaped JSON pointer token, such as '~1pet~1{petId}'
+
+    Returns:
+        The dictionary key, such as '/pet/{petId}'
+    """
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def ref_name(ref):
+    """Retrieves the name of the component that @ref points to
+
+    Args:
+        ref (str): a $ref string, such as '#/components/schemas/Pet'
+
+    Returns:
+        The last token of the pointer, such as 'Pet'
+    """
+    return unescape_token(ref.rsplit('/', 1)[-1])
+
+
+def get_index():
+    """Retrieves the index of every value in the specification by JSON pointer, building it if the specification changed
+
+    Returns:
+        A dict of JSON pointers (such as '/components/schemas/Pet') to values in the specification
+    """
+    state = _get_state()
+    spec_dict = cfg.Config.SPEC_DICT
+    if state.indexed_spec is spec_dict:
+        return state.index
+
+    reset()
+    state.indexed_spec = spec_dict
+    index = state.index
+    stack = [('', spec_dict)]
+    while stack:
+        pointer, value = stack.pop()
+        index[pointer] = value
+        if isinstance(value, dict):
+            stack.extend((pointer + '/' + escape_token(str(key)), child) for key, child in value.items())
+        elif isinstance(value, list):
+            stack.extend((pointer + '/' + str(i), child) for i, child in enumerate(value))
+
+    return index
+
+
+def resolve_pointer(pointer):
+    """Retrieves the value at @pointer in the specification, without following references
+
+    Args:
+        pointer (str): JSON pointer into the specification, such as '/components/schemas/Pet'
+
+    Returns:
+        The value at @pointer
+
+    Raises:
+        KeyError: Occurs when nothing exists at @pointer
+    """
+    return get_index()[pointer]
+
+
+def resolve_ref(ref):
+    """Retrieves the value that @ref points to, following references to references
+
+    Args:
+        ref (str): a $ref string, such as '#/components/schemas/Pet'
+
+    Returns:
+        The first value in the chain of references that is not itself a reference
+
+    Raises:
+        KeyError: Occurs when a reference in the chain points to nothing
+        ValueError: Occurs when a reference isn't local, or when the chain of references is circular
+    """
+    index = get_index()
+    resolved = _get_state().resolved
+    if ref in resolved:
+        return resolved[ref]
+
+    chain = [ref]
+    while True:
+        if not chain[-1].startswith('#'):
+            raise ValueError('Unsupported $ref [' + chain[-1] + '], only references within the specification are supported')
+        value = index[chain[-1][1:]]
+        if not isinstance(value, dict) or '$ref' not in value:
+            break
+        if value['$ref'] in resolved:
+            value = resolved[value['$ref']]
+            break
+        if value['$ref'] in chain:
+            raise ValueError('Circular $ref: ' + ' -> '.join(chain + [value['$ref']]))
+        chain.append(value['$ref'])
+
+    for link in chain:
+        resolved[link] = value
+    return value
+
+
+def resolve(dikt):
+    """Resolves the reference, if there was one
+
+    Args:
+        dikt (dict): The dictionary that we want to resolve the potential reference for
+
+    Returns:
+        A dict that is either the (fully resolved) reference, or @dikt
+    """
+    if '$ref' not in dikt:
+        return dikt
+    return resolve_ref(dikt['$ref'])
+
+
+def parse_document(path):
+    """Parses the yaml/json document at @path
+
+    Json documents (detected by their '.json' extension, or by their content if it is valid json) are parsed with the
+    json module, and yaml documents with libyaml when it is available. The parsed document is cached by the checksum of the file, so
+    parsing an unchanged document again only costs unpickling it.
+
+    Args:
+        path (str): path of the document
+
+    Returns:
+        The parsed document, which the caller is free to modify
+
+    Raises:
+        json.JSONDecodeError: Occurs when a document with the '.json' extension is invalid
+        yaml.YAMLError: Occurs when a yaml document is invalid
+    """
+    data = pathlib.Path(path).read_bytes()
+    key = cache.checksum(data) + '.pickle'
+    document = cache.load('specs', key)
+    if document is not None:
+        return document
+
+    text = data.decode('utf-8')
+    if pathlib.Path(path).suffix.lower() == '.json':
+        document = json.loads(text)
+    else:
+        try:
+            # yaml documents can start with a flow mapping too, so this is only a fast path for json content
+            document = json.loads(text) if text.lstrip().startswith('{') else None
+        except json.JSONDecodeError:
+            document = None
+        if document is None:
+            document = yaml.load(text, Loader=YAML_LOADER)
+
+    cache.save('specs', key, document)
+    return document
+
+
+def find_refs(value):
+    """Retrieves every local $ref inside @value
+
+    Args:
+        value: any part of the specification
+
+    Returns:
+        A set of JSON pointers that @value references
+    """
+    refs = set()
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            ref = value.get('$ref')
+            if isinstance(ref, str) and ref.startswith('#'):
+                refs.add(ref[1:])
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return refs
+
+
+def load_document(path):
+    """Parses the yaml/json document at @path, or retrieves it from memory if the file hasn't changed
+
+    Args:
+        path (str): path of the document
+
+    Returns:
+        The parsed document. It is shared by everything that loads the same file, so it must not be modified
+    """
+    path = pathlib.Path(path).resolve()
+    key = (str(path), path.stat().st_mtime_ns)
+    document = _documents.get(key)
+    if document is None:
+        document = parse_document(str(path))
+        _documents[key] = document
+    return document
+
+
+def load_specification(path):
+    """Parses the specification at @path and bundles every file it has $refs to into it (see *bundle()*), or retrieves
+    it from memory if none of those files changed since it was loaded, so that the services of a batch (see
+    pixis.batch) that share a specification only parse and bundle it once
+
+    Args:
+        path (str): path of the specification
+
+    Returns:
+        The bundled specification. It is shared by every session that loads the same file, so it must not be modified
+    """
+    key = str(pathlib.Path(path).resolve())
+    loaded = _specifications.get(key)
+    if loaded is not None and _get_stats(loaded[0]) == loaded[0]:
+        _get_state().bundled_files = set(loaded[0]) - {key}
+        return loaded[1]
+
+    stats = _get_stats([key])  # before parsing, so that a change made while parsing is noticed next time
+    with instr.phase('parse_spec'):
+        spec = parse_document(path)
+    with instr.phase('bundle_spec'):
+        bundle(spec, path)
+    stats.update(_get_stats(get_bundled_files()))
+    _specifications[key] = (stats, spec)
+    return spec
+
+
+def _get_stats(paths):
+    """Retrieves the modification time and size of each of @paths
+
+    Args:
+        paths (iterable): absolute paths of files
+
+    Returns:
+        A dict of the paths to (modification time, size) tuples, or to None for files that don't exist
+    """
+    stats = {}
+    for path in paths:
+        try:
+            stat = pathlib.Path(path).stat()
+        except FileNotFoundError:
+            stats[path] = None
+        else:
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+def resolve_document_pointer(document, pointer):
+    """Retrieves the value at @pointer in @document
+
+    Args:
+        document (dict): a parsed document
+        pointer (str): JSON pointer into @document, such as '/Order'
+
+    Returns:
+        The value at @pointer
+
+    Raises:
+        KeyError: Occurs when nothing exists at @pointer
+    """
+    value = document
+    for token in pointer.split('/')[1:]:
+        token = unescape_token(token)
+        try:
+            value = value[int(token)] if isinstance(value, list) else value[token]
+        except (IndexError, ValueError, TypeError):
+            raise KeyError(pointer)
+    return value
+
+
+def bundle(spec, spec_path):
+    """Replaces every $ref to another file in @spec with a local $ref
+
+    The target of each external $ref is copied into @spec once: into 'components' (under the name of the
+    target) if the $ref is in a place where a component can be referenced, otherwise in place of the $ref.
+    Relative file paths are relative to the file that contains the $ref.
+
+    Args:
+        spec (dict): the parsed specification, which is modified in place
+        spec_path (str): path of the specification file
+
+    Returns:
+        @spec
+    """
+    root = str(pathlib.Path(spec_path).resolve())
+    bundled = {}  # (file, pointer) -> local $ref
+    bundled_files = _get_state().bundled_files
+    bundled_files.clear()
+
+    def load(path):
+        bundled_files.add(path)
+        return load_document(path)
+
+    def split_ref(ref, base):
+        file_part, _, fragment = ref.partition('#')
+        if file_part == '':
+            return base, fragment
+        return str((pathlib.Path(base).parent / file_part).resolve()), fragment
+
+    def visit(container, key, tokens, base):
+        node = container[key]
+        if isinstance(node, list):
+            for i in range(len(node)):
+                visit(node, i, tokens + [i], base)
+            return
+        if not isinstance(node, dict):
+            return
+
+        ref = node.get('$ref')
+        if not isinstance(ref, str) or (base == root and ref.startswith('#')):
+            for k in list(node):
+                visit(node, k, tokens + [k], base)
+            return
+
+        target = split_ref(ref, base)
+        if target[0] == root:
+            node['$ref'] = '#' + target[1]
+            return
+
+        local_ref = bundled.get(target)
+        if local_ref is None:
+            section = _get_section(tokens)
+            value = copy.deepcopy(resolve_document_pointer(load(target[0]), target[1]))
+            if section is None:  # this can't be a component, so the target replaces the $ref
+                container[key] = value
+                visit(container, key, tokens, target[0])
+                return
+            components = spec.setdefault('components', {}).setdefault(section, {})
+            name = _unique_name(components, _get_name(target))
+            local_ref = bundled[target] = '#/components/' + section + '/' + escape_token(name)
+            components[name] = value
+            visit(components, name, ['components', section, name], target[0])
+
+        if local_ref == '#/' + '/'.join(escape_token(str(token)) for token in tokens):
+            # this is the component that the $ref is bundled into, so it is replaced by the target
+            container[key] = copy.deepcopy(resolve_document_pointer(load(target[0]), target[1]))
+            visit(container, key, tokens, target[0])
+        else:
+            node['$ref'] = local_ref
+
+    # external $refs that are components themselves keep their component's name
+    for section, components in spec.get('components', {}).items():
+        if not isinstance(components, dict):
+            continue
+        for name, value in components.items():
+            if isinstance(value, dict) and isinstance(value.get('$ref'), str) and not value['$ref'].startswith('#'):
+                target = split_ref(value['$ref'], root)
+                if target[0] != root:
+                    bundled.setdefault(target, '#/components/' + section + '/' + escape_token(name))
+
+    if 'components' in spec:
+        visit(spec, 'components', ['components'], root)
+    for key in list(spec):
+        if key != 'components':
+            visit(spec, key, [key], root)
+
+    return spec
+
+
+def get_bundled_files():
+    """Retrieves the files that the last specification passed to *bundle()* has $refs to
+
+    Returns:
+        A set of absolute paths (str)
+    """
+    return set(_get_state().bundled_files)
+
+
+def _get_section(tokens):
+    """Retrieves the components section that a $ref at @tokens can be bundled into
+
+    Args:
+        tokens (list): keys from the root of the specification to the $ref
+
+    Returns:
+        The name of the components section, or None if the $ref can't be a component (for example a path item)
+    """
+    if len(tokens) == 3 and tokens[0] == 'components':
+        return tokens[1]
+    if tokens and tokens[-1] in SECTIONS_BY_KEY:
+        return SECTIONS_BY_KEY[tokens[-1]]
+    if len(tokens) > 1 and tokens[-2] in SECTIONS_BY_PARENT_KEY:
+        return SECTIONS_BY_PARENT_KEY[tokens[-2]]
+    return None
+
+
+def _get_name(target):
+    """Retrieves the component name for the external $ref @target
+
+    Args:
+        target (tuple): (file, pointer) of the $ref
+
+    Returns:
+        The last token of the pointer, or the file's name if the $ref is the whole file
+    """
+    if target[1].strip('/'):
+        return ref_name(target[1])
+    return pathlib.Path(target[0]).stem
+
+
+def _unique_name(components, name):
+    """Retrieves a name based on @name that isn't in @components yet
+
+    Args:
+        components (dict): a components section, such as spec['components']['schemas']
+        name (str): the preferred name
+
+    Returns:
+        @name, or @name followed by a number
+    """
+    unique_name = name
+    i = 2
+    while unique_name in components:
+        unique_name = name + str(i)
+        i += 1
+    return unique_name
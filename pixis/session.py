@@ -0,0 +1,89 @@
+"""
+- This module keeps the state of each code generation apart: a Session holds the settings (Config), the template
+  context (TEMPLATE_CONTEXT) and everything the other modules of pixis remember during a run, such as the loaded
+  .pixis.json, the conflicts to resolve and the measurements
+- Config, TEMPLATE_CONTEXT and the state of the other modules always belong to the current session: the session that
+  was last activated in the thread with *Session.activate()*, or the default session (which the command line and
+  build files use) if none is active. Sessions that are active in different threads don't share anything, so several
+  services can be generated in one process (see pixis.generator)
+- What can be shared safely, such as compiled templates and parsed documents, is still shared by every session in
+  the process
+"""
+import contextlib
+import threading
+
+# Sessions activated in each thread, the last one being the current session
+_active = threading.local()
+# Session that is current when no session is active in a thread, see *set_default()*
+_default = None
+
+
+class Session(object):
+    """Holds the state of one code generation
+
+    Args:
+        config (types.SimpleNamespace): the settings, see *pixis.config.Config.create_settings()*
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.template_context = {}
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, name, factory):
+        """Retrieves the state that @name keeps in this session, creating it on first use
+
+        Args:
+            name (str): who keeps the state, usually a module's __name__
+            factory (function): creates the initial state
+
+        Returns:
+            The state, as created by @factory
+        """
+        try:
+            return self._state[name]
+        except KeyError:
+            with self._lock:
+                if name not in self._state:
+                    self._state[name] = factory()
+                return self._state[name]
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this session the current session of the thread inside the with block
+        """
+        sessions = getattr(_active, 'sessions', None)
+        if sessions is None:
+            sessions = _active.sessions = []
+        sessions.append(self)
+        try:
+            yield self
+        finally:
+            sessions.pop()
+
+
+def get_current():
+    """Retrieves the current session of the thread
+
+    Returns:
+        The Session that was last activated in the thread, or the default session
+    """
+    sessions = getattr(_active, 'sessions', None)
+    return sessions[-1] if sessions else _default
+
+
+def get_state(name, factory):
+    """Retrieves the state that @name keeps in the current session, see *Session.get_state()*
+    """
+    return get_current().get_state(name, factory)
+
+
+def set_default(session):
+    """Sets the session that is current when no session is active in a thread
+
+    Args:
+        session (Session): the session
+    """
+    global _default
+    _default = session
@@ -1,3 +1,4 @@
+import copy
 import importlib.util
 import inspect
 import json
@@ -7,48 +8,190 @@ import sys
 import yaml
 import openapi_spec_validator
 
+import pixis.cache as cache
 import pixis.config as cfg
+import pixis.conflicts as conflicts
+import pixis.dependencies as deps
+import pixis.history as history
 import pixis.implementations.client_angular2 as pixis_client_angular2
 import pixis.implementations.server_flask as pixis_server_flask
+import pixis.instrumentation as instr
+import pixis.manifest as manifest
+import pixis.resolver as resolver
 
 SUPPORTED = {
     'flask': pixis_server_flask.Flask,
     'angular2': pixis_client_angular2.Angular2,
 }
 
+# Checksums of the specifications that this process found valid, so that a specification shared by several services
+# (see pixis.batch) is only validated once, even when caching is disabled
+_valid_specifications = set()
+
 
 def validate_specification(spec_dict):
     """Validates the specification using **openapi_spec_validator** library. Execution stops if spec is invalid.
 
+    Errors are printed as soon as they are found. How the specification is validated depends on Config.VALIDATE:
+        - 'full': validates the whole specification
+        - 'incremental': only validates the sections (top level, each path and each component) that changed since
+            the last valid specification, along with everything they reference
+        - 'fast': validates the whole specification, but stops at the first error
+        - 'none': doesn't validate the specification
+    A specification that was valid before is not validated again, unless caching is disabled and it was validated by
+    another process
+
     Args:
         spec_dict (dict): OpenAPI 3.0 specification as a dictionary
     """
-    errors_iterator = openapi_spec_validator.openapi_v3_spec_validator.iter_errors(spec_dict)
-    errors = list(errors_iterator)
-    if len(errors) > 0:
-        print(len(errors), 'errors')
+    mode = cfg.Config.VALIDATE or 'full'
+    if mode == 'none':
+        print('specification [', cfg.Config.SPEC, '] was not validated')
+        return
+
+    validator_version = getattr(openapi_spec_validator, '__version__', '')
+    spec_checksum = cache.checksum_value([validator_version, spec_dict])
+    if spec_checksum in _valid_specifications or cache.load('validation', spec_checksum):
+        _valid_specifications.add(spec_checksum)
+        print('specification [', cfg.Config.SPEC, '] is valid (unchanged since last validated)')
+        return
+
+    sections = get_spec_sections(spec_dict)
+    sections_key = cache.checksum(str(pathlib.Path(cfg.Config.SPEC).resolve()).encode('utf-8')) + '.sections'
+    to_validate = spec_dict
+    if mode == 'incremental':
+        previous = cache.load('validation', sections_key)
+        if previous is not None and previous[0] == validator_version:
+            to_validate = get_changed_spec(spec_dict, sections, previous[1])
+
+    errors = 0
+    # the validator adds 'x-scope' to every $ref it follows, so it gets a copy to keep the specification unchanged
+    for error in openapi_spec_validator.openapi_v3_spec_validator.iter_errors(copy.deepcopy(to_validate)):
+        errors += 1
+        print('Error:', '/'.join(str(p) for p in error.path), error.message)
+        if mode == 'fast':
+            break
+
+    if errors > 0:
+        print(errors, 'errors')
         sys.exit()
 
+    _valid_specifications.add(spec_checksum)
+    cache.save('validation', spec_checksum, True)
+    cache.save('validation', sections_key, (validator_version, sections))
     print('specification [', cfg.Config.SPEC, ']is valid')
 
 
+def get_spec_sections(spec_dict):
+    """Computes the checksum of each section of the specification that can be validated separately
+
+    Args:
+        spec_dict (dict): OpenAPI 3.0 specification as a dictionary
+
+    Returns:
+        A dict of JSON pointers to checksums. The pointers are '' for everything except paths and components, each
+        path ('/paths/...') and each component ('/components/<section>/<name>')
+    """
+    top_level = {key: value for key, value in spec_dict.items() if key not in ('paths', 'components')}
+    top_level['components'] = {}
+    sections = {}
+
+    for section, components in spec_dict.get('components', {}).items():
+        if not isinstance(components, dict):
+            top_level['components'][section] = components
+            continue
+        for name, value in components.items():
+            sections['/components/' + section + '/' + resolver.escape_token(name)] = cache.checksum_value(value)
+
+    for url, path_item in spec_dict.get('paths', {}).items():
+        sections['/paths/' + resolver.escape_token(url)] = cache.checksum_value(path_item)
+
+    sections[''] = cache.checksum_value(top_level)
+    return sections
+
+
+def get_changed_spec(spec_dict, sections, previous_sections):
+    """Creates a specification that only has the sections that changed, and everything that they reference
+
+    Args:
+        spec_dict (dict): OpenAPI 3.0 specification as a dictionary
+        sections (dict): checksums of the sections of @spec_dict, see *get_spec_sections()*
+        previous_sections (dict): checksums of the sections of the last valid specification
+
+    Returns:
+        A dict with the changed parts of @spec_dict, or @spec_dict itself if it must be validated as a whole
+    """
+    if sections[''] != previous_sections.get(''):
+        return spec_dict
+
+    def get_section(pointer):
+        tokens = pointer.split('/')
+        if len(tokens) >= 3 and tokens[1] == 'paths':
+            return '/'.join(tokens[:3])
+        if len(tokens) >= 4 and tokens[1] == 'components':
+            return '/'.join(tokens[:4])
+        return None
+
+    changed = {pointer for pointer, checksum in sections.items() if previous_sections.get(pointer) != checksum}
+    stack = list(changed)
+    while stack:
+        pointer = stack.pop()
+        try:
+            refs = resolver.find_refs(resolver.resolve_document_pointer(spec_dict, pointer))
+        except KeyError:
+            continue  # validation of the referencing section reports it
+        for ref in refs:
+            section = get_section(ref)
+            if section is None:
+                return spec_dict
+            if section not in changed:
+                changed.add(section)
+                stack.append(section)
+
+    changed_spec = {key: value for key, value in spec_dict.items() if key not in ('paths', 'components')}
+    changed_spec['paths'] = {}
+    for section, components in spec_dict.get('components', {}).items():
+        if not isinstance(components, dict):
+            changed_spec.setdefault('components', {})[section] = components
+    for pointer in changed:
+        tokens = [resolver.unescape_token(token) for token in pointer.split('/')[1:]]
+        parent = changed_spec
+        for token in tokens[:-1]:
+            parent = parent.setdefault(token, {})
+        parent[tokens[-1]] = resolver.resolve_document_pointer(spec_dict, pointer)
+
+    return changed_spec
+
+
 def load_spec_file():
     """Saves specification yaml/json as a dict in Config, then validates using *validate_specification()*
+
+    Any $ref to another file is bundled into the specification (see *pixis.resolver.bundle()*). If Config.BUNDLE is
+    set, the bundled specification is also saved there, so it can be used as a single file specification later.
+    A specification that was already loaded by this process, and whose files didn't change since, isn't parsed again
+    (see *pixis.resolver.load_specification()*)
     """
-    with pathlib.Path(cfg.Config.SPEC).open() as f:
-        try:
-            cfg.Config.SPEC_DICT = yaml.safe_load(f)
-        except yaml.YAMLError as yaml_error:
-            try:
-                cfg.Config.SPEC_DICT = json.load(f)
-            except json.JSONDecodeError:
-                extension = pathlib.Path(cfg.Config.SPEC).suffix
-                if extension.lower() == 'json':
-                    raise
-                else:
-                    raise yaml_error
+    cfg.Config.SPEC_DICT = resolver.load_specification(cfg.Config.SPEC)
+    if cfg.Config.BUNDLE is not None:
+        with instr.phase('save_bundle'):
+            save_bundle(cfg.Config.BUNDLE)
+
+    with instr.phase('validate_specification'):
+        validate_specification(cfg.Config.SPEC_DICT)
 
-    validate_specification(cfg.Config.SPEC_DICT)
+
+def save_bundle(bundle_file):
+    """Saves the (bundled) specification to @bundle_file as json or yaml, depending on the file extension
+
+    Args:
+        bundle_file (str): relative path of the file to save the specification to
+    """
+    path = pathlib.Path(bundle_file)
+    if path.suffix.lower() == '.json':
+        path.write_text(json.dumps(cfg.Config.SPEC_DICT, indent=2))
+    else:
+        path.write_text(yaml.safe_dump(cfg.Config.SPEC_DICT, default_flow_style=False))
+    print('Saved bundled specification in [' + str(path) + ']')
 
 
 def load_build_file(build_file):
@@ -143,18 +286,28 @@ def run_iterators():
         iterator(cfg.Config._iterator_functions_mapping[iterator_name])
 
 
+def resolve_conflicts():
+    """Resolves the conflicts that were collected while generating, see *pixis.conflicts.resolve()*
+    """
+    conflicts.resolve()
+
+
 def load_checksums():
-    """If .pixis.json exists and is valid, copies the checksums into cfg.Config._checksums
+    """If .pixis.json exists and is valid, copies the checksums into cfg.Config._checksums, see *pixis.manifest.load()*
     """
-    try:
-        cfg.Config._checksums = json.loads(pathlib.Path('.pixis.json').read_text())
+    deps.reset()
+    if manifest.load():
         print('Found .pixis.json!')
-    except FileNotFoundError:
+    else:
         print('No .pixis.json found')
 
 
 def save_checksums():
-    """Saves the newly generated files' checksums into .pixis.json
+    """Saves the newly generated files' checksums into .pixis.json, see *pixis.manifest.save()*, and removes the
+    generated versions it no longer refers to, see *pixis.history.prune()*
     """
-    pathlib.Path('.pixis.json').write_text(json.dumps(cfg.Config._checksums, sort_keys=True, indent=4))
-    print('Saved hashes for generated files in .pixis.json')
+    if manifest.save():
+        print('Saved hashes for generated files in .pixis.json')
+    else:
+        print('Hashes for generated files in .pixis.json are up to date')
+    history.prune()
@@ -0,0 +1,278 @@
+"""
+- This module regenerates code whenever the build file, the specification (or a file it has $refs to) or a template in
+  Config.TEMPLATES changes, in the same process, so everything that didn't change stays loaded:
+    - a template change only renders the files again, with the parsed specification and template context of the
+      last run (files that don't depend on the template are skipped, see pixis.dependencies)
+    - a specification change parses and validates it again, and creates a new template context
+    - a build file change starts from the settings given on the command line and does everything again
+- Changes are noticed with inotify on Linux, and by checking the files every POLL_INTERVAL seconds elsewhere. Changes
+  that happen within DEBOUNCE seconds of each other, such as an editor saving several files, cause a single run
+"""
+import copy
+import ctypes
+import ctypes.util
+import os
+import pathlib
+import select
+import sys
+import time
+import traceback
+
+import pixis.config as cfg
+import pixis.resolver as resolver
+import pixis.session as session
+
+POLL_INTERVAL = 0.25
+DEBOUNCE = 0.1
+
+# inotify(7) events that can mean a watched file changed
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_EVENTS = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+IN_EVENTS |= IN_DELETE_SELF | IN_MOVE_SELF
+
+
+def run(generate):
+    """Calls @generate once, then again every time something it depends on changes, until interrupted
+
+    Args:
+        generate (function): takes the keyword arguments reload_build and reload_spec, which tell whether the build
+            file and the specification changed since the last call
+    """
+    settings = save_config()
+    reload_build = reload_spec = True
+    while True:
+        before = snapshot(*get_watched_paths())
+        started = time.perf_counter()
+        try:
+            if reload_build:
+                restore_config(settings)
+            generate(reload_build=reload_build, reload_spec=reload_spec)
+            reload_build = reload_spec = False
+            print('Regenerated in {:.3f} seconds'.format(time.perf_counter() - started))
+        except (Exception, SystemExit):  # an invalid specification exits, which must not stop watching
+            traceback.print_exc()
+            print('Generation failed, waiting for changes')
+
+        files, directories = get_watched_paths()
+        print('Watching for changes to ' + ', '.join(sorted(files | directories)) + ' (Ctrl+C to stop)')
+        changed = Watcher(files, directories, before).wait()
+        build_file = _resolve(cfg.Config.BUILD)
+        reload_build = reload_build or build_file in changed
+        reload_spec = reload_spec or bool(changed & _get_spec_files())
+        print('\nChanged: ' + ', '.join(sorted(changed)))
+
+
+def get_watched_paths():
+    """Retrieves the files and directories that generation depends on
+
+    Returns:
+        A tuple of a set of files (the build file, the specification and every file it has $refs to) and a set of
+        directories (Config.TEMPLATES), as absolute paths
+    """
+    files = _get_spec_files()
+    if cfg.Config.BUILD is not None:
+        files.add(_resolve(cfg.Config.BUILD))
+    directories = set()
+    if cfg.Config.TEMPLATES is not None:
+        directories.add(_resolve(cfg.Config.TEMPLATES))
+    return files, directories
+
+
+def snapshot(files, directories):
+    """Retrieves the size and modification time of @files and of every file inside @directories
+
+    Args:
+        files (set): absolute paths of files
+        directories (set): absolute paths of directories
+
+    Returns:
+        A dict of absolute paths to (modification time, size) tuples, or None for files that don't exist
+    """
+    state = {}
+    for path in files:
+        state[path] = _stat(path)
+    for directory in directories:
+        for parent, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(parent, name)
+                state[path] = _stat(path)
+    return state
+
+
+class Watcher(object):
+    """Waits for changes to files
+
+    Args:
+        files (set): absolute paths of the files to watch
+        directories (set): absolute paths of the directories to watch, with everything inside them
+        previous (dict): an earlier *snapshot()*, so that changes made since then are noticed too
+    """
+
+    def __init__(self, files, directories, previous=None):
+        self.files = files
+        self.directories = directories
+        self._state = snapshot(files, directories)
+        if previous is not None:
+            self._state.update((path, stat) for path, stat in previous.items() if path in self._state)
+        try:
+            self._notifier = Inotify(files, directories)
+        except (OSError, AttributeError):  # not on Linux, no inotify in libc, or no more inotify instances/watches
+            self._notifier = None
+
+    def wait(self):
+        """Waits until files change, and then until no more files changed for DEBOUNCE seconds
+
+        Returns:
+            A set with the absolute paths of the files that changed (or were created or deleted)
+        """
+        changed = set()
+        woken = True
+        try:
+            while True:
+                state = snapshot(self.files, self.directories)
+                new_changes = {path for path in set(state) | set(self._state) if state.get(path) != self._state.get(path)}
+                self._state = state
+                if new_changes:
+                    changed |= new_changes
+                elif changed and not woken:
+                    return changed
+                woken = self._sleep(DEBOUNCE if changed else None)
+        finally:
+            if self._notifier is not None:
+                self._notifier.close()
+
+    def _sleep(self, timeout):
+        """Waits for @timeout seconds, or until something might have changed if @timeout is None
+
+        Returns:
+            True if something might have changed before @timeout seconds passed
+        """
+        if self._notifier is not None:
+            return self._notifier.wait(timeout)
+        time.sleep(POLL_INTERVAL if timeout is None else timeout)
+        return False
+
+
+class Inotify(object):
+    """Waits for inotify(7) events in the directories that contain files, and in directories
+
+    Args:
+        files (set): absolute paths of files
+        directories (set): absolute paths of directories, which are watched with every directory inside them
+
+    Raises:
+        OSError: Occurs when inotify isn't available
+    """
+
+    def __init__(self, files, directories):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is only available on Linux')
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._files = files
+        self._directories = directories
+        try:
+            self._add_watches()
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def wait(self, timeout):
+        """Waits for events, and reads them all
+
+        Args:
+            timeout (float): seconds to wait for, or None to wait until an event happens
+
+        Returns:
+            True if any events happened
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while os.read(self._fd, 64 * 1024):  # which files changed is found out by comparing snapshots
+                pass
+        except BlockingIOError:
+            pass
+        self._add_watches()  # directories might have been created
+        return True
+
+    def _add_watches(self):
+        """Watches the directories that contain the files, and every directory inside the directories. Watching a
+        directory that is already watched does nothing
+
+        Raises:
+            OSError: Occurs when a directory can't be watched
+        """
+        watched = {os.path.dirname(path) for path in self._files}
+        for directory in self._directories:
+            watched.update(parent for parent, _, _ in os.walk(directory))
+        for directory in watched:
+            if os.path.isdir(directory) and self._libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_EVENTS) < 0:
+                raise OSError(ctypes.get_errno(), 'inotify_add_watch failed for ' + directory)
+
+    def close(self):
+        """Stops watching
+        """
+        os.close(self._fd)
+
+
+def save_config():
+    """Copies the settings in Config, so that *restore_config()* can undo what a build file changed
+
+    Returns:
+        A dict of the settings
+    """
+    return {name: copy.copy(value) for name, value in vars(session.get_current().config).items()}
+
+
+def restore_config(settings):
+    """Restores the settings copied by *save_config()*, removing any that were added since
+
+    Args:
+        settings (dict): return value of *save_config()*
+    """
+    config = session.get_current().config
+    for name in list(vars(config)):
+        if name not in settings:
+            delattr(config, name)
+    for name, value in settings.items():
+        setattr(config, name, copy.copy(value))
+
+
+def _get_spec_files():
+    """Retrieves the specification file and every file it has $refs to
+
+    Returns:
+        A set of absolute paths
+    """
+    files = resolver.get_bundled_files()
+    if cfg.Config.SPEC is not None:
+        files.add(_resolve(cfg.Config.SPEC))
+    return files
+
+
+def _resolve(path):
+    """Makes @path absolute
+    """
+    return str(pathlib.Path(path).resolve())
+
+
+def _stat(path):
+    """Retrieves the modification time and size of @path, or None if it doesn't exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
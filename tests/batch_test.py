@@ -0,0 +1,53 @@
+import pathlib
+import shutil
+
+import pytest
+
+import pixis.batch as batch
+import pixis.resolver as resolver
+
+FILES = pathlib.Path(__file__).parent / 'files'
+
+
+@pytest.fixture
+def monorepo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'shared').mkdir()
+    shutil.copy(str(FILES / 'swagger.yaml'), str(tmp_path / 'shared' / 'swagger.yaml'))
+    for name, implementation in [('pets', 'flask'), ('shop', 'flask'), ('web', 'angular2')]:
+        (tmp_path / 'services' / name).mkdir(parents=True)
+        (tmp_path / 'services' / name / 'build.py').write_text(
+            "SPEC = '../../shared/swagger.yaml'\nIMPLEMENTATION = '" + implementation + "'\n")
+    return tmp_path
+
+
+def test_build_files_are_found_once_in_order(monorepo):
+    assert batch.find_build_files(['services/shop/build.py', 'services/**/build.py']) == [
+        'services/shop/build.py', 'services/pets/build.py', 'services/web/build.py']
+    with pytest.raises(FileNotFoundError):
+        batch.find_build_files(['services/*/missing.py'])
+
+
+def test_shared_specification_is_parsed_once(monorepo, monkeypatch, capsys):
+    parsed = []
+    parse_document = resolver.parse_document
+    monkeypatch.setattr(resolver, 'parse_document', lambda path: parsed.append(path) or parse_document(path))
+
+    batch.main(['services/**/build.py', '--jobs', '1', '--no-cache'])
+
+    assert parsed == ['../../shared/swagger.yaml']
+    assert capsys.readouterr().out.count('is valid (unchanged since last validated)') == 2
+    assert (monorepo / 'services' / 'pets' / 'build' / 'flask_server' / 'models' / 'pet.py').exists()
+    assert (monorepo / 'services' / 'web' / 'build' / 'model' / 'Pet.ts').exists()
+
+
+@pytest.mark.parametrize('jobs', ['1', '3'])
+def test_failed_services_are_summarized(monorepo, capsys, jobs):
+    (monorepo / 'services' / 'shop' / 'build.py').write_text("SPEC = 'missing.yaml'\n")
+
+    with pytest.raises(SystemExit):
+        batch.main(['services/**/build.py', '--jobs', jobs])
+
+    summary = capsys.readouterr().out.split('\nGenerated 3 service(s) in ')[1].splitlines()
+    assert summary[2] == '  services/shop/build.py  FAILED'
+    assert summary[4].startswith('Total: 40 generated, 0 skipped') and summary[4].endswith('1 service(s) failed')
@@ -0,0 +1,29 @@
+import os
+import sys
+
+from openapi_spec_validator import validate_spec
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+import synthetic_spec  # noqa: E402
+
+
+def test_synthetic_spec_is_valid_and_reproducible():
+    spec = synthetic_spec.generate(schemas=6, paths=4, tags=2, depth=1, ref_density=0.8, ref_depth=1, properties=3)
+
+    assert spec == synthetic_spec.generate(schemas=6, paths=4, tags=2, depth=1, ref_density=0.8, ref_depth=1, properties=3)
+    validate_spec(spec)
+    assert len(spec['components']['schemas']) == 6
+    assert len(spec['paths']) == 4
+    assert {op['tags'][0] for path in spec['paths'].values() for op in path.values() if isinstance(op, dict)} == {'tag0', 'tag1'}
+
+
+def test_synthetic_spec_limits_ref_chains():
+    spec = synthetic_spec.generate(schemas=30, paths=0, ref_density=1, ref_depth=1, depth=0)
+    schemas = spec['components']['schemas']
+
+    for schema in schemas.values():
+        for prop in schema['properties'].values():
+            if '$ref' in prop:
+                target = schemas[prop['$ref'].rsplit('/', 1)[-1]]
+                assert all('$ref' not in p for p in target['properties'].values())
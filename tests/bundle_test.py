@@ -0,0 +1,51 @@
+import pytest
+import yaml
+
+import pixis.resolver as resolver
+
+
+def write(path, document):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(document))
+
+
+@pytest.fixture
+def spec_path(tmp_path):
+    write(tmp_path / 'schemas' / 'order.yaml', {
+        'Order': {'type': 'object', 'properties': {'address': {'$ref': '#/Address'}}},
+        'Address': {'type': 'object', 'properties': {'owner': {'$ref': '../openapi.yaml#/components/schemas/User'}}},
+    })
+    write(tmp_path / 'paths' / 'orders.yaml', {
+        'get': {'responses': {'200': {'content': {'application/json': {'schema': {'$ref': '../schemas/order.yaml#/Order'}}}}}},
+    })
+    write(tmp_path / 'openapi.yaml', {
+        'paths': {'/orders': {'$ref': './paths/orders.yaml'}},
+        'components': {'schemas': {
+            'User': {'type': 'object'},
+            'Order': {'$ref': './schemas/order.yaml#/Order'},
+        }},
+    })
+    return tmp_path / 'openapi.yaml'
+
+
+def test_bundle(spec_path):
+    spec = resolver.bundle(yaml.safe_load(spec_path.read_text()), str(spec_path))
+    schemas = spec['components']['schemas']
+
+    assert schemas['Order']['properties']['address'] == {'$ref': '#/components/schemas/Address'}
+    assert schemas['Address']['properties']['owner'] == {'$ref': '#/components/schemas/User'}
+    # the path item can't be a component, so it's copied in place
+    schema = spec['paths']['/orders']['get']['responses']['200']['content']['application/json']['schema']
+    assert schema == {'$ref': '#/components/schemas/Order'}
+    assert sorted(schemas) == ['Address', 'Order', 'User']
+
+
+def test_documents_are_cached(spec_path):
+    order_path = spec_path.parent / 'schemas' / 'order.yaml'
+
+    assert resolver.load_document(str(order_path)) is resolver.load_document(str(order_path))
+
+
+def test_unique_name():
+    assert resolver._unique_name({'Order': {}, 'Order2': {}}, 'Order') == 'Order3'
+    assert resolver._unique_name({}, 'Order') == 'Order'
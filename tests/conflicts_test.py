@@ -0,0 +1,73 @@
+import builtins
+import pathlib
+import subprocess
+
+import pytest
+
+import pixis.config as cfg
+import pixis.conflicts as conflicts
+import pixis.dependencies as deps
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'templates').mkdir()
+    (tmp_path / 'templates' / 'hello.j2').write_text('hello\n')
+    for name, value in [('TEMPLATES', str(tmp_path / 'templates')), ('OVERWRITE', False), ('PROTECTED', []),
+                        ('SPEC_DICT', {}), ('BUILD', None), ('_checksums', {}), ('_file_stats', {}),
+                        ('_fingerprints', {}), ('CONFLICT_REPORT', 'conflicts.patch'), ('JOBS', 1)]:
+        monkeypatch.setattr(cfg.Config, name, value)
+    monkeypatch.setattr(builtins, 'input', lambda *args: pytest.fail('prompted for ' + str(args)))
+    deps.reset()
+
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+    (tmp_path / 'build' / 'hello.txt').write_text('hello\nedited by hand\n')
+    (tmp_path / 'templates' / 'hello.j2').write_text('hi\n')
+    deps.reset()
+    return tmp_path
+
+
+@pytest.mark.parametrize('policy, hello, new', [('keep', 'hello\nedited by hand\n', None),
+                                                ('overwrite', 'hi', None),
+                                                ('new', 'hello\nedited by hand\n', 'hi')])
+def test_conflicts_are_resolved_by_policy(project, monkeypatch, policy, hello, new):
+    monkeypatch.setattr(cfg.Config, 'CONFLICT', policy)
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+    assert (project / 'build' / 'hello.txt').read_text() == 'hello\nedited by hand\n'
+
+    assert conflicts.resolve() == 1
+
+    assert (project / 'build' / 'hello.txt').read_text() == hello
+    assert (project / 'build' / 'hello.txt.new').exists() == (new is not None)
+    if new is not None:
+        assert (project / 'build' / 'hello.txt.new').read_text() == new
+    assert conflicts.resolve() == 0
+
+
+def test_report_is_a_patch_of_every_conflict(project, monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'CONFLICT', 'keep')
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+    cfg.emit_template('hello.j2', 'build', 'other.txt')  # not a conflict, the file doesn't exist yet
+
+    conflicts.resolve()
+
+    assert (project / 'conflicts.patch').read_text() == (
+        '--- a/build/hello.txt\n+++ b/build/hello.txt\n@@ -1,2 +1 @@\n-hello\n-edited by hand\n+hi\n'
+        '\\ No newline at end of file\n')
+    subprocess.check_call(['git', 'apply', 'conflicts.patch'], cwd=str(project))
+    assert (project / 'build' / 'hello.txt').read_text() == 'hi'
+
+
+def test_missing_newlines_are_marked_in_the_diff():
+    diff = conflicts.get_diff((pathlib.Path('a.txt'), 'a', 'b'))
+
+    assert diff.splitlines()[2:] == ['@@ -1 +1 @@', '-a', '\\ No newline at end of file', '+b',
+                                     '\\ No newline at end of file']
+
+
+def test_invalid_policy_is_rejected(monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'CONFLICT', 'rebase')
+
+    with pytest.raises(ValueError):
+        conflicts.get_policy()
@@ -0,0 +1,130 @@
+import pytest
+
+import pixis.cache as cache
+import pixis.config as cfg
+import pixis.dependencies as deps
+
+SPEC = {
+    'paths': {
+        '/pet/{petId}': {'get': {'responses': {'200': {'$ref': '#/components/responses/Pet'}}}},
+    },
+    'components': {
+        'responses': {'Pet': {'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Pet'}}}}},
+        'schemas': {
+            'Pet': {'type': 'object', 'properties': {'tag': {'$ref': '#/components/schemas/Tag'}}},
+            'Tag': {'type': 'object'},
+            'User': {'type': 'object'},
+        },
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def spec(monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'SPEC_DICT', SPEC)
+    deps.reset()
+    yield
+    deps.reset()
+
+
+def test_resolve_pointer():
+    assert deps._resolve_pointer('/paths/~1pet~1{petId}/get') is SPEC['paths']['/pet/{petId}']['get']
+    assert deps._resolve_pointer('/components/schemas/Missing') is None
+
+
+def test_pointer_closure_follows_references():
+    closure = deps._get_pointer_closure(['/paths/~1pet~1{petId}'])
+
+    assert closure == [
+        '/components/responses/Pet',
+        '/components/schemas/Pet',
+        '/components/schemas/Tag',
+        '/paths/~1pet~1{petId}',
+    ]
+
+
+def test_checksum_ignores_key_order():
+    assert cache.checksum_value({'a': 1, 'b': 2}) == cache.checksum_value({'b': 2, 'a': 1})
+    assert cache.checksum_value({'a': 1}) != cache.checksum_value({'a': 2})
+
+
+def test_fingerprint_changes_with_the_item_and_pixis(monkeypatch):
+    template = cfg.get_environment('pixis').get_template('server_flask/model.j2')
+    monkeypatch.setattr(cfg.Config, '_sources', {
+        ('_current_schema', 'Pet'): ['/components/schemas/Pet'],
+        ('_current_schema', 'User'): ['/components/schemas/User'],
+    })
+
+    pet = deps.get_fingerprint(template, ('_current_schema', 'Pet'))
+
+    assert pet == deps.get_fingerprint(template, ('_current_schema', 'Pet'))
+    assert pet != deps.get_fingerprint(template, ('_current_schema', 'User'))
+    deps._get_memo()['pixis'] = 'another version'
+    assert pet != deps.get_fingerprint(template, ('_current_schema', 'Pet'))
+
+
+def test_only_files_with_the_same_fingerprint_are_up_to_date(tmp_path, monkeypatch):
+    generated = tmp_path / 'pet.py'
+    generated.write_text('')
+    monkeypatch.setattr(cfg.Config, '_checksums', {str(generated): 'checksum'})
+    monkeypatch.setattr(cfg.Config, '_fingerprints', {str(generated): 'fingerprint'})
+
+    assert deps.is_up_to_date(generated, 'fingerprint')
+    assert not deps.is_up_to_date(generated, 'other fingerprint')
+    generated.unlink()
+    assert not deps.is_up_to_date(generated, 'fingerprint')
+
+
+def test_fingerprint_changes_when_schemas_are_added(monkeypatch):
+    template = cfg.get_environment('pixis').get_template('server_flask/model.j2')
+    monkeypatch.setattr(cfg.Config, '_sources', {('_current_schema', 'Pet'): ['/components/schemas/Pet']})
+    pet = deps.get_fingerprint(template, ('_current_schema', 'Pet'))
+
+    schemas = dict(SPEC['components']['schemas'], Owner={'type': 'object'})
+    monkeypatch.setattr(cfg.Config, 'SPEC_DICT', dict(SPEC, components=dict(SPEC['components'], schemas=schemas)))
+    deps.reset()
+
+    assert pet != deps.get_fingerprint(template, ('_current_schema', 'Pet'))
+
+
+def test_settings_change_with_the_source_of_custom_classes_and_helpers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / 'custom_implementation.py').write_text('class Custom(object):\n    pass\n')
+    (tmp_path / 'custom_helpers.py').write_text('PREFIX = 1\n')
+    import custom_helpers
+    import custom_implementation
+    monkeypatch.setattr(cfg.Config, 'IMPLEMENTATION', custom_implementation.Custom)
+    monkeypatch.setattr(cfg.Config, 'custom_helpers', custom_helpers, raising=False)
+    settings = deps._get_settings_checksum()
+
+    (tmp_path / 'custom_implementation.py').write_text('class Custom(object):\n    NAME = 1\n')
+    deps.reset()
+    implementation_changed = deps._get_settings_checksum()
+    (tmp_path / 'custom_helpers.py').write_text('PREFIX = 2\n')
+    deps.reset()
+
+    assert len({settings, implementation_changed, deps._get_settings_checksum()}) == 3
+
+
+def test_settings_of_functions_and_objects_are_checked_by_source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / 'naming_helpers.py').write_text(
+        'def prefix(name):\n    return name\n\n\nclass Namer(object):\n    def __init__(self):\n        self.case = 1\n')
+    import naming_helpers
+    monkeypatch.setattr(cfg.Config, 'prefix', naming_helpers.prefix, raising=False)
+    monkeypatch.setattr(cfg.Config, 'NAMER', naming_helpers.Namer(), raising=False)
+    settings = deps._get_settings_checksum()
+
+    cfg.Config.NAMER = naming_helpers.Namer()  # at another address
+    deps.reset()
+    assert deps._get_settings_checksum() == settings
+
+    cfg.Config.NAMER.case = 2
+    deps.reset()
+    attribute_changed = deps._get_settings_checksum()
+    (tmp_path / 'naming_helpers.py').write_text('def prefix(name):\n    return "x" + name\n')
+    deps.reset()
+
+    assert len({settings, attribute_changed, deps._get_settings_checksum()}) == 3
@@ -0,0 +1,234 @@
+import datetime
+import importlib
+import pathlib
+import shutil
+import typing
+
+import pytest
+
+import pixis.generator as generator
+
+FILES = pathlib.Path(__file__).parent / 'files'
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('service')
+    shutil.copy(str(FILES / 'swagger.yaml'), str(directory / 'swagger.yaml'))
+    (directory / 'build.py').write_text("IMPLEMENTATION = 'flask'\nFLASK_SERVER_NAME = 'models_test_server'\n")
+    generator.Generator(str(directory), cache_dir=None).generate()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.syspath_prepend(str(directory / 'build'))
+        yield directory / 'build' / 'models_test_server'
+
+
+def test_from_dict_reads_fields_without_reflection(server):
+    pet = importlib.import_module('models_test_server.models.pet')
+    assert 'deserialize_model' not in (server / 'models' / 'pet.py').read_text()
+
+    rex = pet.Pet.from_dict({'id': 1, 'category': {'id': 2, 'name': 'dogs'}, 'name': 'rex', 'photoUrls': ['a.png'],
+                             'tags': [{'id': 3, 'name': 'good'}], 'status': 'sold'})
+
+    assert rex.category.name == 'dogs' and rex.tags[0].name == 'good'
+    assert rex.to_dict()['photoUrls'] == ['a.png']
+    assert pet.Pet.from_dict({'name': 'rex'}).tags is None
+    assert pet.Pet.validate({'name': 'rex', 'photoUrls': [1, 2]}) == 'photoUrls[0] must be a string'
+    with pytest.raises(ValueError):
+        pet.Pet.from_dict({'status': 'lost'})
+
+
+def test_null_optional_enums_are_accepted(server):
+    flask = pytest.importorskip('flask')
+    app = importlib.import_module('models_test_server.app').create_app()
+    pet = {'name': 'x', 'photoUrls': [], 'status': None}
+
+    response = app.test_client().post('/pet', data=flask.json.dumps(pet), content_type='application/json')
+
+    assert response.status_code == 200
+    assert importlib.import_module('models_test_server.models.pet').Pet.from_dict(pet).status is None
+
+
+def test_to_dict_skips_optional_nulls(server):
+    pet = importlib.import_module('models_test_server.models.pet')
+    tag = importlib.import_module('models_test_server.models.tag')
+
+    rex = pet.Pet(name='rex', tags=[tag.Tag(id=3)])
+
+    assert rex.to_dict() == {'name': 'rex', 'photoUrls': None, 'tags': [{'id': 3}]}
+    assert pet.Pet.from_dict(rex.to_dict()).to_dict() == rex.to_dict()
+
+
+def test_json_backend_is_chosen_at_generation_time(server, tmp_path):
+    assert 'import orjson' in (server / 'encoder.py').read_text()
+    assert 'app.json_encoder = encoder.CustomJSONEncoder' in (server / 'app.py').read_text()
+
+    shutil.copy(str(FILES / 'swagger.yaml'), str(tmp_path / 'swagger.yaml'))
+    (tmp_path / 'build.py').write_text("IMPLEMENTATION = 'flask'\nFLASK_JSON_BACKEND = 'json'\n")
+    generator.Generator(str(tmp_path), cache_dir=None).generate()
+
+    encoder = (tmp_path / 'build' / 'flask_server' / 'encoder.py').read_text()
+    assert 'orjson' not in encoder and 'ujson' not in encoder and 'def dumps(o):' in encoder
+
+
+def test_json_backends_coerce_keys_like_the_json_module(server):
+    pytest.importorskip('flask')
+    encoder = importlib.import_module('models_test_server.encoder')
+    tag = importlib.import_module('models_test_server.models.tag')
+
+    assert encoder.dumps({1: tag.Tag(id=3), 'b': [None]}) == '{"1":{"id":3},"b":[null]}'
+
+
+def test_dates_are_deserialized(server):
+    order = importlib.import_module('models_test_server.models.order')
+    try:
+        import dateutil  # noqa: F401
+    except ImportError:
+        expected = '2018-01-02T03:04:05'
+    else:
+        expected = datetime.datetime(2018, 1, 2, 3, 4, 5)
+
+    assert order.Order.from_dict({'shipDate': '2018-01-02T03:04:05'}).shipDate == expected
+    assert order.Order.from_dict({}).shipDate is None
+    assert order.Order.from_dict({'shipDate': '2018-01-02T03:04:05'}).to_dict() == {'shipDate': '2018-01-02T03:04:05'}
+
+
+def test_generic_deserialization_supports_typing_generics(server):
+    util = importlib.import_module('models_test_server.util')
+    tag = importlib.import_module('models_test_server.models.tag')
+
+    tags = util._deserialize({'a': [{'id': 1}]}, typing.Dict[str, typing.List[tag.Tag]])
+
+    assert tags['a'][0].id == 1
+
+
+def test_models_have_no_instance_dict(server):
+    order = importlib.import_module('models_test_server.models.order')
+
+    placed = order.Order(id=1, status='placed')
+
+    assert not hasattr(placed, '__dict__')
+    assert order.Order.STATUS_VALUES == frozenset(['placed', 'approved', 'delivered'])
+    assert placed == order.Order.from_dict({'id': 1, 'status': 'placed'}) and placed != order.Order(id=2)
+
+
+def test_server_settings_can_be_overridden_when_started(server, monkeypatch):
+    gunicorn_conf = importlib.import_module('models_test_server.gunicorn_conf')
+    assert (gunicorn_conf.bind, gunicorn_conf.threads, gunicorn_conf.backlog) == ('0.0.0.0:8082', 1, 2048)
+
+    monkeypatch.setenv('PORT', '9000')
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    gunicorn_conf = importlib.reload(gunicorn_conf)
+
+    assert (gunicorn_conf.bind, gunicorn_conf.workers) == ('0.0.0.0:9000', 3)
+    assert 'EXPOSE 8082' in (server.parent / 'Dockerfile').read_text()
+
+
+CONSTRAINED_SPEC = """
+openapi: 3.0.0
+info:
+  title: Constraints
+  version: 1.0.0
+servers:
+  - url: http://localhost/v1
+paths: {}
+components:
+  schemas:
+    Owner:
+      type: object
+      required: [name]
+      properties:
+        name:
+          type: string
+          minLength: 2
+          maxLength: 8
+          pattern: '^[a-z]+$'
+        age:
+          type: integer
+          minimum: 0
+          maximum: 150
+          exclusiveMaximum: true
+        score:
+          type: number
+          multipleOf: 0.5
+        step:
+          type: number
+          multipleOf: 0.1
+        level:
+          type: integer
+          enum: [1, 2, 3]
+        ratio:
+          type: number
+          enum: [0.5, 1.5]
+        nicknames:
+          type: array
+          items:
+            type: string
+          minItems: 1
+          maxItems: 2
+          uniqueItems: true
+        ranks:
+          type: array
+          items:
+            type: integer
+            enum: [1, 2]
+        pets:
+          type: array
+          items:
+            $ref: '#/components/schemas/Animal'
+          uniqueItems: true
+    Animal:
+      type: object
+      required: [kind]
+      properties:
+        kind:
+          type: string
+          enum: [cat, dog]
+"""
+
+
+@pytest.fixture(scope='module')
+def owner_model(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('constrained')
+    (directory / 'swagger.yaml').write_text(CONSTRAINED_SPEC)
+    (directory / 'build.py').write_text("IMPLEMENTATION = 'flask'\nFLASK_SERVER_NAME = 'constrained_server'\n")
+    generator.Generator(str(directory), cache_dir=None).generate()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.syspath_prepend(str(directory / 'build'))
+        yield importlib.import_module('constrained_server.models.owner').Owner
+
+
+@pytest.mark.parametrize('owner, error', [
+    ({'name': 'ann', 'age': 0, 'score': 1.5, 'step': 0.3, 'level': 2, 'ratio': 1.5, 'nicknames': ['a'], 'ranks': [2],
+      'pets': [{'kind': 'cat'}]}, None),
+    ({}, 'name is required'),
+    ({'name': 3}, 'name must be a string'),
+    ({'name': 'a'}, 'name must be at least 2 characters long'),
+    ({'name': 'abcdefghi'}, 'name must be at most 8 characters long'),
+    ({'name': 'Ann'}, 'name must match ^[a-z]+$'),
+    ({'name': 'ann', 'age': True}, 'age must be an integer'),
+    ({'name': 'ann', 'age': -1}, 'age must be at least 0'),
+    ({'name': 'ann', 'age': 150}, 'age must be less than 150'),
+    ({'name': 'ann', 'score': 0.2}, 'score must be a multiple of 0.5'),
+    ({'name': 'ann', 'step': 0.25}, 'step must be a multiple of 0.1'),
+    ({'name': 'ann', 'level': 4}, 'level must be one of [1, 2, 3]'),
+    ({'name': 'ann', 'level': '2'}, 'level must be an integer'),
+    ({'name': 'ann', 'ratio': 1.0}, 'ratio must be one of [0.5, 1.5]'),
+    ({'name': 'ann', 'nicknames': []}, 'nicknames must have at least 1 items'),
+    ({'name': 'ann', 'nicknames': ['a', 'b', 'c']}, 'nicknames must have at most 2 items'),
+    ({'name': 'ann', 'nicknames': ['a', 'a']}, 'nicknames must not have duplicate items'),
+    ({'name': 'ann', 'nicknames': ['a', 1]}, 'nicknames[1] must be a string'),
+    ({'name': 'ann', 'nicknames': [{}]}, 'nicknames[0] must be a string'),
+    ({'name': 'ann', 'ranks': [1, True]}, 'ranks[1] must be an integer'),
+    ({'name': 'ann', 'ranks': [2, 3]}, 'ranks[1] must be one of [1, 2]'),
+    ({'name': 'ann', 'pets': {}}, 'pets must be an array'),
+    ({'name': 'ann', 'pets': [{'kind': 'cat'}, {'kind': 'cow'}]}, "pets[1].kind must be one of ['cat', 'dog']"),
+    ({'name': 'ann', 'pets': [[]]}, 'pets[0].Animal must be an object'),
+    ({'name': 'ann', 'pets': [{'kind': 'cat'}, {'kind': 'cat'}]}, 'pets must not have duplicate items'),
+])
+def test_constraints_are_compiled_into_validators(owner_model, owner, error):
+    assert owner_model.validate(owner) == error
+
+
+def test_enum_values_keep_their_type(owner_model):
+    assert owner_model.LEVEL_VALUES == frozenset([1, 2, 3]) and owner_model.RATIO_VALUES == frozenset([0.5, 1.5])
+    assert owner_model.from_dict({'name': 'ann', 'level': 3}).level == 3
@@ -0,0 +1,105 @@
+import filecmp
+import pathlib
+import shutil
+import threading
+
+import pytest
+
+import pixis.config as cfg
+import pixis.generator as generator
+import pixis.session as session
+
+FILES = pathlib.Path(__file__).parent / 'files'
+
+
+def make_service(directory, server_name):
+    directory.mkdir()
+    shutil.copy(str(FILES / 'swagger.yaml'), str(directory / 'swagger.yaml'))
+    (directory / 'build.py').write_text("IMPLEMENTATION = 'flask'\nFLASK_SERVER_NAME = '" + server_name + "'\n")
+    return directory
+
+
+def generated_files(directory):
+    return sorted(str(path.relative_to(directory)) for path in (directory / 'build').glob('**/*') if path.is_file())
+
+
+def test_services_are_generated_in_one_process(tmp_path):
+    pets = generator.Generator(str(make_service(tmp_path / 'pets', 'pets_server')), cache_dir=None)
+    shop = generator.Generator(str(make_service(tmp_path / 'shop', 'shop_server')), cache_dir=None, conflict='keep')
+
+    assert pets.generate()['generated'] > 0
+    assert shop.generate()['generated'] > 0
+    assert pets.generate()['generated'] == 0  # nothing changed
+
+    assert 'build/pets_server/models/pet.py' in generated_files(tmp_path / 'pets')
+    assert not any('shop_server' in name for name in generated_files(tmp_path / 'pets'))
+    assert not any('pets_server' in name for name in generated_files(tmp_path / 'shop'))
+    assert cfg.Config.FLASK_SERVER_NAME == 'flask_server'  # the default session is untouched
+    assert shop.session.config.CONFLICT == 'keep' and pets.session.config.CONFLICT == 'prompt'
+
+
+def test_services_are_regenerated_when_the_servers_change(tmp_path):
+    directory = make_service(tmp_path / 'web', 'web_server')
+    (directory / 'build.py').write_text("IMPLEMENTATION = 'angular2'\n")
+    web = generator.Generator(str(directory), cache_dir=None)
+    web.generate()
+
+    spec = (directory / 'swagger.yaml').read_text()
+    (directory / 'swagger.yaml').write_text(spec.replace('https://virtserver.swaggerhub.com', 'https://api.example.com'))
+
+    assert web.generate()['generated'] > 0
+    services = list((directory / 'build' / 'api').glob('*.service.ts'))
+    assert services and all("'https://api.example.com/" in service.read_text() for service in services)
+
+
+def test_services_are_generated_in_parallel(tmp_path):
+    directories = [make_service(tmp_path / name, name + '_server') for name in ('pets', 'shop', 'zoo')]
+    serial = [generator.Generator(str(directory), cache_dir=None, conflict='keep') for directory in directories]
+    counts = generator.generate_all(serial)
+    for directory in directories:
+        shutil.move(str(directory / 'build'), str(directory / 'serial'))
+
+    parallel = [generator.Generator(str(directory), cache_dir=None, conflict='keep') for directory in directories]
+    assert generator.generate_all(parallel, jobs=3) == counts
+    for directory in directories:
+        comparison = filecmp.dircmp(str(directory / 'serial'), str(directory / 'build'))
+        assert not comparison.left_only and not comparison.right_only and not comparison.diff_files
+
+
+def test_parallel_services_cannot_prompt(tmp_path):
+    services = [generator.Generator(str(tmp_path)), generator.Generator(str(tmp_path))]
+    with pytest.raises(ValueError):
+        generator.generate_all(services, jobs=2)
+
+
+def test_sessions_do_not_share_settings_or_context():
+    seen = {}
+    ready = threading.Barrier(2)
+
+    def use_session(name):
+        with session.Session(cfg.Config.create_settings()).activate():
+            cfg.Config.OUTPUT = name
+            cfg.Config._checksums[name] = name
+            cfg.TEMPLATE_CONTEXT['service'] = name
+            ready.wait()
+            seen[name] = (cfg.Config.OUTPUT, dict(cfg.Config._checksums), dict(cfg.TEMPLATE_CONTEXT))
+
+    threads = [threading.Thread(target=use_session, args=(name,)) for name in ('pets', 'shop')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen == {name: (name, {name: name}, {'service': name}) for name in ('pets', 'shop')}
+    assert 'service' not in cfg.TEMPLATE_CONTEXT
+
+
+def test_deleting_a_setting_restores_its_default(monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'PROTECTED', ['setup.py'])
+    cfg.Config.ADDED = True
+
+    del cfg.Config.PROTECTED
+    del cfg.Config.ADDED
+
+    assert cfg.Config.PROTECTED == [] and cfg.Config.PROTECTED is not cfg.Config._defaults['PROTECTED']
+    assert not hasattr(cfg.Config, 'ADDED')
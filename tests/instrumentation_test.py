@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import pixis.config as cfg
+import pixis.instrumentation as instr
+
+
+@pytest.fixture(autouse=True)
+def measurements(monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'TRACE_JSON', 'trace.json')
+    instr.reset()
+    yield
+    instr.reset()
+
+
+def test_phases_are_reported_in_the_order_they_started(capsys):
+    with instr.phase('load_spec_file'):
+        with instr.phase('validate_specification'):
+            pass
+    with instr.phase('run_iterators'):
+        pass
+
+    instr.report()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines[1:4]] == ['load_spec_file', 'validate_specification', 'run_iterators']
+    assert lines[2].startswith('    validate_specification')
+
+
+def test_timings_and_counts_are_merged_from_workers(tmp_path):
+    with instr.timed('render', 'model.j2'):
+        pass
+    instr.count('generated')
+    worker = instr.collect()
+
+    with instr.timed('render', 'model.j2'):
+        pass
+    instr.count('skipped')
+    instr.merge(worker)
+    instr.save_trace(str(tmp_path / 'trace.json'))
+
+    assert instr._get_measurements().timings['render']['model.j2'][0] == 2
+    assert instr._get_measurements().counts == {'generated': 1, 'skipped': 1}
+    events = json.loads((tmp_path / 'trace.json').read_text())['traceEvents']
+    assert [(event['name'], event['cat'], event['ph']) for event in events] == [('model.j2', 'render', 'X')] * 2
+
+
+@pytest.mark.parametrize('jobs, backend', [(1, 'thread'), (3, 'process')])
+def test_files_are_counted_in_every_backend(monkeypatch, jobs, backend):
+    monkeypatch.setattr(cfg, 'TEMPLATE_CONTEXT', {'schemas': {'Pet': None, 'Tag': None, 'User': None}})
+    monkeypatch.setattr(cfg.Config, '_checksums', {})
+    monkeypatch.setattr(cfg.Config, 'JOBS', jobs)
+    monkeypatch.setattr(cfg.Config, 'JOBS_BACKEND', backend)
+
+    cfg.schema_iterator([lambda: instr.count('protected')])
+
+    assert instr._get_measurements().counts == {'protected': 3}
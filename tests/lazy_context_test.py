@@ -0,0 +1,72 @@
+import pixis.config as cfg
+import pixis.openapi as oapi
+import pixis.template_handler as tmpl
+from pixis.languages.python import Python
+
+
+def test_values_are_built_on_first_access():
+    built = []
+
+    def build(key):
+        built.append(key)
+        return [key]
+
+    lazy = tmpl.LazyDict([('a', lambda: build('a')), ('b', lambda: build('b'))])
+
+    assert list(lazy) == ['a', 'b']
+    assert built == []
+    assert lazy['a'] is lazy['a']
+    assert built == ['a']
+
+
+def test_map_values_applies_to_built_and_future_values():
+    lazy = tmpl.LazyDict([('a', lambda: [1]), ('b', lambda: [2])])
+    lazy['a']
+
+    lazy.map_values(lambda value: value.append(0))
+
+    assert lazy['a'] == [1, 0]
+    assert lazy['b'] == [2, 0]
+
+
+def test_attributes_are_computed_on_first_access(monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'LANGUAGE', Python)
+    schema = oapi.Schema('Pet', {
+        'type': 'object',
+        'required': ['name'],
+        'properties': {'name': {'type': 'string'}, 'tags': {'type': 'array', 'items': {'$ref': '#/components/schemas/Tag'}}},
+    })
+
+    assert not hasattr(schema, '__dict__')
+    assert getattr(schema, '_properties', None) is None
+    assert [(p.name, p.type, p.is_required) for p in schema.properties] == [('name', 'str', True), ('tags', 'List[Tag]', False)]
+    assert getattr(schema, '_properties', None) is schema.properties
+    assert schema.dependencies == ['Tag']
+    assert schema.maxLength is None
+
+
+def test_path_does_not_modify_specification():
+    shared = {'name': 'limit', 'in': 'query'}
+    own = {'name': 'id', 'in': 'path', 'required': True}
+    operation = {'operationId': 'get_pet', 'parameters': [own], 'responses': {}}
+    parent = {'url': '/pet/{id}', 'method': 'get', 'parameters': [shared]}
+
+    path = oapi.Path(parent, operation)
+
+    assert operation['parameters'] == [own]
+    assert [p.name for p in path.parameters] == ['limit', 'id']
+
+
+def test_attributes_that_are_not_slots_can_still_be_set():
+    prop = oapi.Property('Pet', 'name', {'type': 'string', 'enum': ['a']}, None)
+
+    prop.label = 'Name'
+    prop.enums = ['b']
+
+    assert not hasattr(prop, '__dict__')
+    assert prop.label == 'Name'
+    assert prop.enums == ['b']
+    assert oapi.Property('Pet', 'name', {'enum': ['a']}, None).enums == ['a']
+    assert not hasattr(oapi.Property('Pet', 'name', {}, None), 'label')
+    del prop.label
+    assert not hasattr(prop, 'label')
@@ -0,0 +1,135 @@
+import json
+import pathlib
+
+import pytest
+
+import pixis.config as cfg
+import pixis.dependencies as deps
+import pixis.manifest as manifest
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'templates').mkdir()
+    (tmp_path / 'templates' / 'hello.j2').write_text('hello')
+    for name, value in [('TEMPLATES', str(tmp_path / 'templates')), ('OVERWRITE', False), ('PROTECTED', []),
+                        ('SPEC_DICT', {}), ('BUILD', None), ('_checksums', {}), ('_file_stats', {}),
+                        ('_fingerprints', {})]:
+        monkeypatch.setattr(cfg.Config, name, value)
+    deps.reset()
+    return tmp_path
+
+
+def change_template(project, text):
+    (project / 'templates' / 'hello.j2').write_text(text)
+    deps.reset()
+
+
+def test_manifest_is_only_saved_when_it_changed(project):
+    cfg.Config._checksums['build/a.txt'] = manifest.checksum('a')
+    cfg.Config._file_stats['build/a.txt'] = [1, 5]
+
+    assert manifest.save()
+    assert not manifest.save()
+    assert manifest.load()
+    assert not manifest.save()
+    assert json.loads((project / '.pixis.json').read_text()) == {
+        'version': 2, 'generation': 1, 'files': {'build/a.txt': [manifest.checksum('a'), 1, 5, None]},
+    }
+
+
+def test_changes_are_appended_to_the_journal(project):
+    for name in 'abc':
+        cfg.Config._checksums['build/' + name + '.txt'] = manifest.checksum(name)
+        cfg.Config._file_stats['build/' + name + '.txt'] = [1, 5]
+    manifest.save()
+    saved = (project / '.pixis.json').read_text()
+
+    cfg.Config._checksums['build/a.txt'] = manifest.checksum('A')
+    assert manifest.save()
+    del cfg.Config._checksums['build/b.txt']
+    assert manifest.save()
+
+    assert (project / '.pixis.json').read_text() == saved
+    assert manifest.load()
+    assert cfg.Config._checksums == {'build/a.txt': manifest.checksum('A'), 'build/c.txt': manifest.checksum('c')}
+    assert cfg.Config._file_stats == {'build/a.txt': [1, 5], 'build/c.txt': [1, 5]}  # saved after the files changed
+
+    cfg.Config._checksums['build/c.txt'] = manifest.checksum('C')
+    assert manifest.save()  # the journal now has as many entries as .pixis.json
+    assert not (project / '.pixis.journal').exists()
+    assert json.loads((project / '.pixis.json').read_text())['files'] == {
+        'build/a.txt': [manifest.checksum('A'), 1, 5, None], 'build/c.txt': [manifest.checksum('C'), 1, 5, None],
+    }
+
+
+def test_interrupted_journal_saves_are_ignored(project):
+    for name in 'ab':
+        cfg.Config._checksums['build/' + name + '.txt'] = manifest.checksum(name)
+        cfg.Config._file_stats['build/' + name + '.txt'] = [1, 5]
+    manifest.save()
+    cfg.Config._checksums['build/a.txt'] = manifest.checksum('A')
+    manifest.save()
+    journal = (project / '.pixis.journal').read_text().splitlines()
+    (project / '.pixis.journal').write_text('\n'.join(journal[:-1]) + '\n{"files":{"build/c.txt"')
+
+    assert manifest.load()
+    assert cfg.Config._checksums == {'build/a.txt': manifest.checksum('A'), 'build/b.txt': manifest.checksum('b')}
+    assert cfg.Config._file_stats == {'build/b.txt': [1, 5]}  # a.txt wasn't there to check, as its save didn't end
+    assert manifest.save()
+    assert not (project / '.pixis.journal').exists()
+
+
+def test_old_manifest_is_upgraded(project):
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+    (project / '.pixis.json').write_text(json.dumps({'build/hello.txt': 'd41d8cd98f00b204e9800998ecf8427e'}))
+    manifest.load()
+    change_template(project, 'hi')
+    (project / 'build' / 'hello.txt').write_text('')  # md5 of the empty text above
+
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+
+    assert (project / 'build' / 'hello.txt').read_text() == 'hi'
+    assert cfg.Config._checksums == {'build/hello.txt': manifest.checksum('hi')}
+
+
+def test_unmodified_files_are_not_read(project, monkeypatch):
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+    change_template(project, 'hi')
+
+    def read_text(self, *args, **kwargs):
+        raise AssertionError('read ' + str(self))
+
+    monkeypatch.setattr(pathlib.Path, 'read_text', read_text)
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+    monkeypatch.undo()
+
+    assert (project / 'build' / 'hello.txt').read_text() == 'hi'
+
+
+def test_modified_files_are_prompted_for(project, monkeypatch):
+    prompts = []
+    monkeypatch.setattr(cfg, '_prompt', lambda *args: prompts.append(args[:3]))
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+    (project / 'build' / 'hello.txt').write_text('edited by hand')
+    change_template(project, 'hi')
+
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+
+    assert prompts == [(pathlib.Path('build/hello.txt'), 'edited by hand', 'hi')]
+
+
+def test_large_files_are_streamed_into_place(project):
+    change_template(project, '{% for i in range(100000) %}line {{ i }} é\n{% endfor %}')
+    text = ''.join('line {} é\n'.format(i) for i in range(100000))
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+    (project / 'build' / 'hello.txt').chmod(0o600)
+    change_template(project, '{% for i in range(100000) %}line {{ i }} é\n{% endfor %}end')
+
+    cfg.emit_template('hello.j2', 'build', 'hello.txt')
+
+    assert (project / 'build' / 'hello.txt').read_bytes() == (text + 'end').encode('utf-8')
+    assert (project / 'build' / 'hello.txt').stat().st_mode & 0o777 == 0o600
+    assert cfg.Config._checksums == {'build/hello.txt': manifest.checksum(text + 'end')}
+    assert [p.name for p in (project / 'build').iterdir()] == ['hello.txt']
@@ -0,0 +1,92 @@
+import builtins
+
+import pytest
+
+import pixis.config as cfg
+import pixis.conflicts as conflicts
+import pixis.dependencies as deps
+import pixis.history as history
+import pixis.manifest as manifest
+from pixis.merge import merge3
+
+BASE = 'import a\n\ndef f():\n    return 1\n\n\ndef g():\n    return 2\n'
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'templates').mkdir()
+    (tmp_path / 'templates' / 'code.j2').write_text(BASE + '\n')  # jinja removes one trailing newline
+    for name, value in [('TEMPLATES', str(tmp_path / 'templates')), ('OVERWRITE', False), ('PROTECTED', []),
+                        ('SPEC_DICT', {}), ('BUILD', None), ('_checksums', {}), ('_file_stats', {}),
+                        ('_fingerprints', {}), ('CONFLICT', 'merge'), ('CONFLICT_REPORT', 'conflicts.patch'),
+                        ('CACHE_DIR', '.pixis'), ('JOBS', 1)]:
+        monkeypatch.setattr(cfg.Config, name, value)
+    monkeypatch.setattr(builtins, 'input', lambda *args: pytest.fail('prompted for ' + str(args)))
+    deps.reset()
+    cfg.emit_template('code.j2', 'build', 'code.py')
+    return tmp_path
+
+
+def regenerate(project, edited, generated):
+    (project / 'build' / 'code.py').write_text(edited)
+    (project / 'templates' / 'code.j2').write_text(generated + '\n')
+    deps.reset()
+    cfg.emit_template('code.j2', 'build', 'code.py')
+    conflicts.resolve()
+    return (project / 'build' / 'code.py').read_text()
+
+
+def test_changes_to_different_lines_are_merged():
+    merged, markers = merge3('a\nb\nc\nd\n', 'a\nB\nc\nd\n', 'a\nb\nc\nD\ne\n')
+
+    assert (merged, markers) == ('a\nB\nc\nD\ne\n', 0)
+
+
+def test_same_changes_are_merged():
+    assert merge3('a\nb\n', 'a\nB\n', 'a\nB\n') == ('a\nB\n', 0)
+
+
+def test_different_changes_to_the_same_lines_are_marked():
+    merged, markers = merge3('a\nb\nc\n', 'a\nB\nc\n', 'a\nX\nc\n')
+
+    assert (merged, markers) == ('a\n<<<<<<< current\nB\n=======\nX\n>>>>>>> generated\nc\n', 1)
+
+
+def test_last_generated_version_is_stored(project):
+    assert history.load(cfg.Config._checksums['build/code.py']) == BASE
+    assert history.load(manifest.checksum('something else')) is None
+
+    cfg.Config._checksums.clear()
+    assert history.prune() == 1
+    assert history.load(manifest.checksum(BASE)) is None
+
+
+def test_hand_edits_are_merged_with_the_new_version(project):
+    edited = BASE.replace('return 1', 'return 42')
+    generated = BASE.replace('import a', 'import a\nimport b')
+
+    merged = regenerate(project, edited, generated)
+
+    assert merged == edited.replace('import a', 'import a\nimport b')
+    assert cfg.Config._checksums == {'build/code.py': manifest.checksum(generated)}
+    assert 'build/code.py' not in cfg.Config._file_stats
+    assert history.load(manifest.checksum(generated)) == generated
+    assert not (project / 'conflicts.patch').exists()
+
+
+def test_only_true_conflicts_are_reported(project):
+    merged = regenerate(project, BASE.replace('return 1', 'return 42'), BASE.replace('return 1', 'return 3'))
+
+    assert '<<<<<<< current\n    return 42\n=======\n    return 3\n>>>>>>> generated\n' in merged
+    assert '+    return 3\n' in (project / 'conflicts.patch').read_text()
+    assert not (project / 'build' / 'code.py.new').exists()
+
+
+def test_files_without_a_stored_version_get_a_new_file(project):
+    for path in (project / '.pixis' / 'generated').iterdir():
+        path.unlink()
+    generated = BASE.replace('import a', 'import b')
+
+    assert regenerate(project, BASE + '# mine\n', generated) == BASE + '# mine\n'
+    assert (project / 'build' / 'code.py.new').read_text() == generated
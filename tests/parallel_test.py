@@ -0,0 +1,33 @@
+import pytest
+
+import pixis.config as cfg
+
+
+@pytest.fixture
+def context(monkeypatch):
+    monkeypatch.setattr(cfg, 'TEMPLATE_CONTEXT', {'schemas': {'Pet': None, 'Tag': None, 'User': None}})
+    monkeypatch.setattr(cfg.Config, '_checksums', {})
+    return cfg.TEMPLATE_CONTEXT
+
+
+@pytest.mark.parametrize('jobs, backend', [(1, 'thread'), (3, 'thread'), (3, 'process')])
+def test_items_get_their_own_context(context, monkeypatch, jobs, backend):
+    monkeypatch.setattr(cfg.Config, 'JOBS', jobs)
+    monkeypatch.setattr(cfg.Config, 'JOBS_BACKEND', backend)
+
+    def generate():
+        name = cfg.get_context()['_current_schema']
+        cfg._state.checksums[name] = name.lower()
+
+    cfg.schema_iterator([generate])
+
+    assert list(cfg.Config._checksums.items()) == [('Pet', 'pet'), ('Tag', 'tag'), ('User', 'user')]
+
+
+def test_item_context_is_read_only(context):
+    def generate():
+        with pytest.raises(TypeError):
+            cfg.get_context()['_current_schema'] = 'Other'
+
+    cfg.schema_iterator([generate])
+    assert cfg.get_context() is context
@@ -0,0 +1,69 @@
+import pathlib
+
+import pytest
+
+import pixis.config as cfg
+import pixis.protection as protection
+
+
+@pytest.mark.parametrize('rule, path, protected', [
+    # rules without a kind match like they always did: as text, or as a regular expression from the start
+    ('models/__init__.py', '/server/models/__init__.py', True),
+    ('models/__init__.py', '/server/models/pet.py', False),
+    ('/server/.*_controller.py', '/server/controllers/pet_controller.py', True),
+    ('.*_controller.py', '/server/controllers/pet_controller.py', True),
+    ('controller(', '/server/controller(s)/x.py', True),  # not a regular expression
+    ('literal:.py', '/server/setup.py', True),
+    ('literal:.py', '/server/setupxpy', False),
+    ('re:.*\\.py$', '/server/setup.py', True),
+    ('re:server', '/server/setup.py', False),  # matched from the start of the path
+    ('glob:*.py', '/server/models/pet.py', True),
+    ('glob:*.py', '/server/models/pet.pyc', False),
+    ('glob:/*.py', '/setup.py', True),
+    ('glob:/*.py', '/server/setup.py', False),
+    ('glob:/server/*.py', '/server/models/pet.py', False),
+    ('glob:/server/**/*.py', '/server/models/pet.py', True),
+    ('glob:/server/**/*.py', '/server/pet.py', True),
+    ('glob:models', '/server/models/pet.py', True),  # every file in the directory
+    ('glob:model', '/server/models/pet.py', False),
+    ('glob:pet?.py', '/server/pets.py', True),
+    ('glob:pet[!s].py', '/server/pets.py', False),
+    ('glob:pet[a-z].py', '/server/pets.py', True),
+])
+def test_rules(rule, path, protected):
+    assert (protection.Matcher([rule]).match(path) == rule) == protected
+
+
+def test_matching_rule_is_reported():
+    matcher = protection.Matcher(['glob:*.ts', '.*(?P<name>pet)_(?P=name)', 're:/server/models', 'literal:store'])
+
+    assert matcher.match('/server/pet_pet.py') == '.*(?P<name>pet)_(?P=name)'
+    assert matcher.match('/server/models/store.py') == 're:/server/models'
+    assert matcher.match('/server/store.py') == 'literal:store'
+    assert matcher.match('/server/user.py') is None
+
+
+@pytest.mark.parametrize('rules', [
+    ['glob:models', 're:/server/.*', 'glob:*.py', 'literal:pet'],
+    ['glob:*.py', 'glob:models', 're:/server/.*', 'literal:pet'],
+    ['literal:pet', 'glob:*.py', 're:/server/.*', 'glob:models'],
+])
+def test_first_matching_rule_in_order_is_reported(rules):
+    assert protection.Matcher(rules).match('/server/models/pet.py') == rules[0]
+
+
+def test_invalid_regular_expressions_are_rejected():
+    with pytest.raises(ValueError):
+        protection.Matcher(['re:controller('])
+
+
+def test_matcher_is_compiled_once(monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'PROTECTED', ['glob:*.py'])
+
+    matcher = protection.get_matcher()
+    assert cfg._is_protected(pathlib.Path('build/server/setup.py')) == 'glob:*.py'
+    assert protection.get_matcher() is matcher
+
+    monkeypatch.setattr(cfg.Config, 'PROTECTED', ['glob:*.ts'])
+    assert protection.get_matcher() is not matcher
+    assert cfg._is_protected(pathlib.Path('build/server/setup.py')) is None
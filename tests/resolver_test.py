@@ -0,0 +1,68 @@
+import pytest
+
+import pixis.config as cfg
+import pixis.resolver as resolver
+
+SPEC = {
+    'paths': {
+        '/pet/{petId}': {'get': {'parameters': [{'$ref': '#/components/parameters/PetId'}]}},
+    },
+    'components': {
+        'parameters': {
+            'PetId': {'$ref': '#/components/parameters/Id'},
+            'Id': {'name': 'id', 'in': 'path'},
+            'Loop': {'$ref': '#/components/parameters/Loop2'},
+            'Loop2': {'$ref': '#/components/parameters/Loop'},
+        },
+        'schemas': {
+            'a/b~c': {'type': 'string'},
+        },
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def spec(monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'SPEC_DICT', SPEC)
+    yield
+    resolver.reset()
+
+
+def test_resolve_pointer_with_escapes():
+    assert resolver.resolve_pointer('/components/schemas/a~1b~0c') == {'type': 'string'}
+    assert resolver.resolve_pointer('/paths/~1pet~1{petId}/get/parameters/0') == {'$ref': '#/components/parameters/PetId'}
+
+
+def test_resolve_follows_chains_and_memoizes():
+    resolved = resolver.resolve({'$ref': '#/components/parameters/PetId'})
+
+    assert resolved is SPEC['components']['parameters']['Id']
+    assert resolver._get_state().resolved['#/components/parameters/PetId'] is resolved
+    assert resolver._get_state().resolved['#/components/parameters/Id'] is resolved
+
+
+def test_resolve_without_ref():
+    dikt = {'name': 'id'}
+    assert resolver.resolve(dikt) is dikt
+
+
+def test_circular_ref():
+    with pytest.raises(ValueError, match='Circular'):
+        resolver.resolve_ref('#/components/parameters/Loop')
+
+
+def test_missing_ref():
+    with pytest.raises(KeyError):
+        resolver.resolve_ref('#/components/parameters/Missing')
+
+
+def test_ref_name():
+    assert resolver.ref_name('#/components/schemas/Pet') == 'Pet'
+    assert resolver.ref_name('#/components/schemas/a~1b~0c') == 'a/b~c'
+
+
+def test_index_is_rebuilt_for_new_spec(monkeypatch):
+    resolver.get_index()
+    monkeypatch.setattr(cfg.Config, 'SPEC_DICT', {'info': {}})
+
+    assert resolver.resolve_pointer('/info') == {}
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import pixis.config as cfg
+import pixis.resolver as resolver
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'CACHE_DIR', str(tmp_path / '.pixis'))
+    return tmp_path / '.pixis'
+
+
+def test_json_spec(tmp_path, cache_dir):
+    spec_path = tmp_path / 'spec.txt'
+    spec_path.write_text(json.dumps({'openapi': '3.0.0', 'paths': {}}))
+
+    assert resolver.parse_document(str(spec_path)) == {'openapi': '3.0.0', 'paths': {}}
+
+
+def test_yaml_spec_starting_with_a_flow_mapping(tmp_path, cache_dir):
+    spec_path = tmp_path / 'spec.yaml'
+    spec_path.write_text('{openapi: 3.0.0, paths: {}}\n')
+
+    assert resolver.parse_document(str(spec_path)) == {'openapi': '3.0.0', 'paths': {}}
+
+
+def test_yaml_spec_is_cached(tmp_path, cache_dir):
+    spec_path = tmp_path / 'spec.yaml'
+    spec_path.write_text('openapi: 3.0.0\npaths: {}\n')
+
+    first = resolver.parse_document(str(spec_path))
+    second = resolver.parse_document(str(spec_path))
+
+    assert first == second == {'openapi': '3.0.0', 'paths': {}}
+    assert first is not second
+    assert len(list((cache_dir / 'specs').iterdir())) == 1
+
+
+def test_cache_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'CACHE_DIR', None)
+    spec_path = tmp_path / 'spec.yaml'
+    spec_path.write_text('openapi: 3.0.0\n')
+
+    assert resolver.parse_document(str(spec_path)) == {'openapi': '3.0.0'}
+    assert list(tmp_path.iterdir()) == [spec_path]
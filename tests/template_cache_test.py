@@ -0,0 +1,37 @@
+import pixis.config as cfg
+
+
+def test_templates_are_compiled_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'TEMPLATES', str(tmp_path / 'templates'))
+    monkeypatch.setattr(cfg, '_ENVIRONMENTS', {})
+
+    template, is_user_template = cfg.get_template('server_flask/init.j2')
+    again, _ = cfg.get_template('server_flask/init.j2')
+
+    assert not is_user_template
+    assert template is again
+    assert len(cfg._ENVIRONMENTS) == 2
+
+
+def test_user_templates_take_priority(tmp_path, monkeypatch):
+    templates = tmp_path / 'templates'
+    templates.mkdir()
+    (templates / 'init.j2').write_text('custom')
+    monkeypatch.setattr(cfg.Config, 'TEMPLATES', str(templates))
+    monkeypatch.setattr(cfg, '_ENVIRONMENTS', {})
+
+    template, is_user_template = cfg.get_template('server_flask/init.j2')
+
+    assert is_user_template
+    assert template.render() == 'custom'
+
+
+def test_bytecode_cache(tmp_path, monkeypatch):
+    cache = tmp_path / 'cache'
+    monkeypatch.setattr(cfg.Config, 'TEMPLATES', str(tmp_path / 'templates'))
+    monkeypatch.setattr(cfg.Config, 'BYTECODE_CACHE', str(cache))
+    monkeypatch.setattr(cfg, '_ENVIRONMENTS', {})
+
+    cfg.get_template('server_flask/init.j2')
+
+    assert len(list(cache.iterdir())) == 1
@@ -0,0 +1,71 @@
+import copy
+
+import pytest
+
+import pixis.config as cfg
+import pixis.utils as utils
+
+SPEC = {
+    'openapi': '3.0.0',
+    'info': {'title': 'pets', 'version': '1'},
+    'paths': {
+        '/pets': {'get': {'responses': {'200': {'$ref': '#/components/responses/Pets'}}}},
+        '/users': {'get': {'responses': {'200': {'description': 'users'}}}},
+    },
+    'components': {
+        'responses': {'Pets': {'description': 'pets', 'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Pet'}}}}},
+        'schemas': {
+            'Pet': {'type': 'object'},
+            'User': {'type': 'object'},
+        },
+    },
+}
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'CACHE_DIR', str(tmp_path / '.pixis'))
+    monkeypatch.setattr(cfg.Config, 'SPEC', str(tmp_path / 'swagger.yaml'))
+    return tmp_path / '.pixis'
+
+
+def test_changed_spec_has_changed_sections_and_references():
+    spec = copy.deepcopy(SPEC)
+    previous = utils.get_spec_sections(spec)
+    spec['paths']['/pets']['get']['summary'] = 'changed'
+
+    changed = utils.get_changed_spec(spec, utils.get_spec_sections(spec), previous)
+
+    assert list(changed['paths']) == ['/pets']
+    assert changed['components'] == {
+        'responses': SPEC['components']['responses'],
+        'schemas': {'Pet': {'type': 'object'}},
+    }
+
+
+def test_changed_top_level_validates_everything():
+    spec = copy.deepcopy(SPEC)
+    previous = utils.get_spec_sections(spec)
+    spec['info']['title'] = 'changed'
+
+    assert utils.get_changed_spec(spec, utils.get_spec_sections(spec), previous) is spec
+
+
+def test_valid_spec_is_cached(cache_dir, monkeypatch, capsys):
+    monkeypatch.setattr(cfg.Config, 'VALIDATE', 'full')
+    utils.validate_specification(SPEC)
+    utils.validate_specification(SPEC)
+
+    assert 'unchanged since last validated' in capsys.readouterr().out
+
+
+def test_fast_validation_stops_at_first_error(cache_dir, monkeypatch, capsys):
+    monkeypatch.setattr(cfg.Config, 'VALIDATE', 'fast')
+    spec = copy.deepcopy(SPEC)
+    del spec['info']
+    spec['paths']['/users']['get']['responses']['200'] = {}
+
+    with pytest.raises(SystemExit):
+        utils.validate_specification(spec)
+
+    assert capsys.readouterr().out.count('Error:') == 1
@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import pixis.config as cfg
+import pixis.watch as watch
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'templates').mkdir()
+    (tmp_path / 'templates' / 'model.j2').write_text('model')
+    (tmp_path / 'swagger.yaml').write_text('openapi: 3.0.0')
+    (tmp_path / 'build.py').write_text('')
+    monkeypatch.setattr(cfg.Config, 'BUILD', 'build.py')
+    monkeypatch.setattr(cfg.Config, 'SPEC', 'swagger.yaml')
+    monkeypatch.setattr(cfg.Config, 'TEMPLATES', 'templates')
+    monkeypatch.setattr(watch, 'DEBOUNCE', 0.05)
+    return tmp_path
+
+
+def change_later(*paths):
+    def change():
+        time.sleep(0.1)
+        for path in paths:
+            path.parent.mkdir(exist_ok=True)
+            path.write_text('changed')
+    thread = threading.Thread(target=change)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize('inotify', [
+    pytest.param(True, marks=pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify is Linux only')),
+    False,
+])
+def test_changes_are_noticed(project, monkeypatch, inotify):
+    if not inotify:
+        monkeypatch.setattr(sys, 'platform', 'win32')
+        monkeypatch.setattr(watch, 'POLL_INTERVAL', 0.05)
+    watcher = watch.Watcher(*watch.get_watched_paths())
+    assert (watcher._notifier is not None) == inotify
+
+    # a directory created while watching is watched too
+    thread = change_later(project / 'templates' / 'model.j2', project / 'templates' / 'new' / 'controller.j2')
+    changed = watcher.wait()
+    thread.join()
+
+    assert changed == {str(project / 'templates' / 'model.j2'), str(project / 'templates' / 'new' / 'controller.j2')}
+
+
+def test_changes_made_while_generating_are_noticed(project):
+    before = watch.snapshot(*watch.get_watched_paths())
+    (project / 'swagger.yaml').write_text('openapi: 3.0.1')
+    os.utime(str(project / 'swagger.yaml'), ns=(0, 0))
+
+    assert watch.Watcher(*watch.get_watched_paths(), previous=before).wait() == {str(project / 'swagger.yaml')}
+
+
+def test_only_what_changed_is_loaded_again(project, monkeypatch):
+    changes = [{str(project / 'templates' / 'model.j2')}, {str(project / 'swagger.yaml')}, {str(project / 'build.py')}]
+
+    class Watcher(object):
+        def __init__(self, *args):
+            pass
+
+        def wait(self):
+            if not changes:
+                raise KeyboardInterrupt
+            return changes.pop(0)
+
+    calls = []
+
+    def generate(reload_build, reload_spec):
+        calls.append((reload_build, reload_spec))
+        cfg.Config.ADDED_BY_BUILD_FILE = reload_build
+
+    monkeypatch.setattr(watch, 'Watcher', Watcher)
+    with pytest.raises(KeyboardInterrupt):
+        watch.run(generate)
+
+    assert calls == [(True, True), (False, False), (False, True), (True, False)]
+    del cfg.Config.ADDED_BY_BUILD_FILE
+
+
+def test_build_file_settings_are_undone(monkeypatch):
+    monkeypatch.setattr(cfg.Config, 'PROTECTED', [])
+    settings = watch.save_config()
+    cfg.Config.PROTECTED.append('setup.py')
+    cfg.Config.FROM_BUILD_FILE = True
+
+    watch.restore_config(settings)
+
+    assert cfg.Config.PROTECTED == []
+    assert not hasattr(cfg.Config, 'FROM_BUILD_FILE')